@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Module: batch.py
+# Project: solar-system-graph
+# Chức năng: Chạy hàng loạt truy vấn tuyến đường (start, end) song song trên nhiều tiến trình
+
+import os
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import dijkstra
+
+from algorithms.graph_core import as_core
+from algorithms.results import RouteResult
+
+# Số phần tử tối đa của ma trận khoảng cách (nguồn x N) tính trong một tác vụ
+TASK_BLOCK_SIZE = 1 << 22
+
+# scipy.sparse.csgraph chỉ nhận chỉ số int32: ghi indices / indptr dạng int32 thì tiến trình con dùng thẳng
+# memory-map, không copy. Vượt giới hạn này (nnz hoặc số node >= 2**31) thì buộc phải int64 (mỗi tiến trình tự copy).
+INDEX_LIMIT = 2**31
+
+# CSR dùng chung trong mỗi tiến trình con (gắn một lần ở initializer)
+_WORKER_CSR = None
+
+def _attach_worker(folder, n):
+    """Initializer của tiến trình con: mở CSR dạng memory-map (chỉ đọc, không copy)"""
+    global _WORKER_CSR
+    arrays = [np.load(os.path.join(folder, f"{name}.npy"), mmap_mode='r')
+              for name in ('data', 'indices', 'indptr')]
+    _WORKER_CSR = sp.csr_matrix(tuple(arrays), shape=(n, n), copy=False)
+
+def _solve_sources(csr, sources, targets_per_source):
+    """
+    Một Dijkstra nhiều nguồn cho cả nhóm, rồi dựng đường đi tới các đích cần hỏi.
+    Trả về list (source, target, distance, path_ids).
+    """
+    dist, pred = dijkstra(csr, directed=True, indices=sources, return_predecessors=True)
+    dist = dist.reshape(len(sources), -1)
+    pred = pred.reshape(len(sources), -1)
+    out = []
+    for row, (src, targets) in enumerate(zip(sources, targets_per_source)):
+        for t in targets:
+            d = float(dist[row, t])
+            path = []
+            if np.isfinite(d):
+                path = [t]
+                while path[-1] != src:
+                    path.append(int(pred[row, path[-1]]))
+                path.reverse()
+            out.append((src, t, d, path))
+    return out
+
+def _worker_task(sources, targets_per_source):
+    return _solve_sources(_WORKER_CSR, sources, targets_per_source)
+
+def _group_by_source(core, pairs):
+    """Gom các cặp theo đỉnh nguồn -> mỗi cây đường đi ngắn nhất chỉ tính một lần"""
+    groups = defaultdict(list)
+    for start, end in pairs:
+        groups[core.id_of(start)].append(core.id_of(end))
+    return groups
+
+def _make_tasks(groups, n, block_size):
+    """Chia các nguồn thành tác vụ sao cho ma trận (nguồn x N) không vượt block_size"""
+    per_task = max(1, block_size // max(n, 1))
+    sources = list(groups)
+    for i in range(0, len(sources), per_task):
+        chunk = sources[i:i + per_task]
+        yield chunk, [groups[s] for s in chunk]
+
+def batch_routes(G, pairs, workers=None, block_size=TASK_BLOCK_SIZE):
+    """
+    Tìm đường cho hàng loạt cặp (start, end).
+    - Các cặp cùng start được gom lại: mỗi nguồn chỉ chạy Dijkstra một lần.
+    - Các nhóm được chia cho một ProcessPool; đồ thị được chia sẻ chỉ đọc qua
+      file memory-map của các mảng CSR (không pickle đồ thị cho từng tác vụ);
+      chỉ số lưu int32 (nnz < INDEX_LIMIT) để scipy dùng thẳng, không copy.
+    - Kết quả được yield (RouteResult) ngay khi từng tác vụ xong.
+    workers=1 chạy ngay trong tiến trình hiện tại.
+    """
+    core = as_core(G)
+    names = core.nodes
+    groups = _group_by_source(core, pairs)
+    tasks = list(_make_tasks(groups, core.n_nodes, block_size))
+    csr = core.to_scipy()
+
+    def to_results(rows):
+        for s, t, d, path in rows:
+            yield RouteResult(names[s], names[t], [names[i] for i in path], d)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1: # Không có hoặc chỉ một tác vụ: khỏi dựng pool
+        for sources, targets in tasks:
+            yield from to_results(_solve_sources(csr, sources, targets))
+        return
+
+    with tempfile.TemporaryDirectory(prefix="astrograph-csr-") as folder:
+        # Ghi CSR ra đĩa một lần; các tiến trình con mở bằng mmap (dùng chung page cache)
+        np.save(os.path.join(folder, "data.npy"), np.asarray(csr.data, dtype=np.float64))
+        index_dtype = np.int32 if max(csr.nnz, core.n_nodes) < INDEX_LIMIT else np.int64
+        np.save(os.path.join(folder, "indices.npy"), np.asarray(csr.indices, dtype=index_dtype))
+        np.save(os.path.join(folder, "indptr.npy"), np.asarray(csr.indptr, dtype=index_dtype))
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_attach_worker,
+                                 initargs=(folder, core.n_nodes)) as pool:
+            futures = [pool.submit(_worker_task, sources, targets) for sources, targets in tasks]
+            for future in as_completed(futures):
+                yield from to_results(future.result())
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# Module: dynamic_mst.py
+# Project: solar-system-graph
+# Chức năng: Duy trì cây (rừng) khung nhỏ nhất khi thêm tuyến / giảm trọng số, không chạy lại Kruskal
+
+from collections import deque
+
+from algorithms.mst import _kruskal_edges, _scipy_forest
+from algorithms.results import MSTResult
+from algorithms.steps import Step
+
+class DynamicMST:
+    """
+    Rừng khung nhỏ nhất gắn với một SpaceGraph, đồng bộ qua nhật ký thay đổi (journal).
+    - Thêm cạnh / giảm trọng số u-v: theo tính chất chu trình, tìm cạnh nặng nhất trên
+      đường u - v trong cây; nếu nặng hơn cạnh mới thì hoán đổi. O(kích thước cây) mỗi lần.
+    - u, v ở hai cây khác nhau: cạnh mới nối hai cây.
+    - Các thay đổi khác (tăng trọng số cạnh cây, nạp lại, đổi chế độ...) -> dựng lại từ đầu.
+    Đồ thị có hướng được xét như đồ thị vô hướng nền (giống Kruskal trên CSR có hướng).
+    """
+
+    def __init__(self, space_graph):
+        self.space_graph = space_graph
+        self.rebuilds = 0
+        self._build()
+
+    # =========================================================================
+    #  DỰNG / CẬP NHẬT
+    # =========================================================================
+
+    def _build(self):
+        sg = self.space_graph
+        core = sg.core
+        names = core.nodes
+        self.version = sg.version
+        self.tree = {name: {} for name in names}  # {u: {v: weight}} của các cạnh cây
+        self.total_weight = 0.0
+        forest = _scipy_forest(core)
+        for u, v, w in (forest if forest is not None else _kruskal_edges(core)):
+            self._link(names[u], names[v], w)
+        self.rebuilds += 1
+
+    def _link(self, u, v, w):
+        self.tree[u][v] = w
+        self.tree[v][u] = w
+        self.total_weight += w
+
+    def _cut(self, u, v):
+        w = self.tree[u].pop(v)
+        del self.tree[v][u]
+        self.total_weight -= w
+
+    def refresh(self):
+        """
+        Đồng bộ với phiên bản đồ thị hiện tại.
+        Trả về list Step mô tả phần cây thay đổi (edges = cạnh thêm, removed = cạnh bỏ);
+        khi phải dựng lại thì là một Step clear_edges=True chứa toàn bộ cây.
+        """
+        sg = self.space_graph
+        if sg.version == self.version:
+            return []
+        changes = sg.changes_since(self.version)
+        if changes is None or len(changes) > max(8, len(self.tree) // 8):
+            return self._rebuild_step()
+
+        steps = []
+        for c in changes:
+            if c.kind in ('node_moved', 'nodes_moved'):
+                continue
+            if c.kind == 'node_added':
+                self.tree.setdefault(c.u, {})
+                steps.append(Step(c.u, (c.u,)))
+                continue
+            if c.kind == 'edge_reweighted' and c.new > c.old:
+                # Cạnh ngoài cây nặng lên không ảnh hưởng; cạnh cây nặng lên thì cần tìm cạnh thay thế
+                if c.v in self.tree.get(c.u, {}):
+                    return self._rebuild_step()
+                continue
+            if c.kind not in ('edge_added', 'edge_reweighted'):
+                return self._rebuild_step()
+            step = self.insert(c.u, c.v, c.new)
+            if step is not None:
+                steps.append(step)
+        self.version = sg.version
+        return steps
+
+    def _rebuild_step(self):
+        self._build()
+        return [Step(None, tuple(self.tree), tuple(self.edges()), clear_edges=True)]
+
+    def insert(self, u, v, w):
+        """
+        Thêm cạnh u-v trọng số w (hoặc giảm trọng số) vào rừng theo tính chất chu trình.
+        Trả về Step nếu cây đổi hình dạng, None nếu không.
+        """
+        if u == v:
+            return None
+        tree = self.tree
+        new_nodes = tuple(x for x in (u, v) if x not in tree)
+        for x in new_nodes:
+            tree[x] = {}
+
+        if v in tree[u]:
+            # Đã là cạnh cây: chỉ giảm trọng số, hình dạng cây giữ nguyên
+            if w < tree[u][v]:
+                self.total_weight += w - tree[u][v]
+                tree[u][v] = tree[v][u] = w
+            return None
+
+        path = self._tree_path(u, v)
+        if path is None:
+            # Hai cây khác nhau -> nối lại thành một
+            self._link(u, v, w)
+            return Step(v, new_nodes, ((u, v),))
+
+        # Cạnh nặng nhất trên chu trình tạo thành
+        a, b = max(zip(path, path[1:]), key=lambda e: tree[e[0]][e[1]])
+        if tree[a][b] <= w:
+            return None
+        self._cut(a, b)
+        self._link(u, v, w)
+        return Step(v, new_nodes, ((u, v),), removed=((a, b), (b, a)))
+
+    def _tree_path(self, u, v):
+        """Đường đi duy nhất u -> v trong rừng (BFS), None nếu khác cây"""
+        tree = self.tree
+        parent = {u: None}
+        queue = deque([u])
+        while queue:
+            x = queue.popleft()
+            if x == v:
+                path = [v]
+                while parent[path[-1]] is not None:
+                    path.append(parent[path[-1]])
+                path.reverse()
+                return path
+            for y in tree[x]:
+                if y not in parent:
+                    parent[y] = x
+                    queue.append(y)
+        return None
+
+    # =========================================================================
+    #  TRUY VẤN
+    # =========================================================================
+
+    def edges(self):
+        """Các cạnh của rừng, mỗi cạnh một lần"""
+        seen = set()
+        out = []
+        for u, nbrs in self.tree.items():
+            seen.add(u)
+            out.extend((u, v) for v in nbrs if v not in seen)
+        return out
+
+    def result(self):
+        """Trạng thái hiện tại dạng MSTResult (tự đồng bộ trước)"""
+        self.refresh()
+        edges = self.edges()
+        return MSTResult(edges, self.total_weight, len(self.tree) - len(edges))
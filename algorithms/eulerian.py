@@ -1,50 +1,256 @@
 # -*- coding: utf-8 -*-
 # Module: eulerian.py
 # Project: solar-system-graph
-# Chức năng: Tìm chu trình Euler (Hierholzer's Algorithm)
+# Chức năng: Tìm chu trình Euler (Hierholzer lặp trên mảng) và Eulerize với chi phí nhỏ nhất
 
 import networkx as nx
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse.csgraph import breadth_first_order, dijkstra
+
+from algorithms.graph_core import as_core
+from algorithms.results import CircuitResult
+from algorithms.steps import Step
+
+def _edge_list(core):
+    """Danh sách cạnh (src, dst) theo id; vô hướng chỉ lấy mỗi cạnh một lần (kể cả khuyên)"""
+    src, dst, _ = core.edge_arrays()
+    if not core.directed:
+        half = src <= dst
+        src, dst = src[half], dst[half]
+    return src, dst
+
+def _check_connected(core, src, dst, start):
+    """
+    Mọi node có cạnh phải tới được từ start (có hướng: liên thông mạnh),
+    nếu không thì không tồn tại chu trình đi qua tất cả các cạnh.
+    """
+    n = core.n_nodes
+    active = np.zeros(n, dtype=bool)
+    active[src] = active[dst] = True
+    if not active[start]:
+        raise ValueError(f"Start node {core.nodes[start]} has no routes")
+
+    csr = core.to_scipy()
+    graphs = [csr, csr.T.tocsr()] if core.directed else [csr]
+    for graph in graphs:
+        reached = np.zeros(n, dtype=bool)
+        reached[breadth_first_order(graph, start, directed=True, return_predecessors=False)] = True
+        if (active & ~reached).any():
+            kind = "strongly connected" if core.directed else "connected"
+            raise ValueError(f"Routes are not {kind}; no Eulerian circuit exists")
+
+# Số node lệch bậc tối đa để ghép cặp chính xác (ma trận khoảng cách k x N, ghép cặp ~O(k^3));
+# lớn hơn thì ghép tham lam theo vùng Voronoi (một Dijkstra nhiều nguồn mỗi vòng)
+EXACT_MATCHING_LIMIT = 200
+
+def _walk_back(pred, b):
+    """Các cung trên đường ngắn nhất (theo hàng predecessor) từ nguồn tới b, theo chiều xuôi"""
+    arcs = []
+    p = int(pred[b])
+    while p >= 0:
+        arcs.append((p, b))
+        b, p = p, int(pred[p])
+    arcs.reverse()
+    return arcs
+
+def _exact_sizes(core, k):
+    return k <= EXACT_MATCHING_LIMIT and k * core.n_nodes <= (1 << 24)
+
+def _eulerize_undirected(core, src, dst):
+    """
+    Ghép cặp các node bậc lẻ với tổng độ dài đường đi nhỏ nhất (nx.min_weight_matching
+    trên đồ thị đầy đủ giữa các node lẻ), rồi đi lặp các cạnh trên đường ghép.
+    """
+    degree = np.bincount(src, minlength=core.n_nodes) + np.bincount(dst, minlength=core.n_nodes)
+    odd = np.flatnonzero(degree % 2)
+    if len(odd) == 0:
+        return []
+    if not _exact_sizes(core, len(odd)):
+        return _greedy_pairs(core, odd)
+    dist, pred = dijkstra(core.to_scipy(), directed=True, indices=odd, return_predecessors=True)
+
+    K = nx.Graph()
+    for i in range(len(odd)):
+        for j in range(i + 1, len(odd)):
+            K.add_edge(i, j, weight=dist[i, odd[j]])
+    added = []
+    for i, j in nx.min_weight_matching(K):
+        added.extend(_walk_back(pred[i], odd[j]))
+    return added
+
+def _greedy_pairs(core, odd):
+    """
+    Ghép cặp gần đúng cho nhiều node lẻ: Dijkstra nhiều nguồn (min_only) chia đồ thị thành
+    vùng Voronoi; mỗi cạnh nối hai vùng cho một ứng viên (s, t) với chi phí
+    d(s, a) + w(a, b) + d(b, t). Chọn tham lam theo chi phí, lặp lại với các node còn lẻ.
+    """
+    csr = core.to_scipy()
+    src_all, dst_all, w_all = core.edge_arrays()
+    remaining = odd
+    added = []
+    while len(remaining):
+        dist, pred, nearest = dijkstra(csr, directed=True, indices=remaining,
+                                       return_predecessors=True, min_only=True)
+        sa, sb = nearest[src_all], nearest[dst_all]
+        cross = np.flatnonzero((sa != sb) & (sa >= 0) & (sb >= 0))
+        cost = dist[src_all[cross]] + w_all[cross] + dist[dst_all[cross]]
+        cross = cross[np.argsort(cost, kind='stable')]
+
+        matched = set()
+        for a, b, s, t in zip(src_all[cross].tolist(), dst_all[cross].tolist(),
+                              sa[cross].tolist(), sb[cross].tolist()):
+            if s in matched or t in matched:
+                continue
+            matched.add(s)
+            matched.add(t)
+            added.extend(_walk_back(pred, a))
+            added.append((a, b))
+            added.extend(_walk_back(pred, b))
+        remaining = np.array([x for x in remaining.tolist() if x not in matched], dtype=np.int64)
+    return added
+
+def _eulerize_directed(core, src, dst):
+    """
+    Cân bằng bậc vào/ra: node thừa cung vào (in > out) phải đi thêm tới node thừa cung ra.
+    Bài toán vận tải giải bằng linear_sum_assignment trên chi phí đường đi ngắn nhất
+    (mỗi node được nhân bản theo độ lệch bậc).
+    """
+    n = core.n_nodes
+    balance = np.bincount(src, minlength=n) - np.bincount(dst, minlength=n)
+    need_out = np.repeat(np.arange(n), np.maximum(-balance, 0))   # in > out
+    need_in = np.repeat(np.arange(n), np.maximum(balance, 0))     # out > in
+    if len(need_out) == 0:
+        return []
+    if not _exact_sizes(core, len(need_out)):
+        return _greedy_balance(core, balance)
+    sources = np.unique(need_out)
+    dist, pred = dijkstra(core.to_scipy(), directed=True, indices=sources, return_predecessors=True)
+
+    rows = np.searchsorted(sources, need_out)
+    rows_idx, cols_idx = linear_sum_assignment(dist[rows][:, need_in])
+    added = []
+    for r, c in zip(rows_idx.tolist(), cols_idx.tolist()):
+        added.extend(_walk_back(pred[rows[r]], int(need_in[c])))
+    return added
+
+def _greedy_balance(core, balance):
+    """
+    Cân bằng gần đúng cho nhiều node lệch bậc: mỗi vòng một Dijkstra nhiều nguồn (min_only)
+    từ các node còn thiếu cung ra; node thiếu cung vào lấy nguồn gần nhất, xét theo khoảng cách tăng dần.
+    """
+    csr = core.to_scipy()
+    out_left = np.maximum(-balance, 0)
+    in_left = np.maximum(balance, 0)
+    added = []
+    while out_left.any():
+        dist, pred, nearest = dijkstra(csr, directed=True, indices=np.flatnonzero(out_left),
+                                       return_predecessors=True, min_only=True)
+        targets = np.flatnonzero(in_left)
+        for b in targets[np.argsort(dist[targets], kind='stable')].tolist():
+            s = int(nearest[b])
+            k = min(out_left[s], in_left[b])
+            if k == 0:
+                continue
+            out_left[s] -= k
+            in_left[b] -= k
+            added.extend(_walk_back(pred, b) * int(k))
+    return added
+
+def _eulerize(G, start_node):
+    """
+    Chuẩn bị đồ thị Euler dạng mảng (không sửa đồ thị gốc).
+    Trả về (core, start, src, dst, n_added): n_added cạnh cuối của src/dst là các cạnh đi lặp.
+    Raise ValueError nếu không thể có chu trình (đồ thị rỗng / không liên thông).
+    """
+    core = as_core(G)
+    if core.n_nodes == 0:
+        raise ValueError("Graph is empty")
+    start = core.id_of(start_node) if start_node is not None else 0
+    src, dst = _edge_list(core)
+    if len(src) == 0:
+        raise ValueError("Graph has no routes to traverse")
+    _check_connected(core, src, dst, start)
+
+    added = _eulerize_directed(core, src, dst) if core.directed else _eulerize_undirected(core, src, dst)
+    if added:
+        extra = np.asarray(added, dtype=np.int64)
+        src = np.concatenate([src, extra[:, 0]])
+        dst = np.concatenate([dst, extra[:, 1]])
+    return core, start, src, dst, len(added)
+
+def _hierholzer(n, src, dst, directed, start):
+    """
+    Hierholzer lặp trên mảng cạnh, mỗi node có con trỏ tới cạnh chưa dùng kế tiếp -> O(E).
+    Duyệt trên đồ thị đảo chiều để thứ tự pop ra chính là chu trình theo chiều xuôi,
+    nhờ vậy các cạnh được yield dần (không cần dựng xong cả chu trình).
+    Yield (u, v) theo id.
+    """
+    m = len(src)
+    if directed:
+        # Đồ thị đảo chiều: cạnh e = src->dst được đi từ dst sang src
+        edge_ids = np.argsort(dst, kind='stable')
+        key = dst[edge_ids]
+    else:
+        key = np.concatenate([src, dst])
+        edge_ids = np.concatenate([np.arange(m), np.arange(m)])
+        order = np.argsort(key, kind='stable')
+        key, edge_ids = key[order], edge_ids[order]
+    counts = np.bincount(key, minlength=n)
+    ptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=ptr[1:])
+
+    inc = edge_ids.tolist()
+    end = ptr[1:].tolist()
+    ptr = ptr[:-1].tolist()
+    src_l, dst_l = src.tolist(), dst.tolist()
+    used = bytearray(m)
+
+    stack = [start]
+    prev = None
+    while stack:
+        x = stack[-1]
+        p, e_end = ptr[x], end[x]
+        while p < e_end and used[inc[p]]:
+            p += 1
+        if p < e_end:
+            e = inc[p]
+            used[e] = 1
+            ptr[x] = p + 1
+            stack.append(src_l[e] ^ dst_l[e] ^ x) # Đầu còn lại của cạnh
+        else:
+            ptr[x] = p
+            stack.pop()
+            if prev is not None:
+                yield prev, x
+            prev = x
+
+def _circuit_steps(core, start, src, dst):
+    names = core.nodes
+    visited = [False] * core.n_nodes
+    for u, v in _hierholzer(core.n_nodes, src, dst, core.directed, start):
+        new_nodes = tuple(names[x] for x in (u, v) if not visited[x])
+        visited[u] = visited[v] = True
+
+        # Yield Step: (Node hiện tại, Node mới thăm, Cạnh Euler mới)
+        yield Step(names[v], new_nodes, ((names[u], names[v]),))
 
 def find_eulerian_circuit(G, start_node=None):
     """
     Tìm chu trình Euler.
-    Nếu đồ thị chưa Euler, sẽ tự động thêm cạnh (Eulerize) trên bản sao để chạy demo.
-    """
-    # 1. Tạo bản sao để không làm hỏng đồ thị gốc
-    H = G.copy()
-    if start_node is None:
-        start_node = list(H.nodes())[0]
-
-    # 2. Kiểm tra điều kiện Euler
-    if nx.is_directed(H):
-        if not nx.is_eulerian(H):
-            # Với đồ thị có hướng, việc Eulerize phức tạp hơn, ta chỉ cảnh báo
-            # Hoặc chuyển sang vô hướng để demo
-            H = H.to_undirected()
-            
-    # 3. Biến đổi thành đồ thị Euler (Eulerize) nếu cần
-    if not nx.is_eulerian(H):
-        # Thêm các cạnh giả vào các đỉnh bậc lẻ để chúng thành bậc chẵn
-        H = nx.eulerize(H)
-
-    # 4. Tìm chu trình (Hierholzer's algorithm được tích hợp trong nx)
-    # eulerian_circuit trả về generator các cạnh (u, v)
-    try:
-        circuit = list(nx.eulerian_circuit(H, source=start_node))
-    except Exception:
-        # Fallback nếu vẫn lỗi (ví dụ đồ thị không liên thông)
-        return
-
-    # 5. Yield từng bước để Animation
-    visited_edges = []
-    visited_nodes = {start_node}
-    
-    current_path_viz = []
-    
-    for u, v in circuit:
-        visited_nodes.add(u)
-        visited_nodes.add(v)
-        current_path_viz.append((u, v))
-        
-        # Yield trạng thái: (Node hiện tại, Nodes đã thăm, Đường đi Euler)
-        yield v, list(visited_nodes), current_path_viz
\ No newline at end of file
+    Nếu đồ thị chưa Euler, tự thêm các cạnh đi lặp với tổng chi phí nhỏ nhất (Eulerize).
+    Việc kiểm tra / Eulerize chạy ngay khi gọi (lỗi -> ValueError), còn các cạnh
+    của chu trình được sinh dần khi animation chạy.
+    Trả về: generator các Step
+    """
+    core, start, src, dst, _ = _eulerize(G, start_node)
+    return _circuit_steps(core, start, src, dst)
+
+def eulerian_circuit(G, start_node=None):
+    """Chế độ chỉ tính toán: trả về CircuitResult(circuit, added_edges)"""
+    core, start, src, dst, n_added = _eulerize(G, start_node)
+    names = core.nodes
+    circuit = [(names[u], names[v]) for u, v in _hierholzer(core.n_nodes, src, dst, core.directed, start)]
+    m = len(src) - n_added
+    added_edges = [(names[u], names[v]) for u, v in zip(src[m:].tolist(), dst[m:].tolist())]
+    return CircuitResult(circuit, added_edges)
@@ -1,81 +1,348 @@
 # -*- coding: utf-8 -*-
 # Module: flow.py
 # Project: solar-system-graph
-# Chức năng: Tìm luồng cực đại (Max Flow) dùng thuật toán Edmonds-Karp (cải tiến của Ford-Fulkerson)
+# Chức năng: Tìm luồng cực đại (Max Flow) và lát cắt nhỏ nhất: Edmonds-Karp, Dinic, Push-Relabel
 
-import networkx as nx
 from collections import deque
 
-def edmonds_karp(G, source, sink):
+import numpy as np
+
+from algorithms.graph_core import as_core
+from algorithms.results import FlowResult
+from algorithms.steps import Step
+
+def _build_residual(core):
+    """
+    Dựng đồ thị thặng dư dạng mảng từ CSR.
+    Có hướng: mỗi cạnh u->v (capacity = weight) sinh 2 cung: cung xuôi và cung ngược (capacity 0).
+    Trả về (indptr, head, cap, pair, forward):
+    pair[a] là chỉ số cung ngược của cung a, forward[a] = True nếu a là cạnh thật.
     """
-    Tìm luồng cực đại từ source đến sink.
-    Yield: (current_node, visited_nodes, flow_edges)
+    src, dst, w = core.edge_arrays()
+    m = len(src)
+    if not core.directed:
+        # Vô hướng: CSR đã lưu cả u->v và v->u cùng capacity -> hai cung là cặp ngược của nhau
+        # (cạnh u-v mang luồng f theo chiều nào cũng được, |f| <= capacity), số cung giảm một nửa
+        keys = src * core.n_nodes + dst
+        twin = np.searchsorted(keys, dst * core.n_nodes + src)
+        return core.indptr, dst, np.maximum(w, 0.0), twin, np.ones(m, dtype=bool)
+
+    tail = np.concatenate([src, dst])
+    head = np.concatenate([dst, src])
+    cap = np.concatenate([np.maximum(w, 0.0), np.zeros(m)])
+    twin = np.concatenate([np.arange(m, 2 * m), np.arange(m)])
+
+    # Gom các cung theo đỉnh đuôi để duyệt kề như CSR
+    order = np.argsort(tail, kind='stable')
+    new_pos = np.empty(2 * m, dtype=np.int64)
+    new_pos[order] = np.arange(2 * m)
+
+    indptr = np.zeros(core.n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tail, minlength=core.n_nodes), out=indptr[1:])
+    return indptr, head[order], cap[order], new_pos[twin[order]], order < m
+
+def _augmenting_paths(n, indptr, head, cap, pair, s, t):
+    """
+    Lõi Edmonds-Karp trên mảng (list Python để truy cập phần tử nhanh).
+    Mỗi lần tìm được đường tăng luồng ngắn nhất (BFS): cập nhật cap tại chỗ
+    rồi yield (path_arcs, path_flow).
     """
-    # Tạo đồ thị thặng dư (Residual Graph)
-    # Copy đồ thị gốc để không làm hỏng dữ liệu chính
-    R = G.copy() if G.is_directed() else G.to_directed()
-    
-    max_flow = 0
-    path_edges_viz = []
-    
     while True:
-        # 1. Tìm đường tăng luồng bằng BFS
-        parent = {node: None for node in R.nodes()}
-        queue = deque([source])
+        # 1. Tìm đường tăng luồng bằng BFS (lưu cung cha của mỗi đỉnh)
+        parent_arc = [-1] * n
+        parent_arc[s] = -2
+        queue = deque([s])
         path_found = False
         
         # BFS tìm đường đi ngắn nhất trong đồ thị thặng dư
         while queue:
             u = queue.popleft()
-            if u == sink:
+            if u == t:
                 path_found = True
                 break
             
-            for v in R.neighbors(u):
-                # Chỉ đi qua cạnh còn sức chứa (capacity > 0) và chưa duyệt
-                capacity = R[u][v].get('weight', 0) # Coi weight là capacity
-                if parent[v] is None and capacity > 0:
-                    parent[v] = u
+            for a in range(indptr[u], indptr[u + 1]):
+                v = head[a]
+                # Chỉ đi qua cung còn sức chứa (capacity > 0) và chưa duyệt
+                if parent_arc[v] == -1 and cap[a] > 0:
+                    parent_arc[v] = a
                     queue.append(v)
         
         # Nếu không còn đường tăng luồng -> Dừng
         if not path_found:
-            yield sink, list(R.nodes()), path_edges_viz
-            break
+            return
 
         # 2. Tính bottleneck (dung lượng nhỏ nhất trên đường đi tìm được)
         path_flow = float('inf')
-        v = sink
-        current_path = [] # Để vẽ
-        
-        while v != source:
-            u = parent[v]
-            current_path.append((u, v))
-            capacity = R[u][v].get('weight', 0)
-            path_flow = min(path_flow, capacity)
-            v = u
-            
-        max_flow += path_flow
-        path_edges_viz.extend(current_path)
-
-        # 3. Cập nhật đồ thị thặng dư & Yield animation
-        v = sink
-        visited_nodes = set()
-        while v != source:
-            u = parent[v]
-            visited_nodes.add(u)
-            visited_nodes.add(v)
-            
-            # Giảm capacity cạnh xuôi
-            R[u][v]['weight'] -= path_flow
-            
-            # Tăng capacity cạnh ngược (nếu chưa có thì tạo)
-            if R.has_edge(v, u):
-                R[v][u]['weight'] += path_flow
-            else:
-                R.add_edge(v, u, weight=path_flow)
-                
-            v = u
-            
-        # Yield trạng thái để vẽ đường vừa tăng luồng
-        yield source, list(visited_nodes), current_path
\ No newline at end of file
+        v = t
+        path_arcs = []
+        while v != s:
+            a = parent_arc[v]
+            path_arcs.append(a)
+            path_flow = min(path_flow, cap[a])
+            v = head[pair[a]]
+
+        # 3. Cập nhật đồ thị thặng dư
+        for a in path_arcs:
+            cap[a] -= path_flow        # Giảm capacity cung xuôi
+            cap[pair[a]] += path_flow  # Tăng capacity cung ngược
+
+        yield path_arcs, path_flow
+
+def _dinic_phases(n, indptr, head, cap, pair, s, t):
+    """
+    Lõi Dinic: mỗi pha dựng đồ thị phân tầng (BFS từ s) rồi đẩy luồng chặn
+    (blocking flow) bằng DFS lặp với con trỏ cung hiện tại.
+    Mỗi pha yield (các cung đã đẩy luồng, lượng luồng tăng thêm).
+    """
+    while True:
+        # 1. Đồ thị phân tầng
+        level = [-1] * n
+        level[s] = 0
+        queue = deque([s])
+        while queue:
+            u = queue.popleft()
+            for a in range(indptr[u], indptr[u + 1]):
+                v = head[a]
+                if level[v] < 0 and cap[a] > 0:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        if level[t] < 0:
+            return
+
+        # 2. Luồng chặn: tìm đường s -> t chỉ đi xuống tầng kế tiếp
+        it = indptr[:-1]
+        pushed = {}
+        phase_flow = 0
+        while True:
+            stack = []
+            u = s
+            while u != t:
+                end = indptr[u + 1]
+                while it[u] < end:
+                    a = it[u]
+                    v = head[a]
+                    if cap[a] > 0 and level[v] == level[u] + 1:
+                        break
+                    it[u] += 1
+                if it[u] < end:
+                    stack.append(it[u])
+                    u = head[it[u]]
+                    continue
+                # Ngõ cụt: loại u khỏi đồ thị phân tầng rồi lùi lại
+                if u == s:
+                    break
+                level[u] = -1
+                a = stack.pop()
+                u = head[pair[a]]
+                it[u] += 1
+            if u != t:
+                break
+
+            path_flow = min(cap[a] for a in stack)
+            for a in stack:
+                cap[a] -= path_flow
+                cap[pair[a]] += path_flow
+                pushed[a] = True
+            phase_flow += path_flow
+
+        yield list(pushed), phase_flow
+
+def _push_relabel_passes(n, indptr, head, cap, pair, s, t):
+    """
+    Lõi Push-Relabel (hàng đợi FIFO) với heuristic khoảng trống (gap).
+    Node còn dư (excess) được xử lý lần lượt; khi một độ cao không còn node nào,
+    mọi node cao hơn (dưới n) không thể tới t -> nâng thẳng lên n + 1 để trả luồng về s.
+    Chạy tới khi không còn node dư nên kết quả là luồng hợp lệ (không chỉ preflow).
+    Mỗi lượt (pass) qua hàng đợi yield (các cung đã đẩy, luồng tới t tăng thêm).
+    """
+    height = [0] * n
+    excess = [0] * n
+    count = [0] * (2 * n + 1)
+    height[s] = n
+    count[0] = n - 1
+    count[n] = 1
+    it = indptr[:-1]
+
+    # Bão hòa mọi cung ra từ source
+    pushed = {}
+    for a in range(indptr[s], indptr[s + 1]):
+        f = cap[a]
+        if f > 0:
+            v = head[a]
+            cap[a] = 0
+            cap[pair[a]] += f
+            excess[v] += f
+            excess[s] -= f
+            pushed[a] = True
+
+    queue = deque(v for v in range(n) if excess[v] > 0 and v != s and v != t)
+    active = [False] * n
+    for v in queue:
+        active[v] = True
+
+    before = 0
+    while True:
+        for _ in range(len(queue)):
+            u = queue.popleft()
+            active[u] = False
+            # Xả (discharge) toàn bộ phần dư của u
+            while excess[u] > 0:
+                a = it[u]
+                if a == indptr[u + 1]:
+                    # Relabel: độ cao mới = 1 + độ cao thấp nhất qua cung còn sức chứa
+                    old = height[u]
+                    new = 2 * n
+                    for b in range(indptr[u], indptr[u + 1]):
+                        if cap[b] > 0 and height[head[b]] + 1 < new:
+                            new = height[head[b]] + 1
+                    count[old] -= 1
+                    if count[old] == 0 and old < n:
+                        # Gap: các node ở trên khoảng trống không còn đường tới t
+                        for v in range(n):
+                            if old < height[v] < n:
+                                count[height[v]] -= 1
+                                height[v] = n + 1
+                                count[n + 1] += 1
+                        new = max(new, n + 1)
+                    height[u] = new
+                    count[new] += 1
+                    it[u] = indptr[u]
+                    continue
+
+                v = head[a]
+                if cap[a] > 0 and height[u] == height[v] + 1:
+                    f = excess[u] if excess[u] < cap[a] else cap[a]
+                    cap[a] -= f
+                    cap[pair[a]] += f
+                    excess[u] -= f
+                    excess[v] += f
+                    pushed[a] = True
+                    if not active[v] and v != s and v != t:
+                        active[v] = True
+                        queue.append(v)
+                else:
+                    it[u] += 1
+
+        yield list(pushed), excess[t] - before
+        if not queue:
+            return
+        before = excess[t]
+        pushed = {}
+
+# Các lõi luồng cực đại: cùng chữ ký, cập nhật cap tại chỗ, yield (arcs, flow) theo từng
+# lần tăng luồng (Edmonds-Karp), từng pha (Dinic) hoặc từng lượt hàng đợi (Push-Relabel)
+ENGINES = {
+    'edmonds_karp': _augmenting_paths,
+    'dinic': _dinic_phases,
+    'push_relabel': _push_relabel_passes,
+}
+
+def _engine(method):
+    if method not in ENGINES:
+        raise ValueError(f"Unknown max flow method: {method}")
+    return ENGINES[method]
+
+def _terminals(core, source, sink):
+    """Id của source / sink (luồng từ một node tới chính nó không xác định)"""
+    if source == sink:
+        raise ValueError(f"Source and sink must be different nodes (got {source} for both)")
+    return core.id_of(source), core.id_of(sink)
+
+def _flow_on_edges(core, head, cap0, cap, pair, forward):
+    """Luồng trên các cạnh thật: {(u, v): flow} (chỉ cạnh có flow > 0)"""
+    names = core.nodes
+    used = cap0 - np.asarray(cap)
+    arcs = np.flatnonzero(forward & (used > 0))
+    tails = head[pair[arcs]]
+    return {(names[u], names[v]): f
+            for u, v, f in zip(tails.tolist(), head[arcs].tolist(), used[arcs].tolist())}
+
+def _reachable(n, indptr, head, cap, s):
+    """Các node còn tới được từ s trong đồ thị thặng dư (list bool theo id)"""
+    reach = [False] * n
+    reach[s] = True
+    queue = deque([s])
+    while queue:
+        u = queue.popleft()
+        for a in range(indptr[u], indptr[u + 1]):
+            v = head[a]
+            if not reach[v] and cap[a] > 0:
+                reach[v] = True
+                queue.append(v)
+    return reach
+
+def _min_cut(core, indptr, head, cap, pair, forward, s):
+    """
+    Lát cắt s-t nhỏ nhất từ đồ thị thặng dư cuối: S = các node còn tới được từ s.
+    Trả về (source_side, cut_edges) với cut_edges là các cạnh thật đi từ S sang T.
+    """
+    reach = np.asarray(_reachable(core.n_nodes, indptr, head.tolist(), cap, s))
+    names = core.nodes
+    tails = head[pair]
+    arcs = np.flatnonzero(forward & reach[tails] & ~reach[head])
+    source_side = [names[i] for i in np.flatnonzero(reach).tolist()]
+    cut_edges = [(names[u], names[v]) for u, v in zip(tails[arcs].tolist(), head[arcs].tolist())]
+    return source_side, cut_edges
+
+def flow_steps(G, source, sink, method='edmonds_karp'):
+    """
+    Animation luồng cực đại (G là nx.Graph hoặc GraphCore; đồ thị gốc không bị sửa).
+    Yield: Step - mỗi lần tăng luồng / pha / lượt thay phần highlight bằng các cạnh vừa đẩy luồng;
+    bước cuối vẽ mọi cạnh đang mang luồng.
+    """
+    core = as_core(G)
+    s, t = _terminals(core, source, sink)
+    names = core.nodes
+    indptr, head_arr, cap_arr, pair_arr, forward = _build_residual(core)
+    head = head_arr.tolist()
+    pair = pair_arr.tolist()
+    cap = cap_arr.tolist()
+
+    for arcs, _ in _engine(method)(core.n_nodes, indptr.tolist(), head, cap, pair, s, t):
+        current = [] # Để vẽ
+        path_nodes = {}
+        for a in arcs:
+            u, v = names[head[pair[a]]], names[head[a]]
+            current.append((u, v))
+            path_nodes[u] = path_nodes[v] = True
+
+        # Yield trạng thái để vẽ phần luồng vừa thay đổi
+        yield Step(source, tuple(path_nodes), tuple(current), clear_edges=True)
+
+    # Hết -> vẽ lại mọi cạnh đang mang luồng
+    flows = _flow_on_edges(core, head_arr, cap_arr, cap, pair_arr, forward)
+    yield Step(sink, tuple(names), tuple(flows), clear_edges=True)
+
+def edmonds_karp(G, source, sink):
+    """Animation Edmonds-Karp: mỗi bước là một đường tăng luồng ngắn nhất"""
+    return flow_steps(G, source, sink, 'edmonds_karp')
+
+def dinic(G, source, sink):
+    """Animation Dinic: mỗi bước là luồng chặn của một pha"""
+    return flow_steps(G, source, sink, 'dinic')
+
+def push_relabel(G, source, sink):
+    """Animation Push-Relabel: mỗi bước là một lượt qua hàng đợi node dư"""
+    return flow_steps(G, source, sink, 'push_relabel')
+
+def max_flow(G, source, sink, method='dinic'):
+    """
+    Chế độ chỉ tính toán: chạy tới hết bằng method ('dinic', 'push_relabel', 'edmonds_karp').
+    Trả về FlowResult(value, flows, source_side, cut_edges):
+    flows = {(u, v): luồng trên cạnh thật}, (source_side, cut_edges) là lát cắt s-t nhỏ nhất.
+    """
+    core = as_core(G)
+    s, t = _terminals(core, source, sink)
+    indptr, head, cap, pair, forward = _build_residual(core)
+    indptr_list = indptr.tolist()
+    cap_list = cap.tolist()
+
+    value = 0
+    for _, f in _engine(method)(core.n_nodes, indptr_list, head.tolist(), cap_list,
+                                pair.tolist(), s, t):
+        value += f
+
+    flows = _flow_on_edges(core, head, cap, cap_list, pair, forward)
+    source_side, cut_edges = _min_cut(core, indptr_list, head, cap_list, pair, forward, s)
+    return FlowResult(value, flows, source_side, cut_edges)
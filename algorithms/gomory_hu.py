@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Module: gomory_hu.py
+# Project: solar-system-graph
+# Chức năng: Cây Gomory-Hu (Gusfield) - trả lời lát cắt nhỏ nhất / luồng cực đại cho mọi cặp node
+
+from algorithms.flow import _build_residual, _dinic_phases, _reachable
+from algorithms.graph_core import as_core
+
+class GomoryHuTree:
+    """
+    Cây tương đương luồng trên N node: parent[i] là cha của node i (gốc là id 0, parent = -1),
+    weight[i] là giá trị lát cắt nhỏ nhất giữa i và parent[i].
+    Luồng cực đại giữa u và v = trọng số nhỏ nhất trên đường đi u - v trong cây
+    (hai node khác thành phần liên thông nối nhau qua cạnh trọng số 0).
+    """
+
+    def __init__(self, nodes, parent, weight):
+        self.nodes = list(nodes)
+        self.index = {name: i for i, name in enumerate(self.nodes)}
+        self.parent = parent
+        self.weight = weight
+        # Gusfield luôn cho parent[i] < i -> tính độ sâu theo thứ tự id
+        self.depth = [0] * len(parent)
+        for i in range(1, len(parent)):
+            self.depth[i] = self.depth[parent[i]] + 1 if parent[i] >= 0 else 0
+
+    def _bottleneck(self, i, j):
+        """Leo hai đầu lên tổ tiên chung, trả về (giá trị nhỏ nhất, id node con của cạnh đó)"""
+        parent, weight, depth = self.parent, self.weight, self.depth
+        best, where = float('inf'), -1
+        while i != j:
+            if depth[i] < depth[j]:
+                i, j = j, i
+            if weight[i] < best:
+                best, where = weight[i], i
+            i = parent[i]
+        return best, where
+
+    def min_cut_value(self, u, v):
+        """Giá trị lát cắt nhỏ nhất (= luồng cực đại) giữa u và v, O(độ sâu cây)"""
+        if u == v:
+            return float('inf')
+        return self._bottleneck(self.index[u], self.index[v])[0]
+
+    def bottleneck_edge(self, u, v):
+        """Cạnh cây có trọng số nhỏ nhất trên đường u - v: (child, parent, value)"""
+        value, i = self._bottleneck(self.index[u], self.index[v])
+        if i < 0:
+            return None
+        return self.nodes[i], self.nodes[self.parent[i]], value
+
+    def edges(self):
+        """Các cạnh cây: list (u, parent, value)"""
+        names = self.nodes
+        return [(names[i], names[p], w)
+                for i, (p, w) in enumerate(zip(self.parent, self.weight)) if p >= 0]
+
+    def highlight(self):
+        return self.nodes, [(u, v) for u, v, _ in self.edges()]
+
+def gomory_hu_tree(G):
+    """
+    Dựng cây Gomory-Hu theo Gusfield: chỉ N - 1 lần tính max flow (Dinic),
+    không cần co đồ thị. Đồ thị phải vô hướng, capacity = weight.
+    """
+    core = as_core(G)
+    if core.directed:
+        raise ValueError("Gomory-Hu tree requires an undirected graph")
+
+    n = core.n_nodes
+    indptr, head, cap, pair, _ = _build_residual(core)
+    indptr, head, pair = indptr.tolist(), head.tolist(), pair.tolist()
+    cap0 = cap.tolist()
+
+    parent = [0] * n
+    weight = [0.0] * n
+    if n:
+        parent[0] = -1
+
+    for s in range(1, n):
+        t = parent[s]
+        cap = list(cap0) # Đồ thị thặng dư mới cho mỗi lần tính
+        value = 0
+        for _, f in _dinic_phases(n, indptr, head, cap, pair, s, t):
+            value += f
+        weight[s] = value
+
+        # Các node cùng phía với s (và đang treo dưới t) chuyển sang treo dưới s
+        reach = _reachable(n, indptr, head, cap, s)
+        for i in range(s + 1, n):
+            if reach[i] and parent[i] == t:
+                parent[i] = s
+
+    return GomoryHuTree(core.nodes, parent, weight)
@@ -3,35 +3,264 @@
 # Project: solar-system-graph
 # Chức năng: Quản lý cấu trúc dữ liệu đồ thị (NetworkX wrapper)
 
+from collections import deque, namedtuple
+
 import networkx as nx
 import numpy as np
 
+from algorithms.graph_core import GraphCore, distance_weights
+import algorithms.route_gen as route_gen
+
+# Ngưỡng số node tối đa cho phép xuất ma trận kề dạng dày (N x N float64)
+DENSE_LIMIT = 2000
+
+# Số bản ghi thay đổi tối đa được giữ lại trong nhật ký
+JOURNAL_SIZE = 10000
+
+# Một bản ghi thay đổi đồ thị.
+# kind: 'node_added' | 'node_moved' | 'nodes_moved' | 'edge_added' | 'edge_reweighted'
+#       | 'edges_bulk' | 'edges_reweighted' | 'mode_changed' | 'cleared' | 'loaded'
+# 'nodes_moved': new = tuple tên các node đã dời (tọa độ mới nằm trong positions)
+GraphChange = namedtuple('GraphChange', ['version', 'kind', 'u', 'v', 'old', 'new'])
+
+# Các thay đổi không đổi cấu trúc: cache có thể vá tại chỗ thay vì dựng lại
+PATCHABLE_KINDS = frozenset({'edge_reweighted', 'node_moved', 'nodes_moved', 'edges_reweighted',
+                             'mode_changed'})
+
+# Các thay đổi làm đổi tọa độ hoặc danh sách node (tọa độ hiển thị phải tính lại)
+POSITION_KINDS = frozenset({'node_added', 'node_moved', 'nodes_moved', 'cleared', 'loaded'})
+
 class SpaceGraph:
     def __init__(self):
+        # Kho cạnh gốc duy nhất: luôn là DiGraph.
+        # Cạnh vô hướng u-v được lưu thành 2 cung u->v và v->u cùng trọng số.
+        self._store = nx.DiGraph()
+        self._undirected_view = self._store.to_undirected(as_view=True)
+
         # Mặc định là đồ thị Vô hướng
-        self.G = nx.Graph()
         self.is_directed = False
         
         # Lưu trữ tọa độ hiển thị {tên_node: (x, y, z)}
         self.positions = {}
 
+        # Các cặp {u, v} có trọng số 2 chiều khác nhau (chỉ thấy được ở chế độ có hướng)
+        self._asymmetric = set()
+
+        # Phiên bản tăng dần sau mỗi thay đổi + nhật ký có giới hạn
+        self.version = 0
+        self.journal = deque(maxlen=JOURNAL_SIZE)
+
+        # Phiên bản riêng của tọa độ: chỉ tăng với POSITION_KINDS (đổi cạnh không làm đổi)
+        self.positions_version = 0
+
+        # Lõi CSR dựng lười (lazy) cho từng chế độ: {directed: (version, core)}
+        self._cores = {}
+
+        # Cache các dữ liệu dẫn xuất khác: {(key, directed): (version, value)}
+        self._derived = {}
+
+    @property
+    def G(self):
+        """
+        View NetworkX theo chế độ hiện tại (không copy).
+        - Có hướng : chính kho DiGraph
+        - Vô hướng : view hợp của 2 chiều; trọng số lấy theo chiều u->v nếu có
+          (lõi CSR thì dùng một trọng số chung cho cả 2 chiều, xem _canonical_weights)
+        Chỉ dùng để đọc/vẽ. Mọi thay đổi phải đi qua các hàm của SpaceGraph.
+        """
+        return self._store if self.is_directed else self._undirected_view
+
+    # =========================================================================
+    #  PHIÊN BẢN & NHẬT KÝ THAY ĐỔI
+    # =========================================================================
+
+    def _record(self, kind, u=None, v=None, old=None, new=None):
+        """Tăng phiên bản và ghi lại thay đổi vào nhật ký"""
+        self.version += 1
+        if kind in POSITION_KINDS:
+            self.positions_version += 1
+        self.journal.append(GraphChange(self.version, kind, u, v, old, new))
+
+    def changes_since(self, version):
+        """
+        Các thay đổi xảy ra sau phiên bản `version` (theo thứ tự).
+        Trả về None nếu nhật ký không còn đủ dữ liệu -> phía gọi phải dựng lại từ đầu.
+        """
+        if version == self.version:
+            return []
+        if version > self.version or not self.journal or self.journal[0].version > version + 1:
+            return None
+        return [c for c in self.journal if c.version > version]
+
+    def cached(self, key, builder):
+        """
+        Cache dùng chung cho dữ liệu dẫn xuất (ma trận, tọa độ hiển thị, kết quả...).
+        builder() chỉ được gọi lại khi phiên bản đồ thị hoặc chế độ thay đổi.
+        """
+        slot = (key, self.is_directed)
+        entry = self._derived.get(slot)
+        if entry is None or entry[0] != self.version:
+            entry = (self.version, builder())
+            self._derived[slot] = entry
+        return entry[1]
+
+    @property
+    def core(self):
+        """Lõi mảng (GraphCore) cho thuật toán. NetworkX chỉ còn là lớp chỉnh sửa."""
+        entry = self._cores.get(self.is_directed)
+        if entry is not None and entry[0] == self.version:
+            return entry[1]
+
+        core = None
+        if entry is not None:
+            core = self._patch_core(entry[0], entry[1])
+        if core is None:
+            core = GraphCore.from_networkx(self.G, self.positions)
+            if not self.is_directed and self._asymmetric:
+                core = core.with_updates(self._canonical_weights(tuple(p) for p in self._asymmetric), None)
+        self._cores[self.is_directed] = (self.version, core)
+        return core
+
+    def _patch_core(self, built_version, core):
+        """
+        Cập nhật lõi cũ theo nhật ký nếu chỉ có đổi trọng số / dời tọa độ.
+        Thay đổi cấu trúc (thêm node/cạnh mới, xóa, nạp file) -> trả None để dựng lại.
+        'edges_reweighted' (trọng số = khoảng cách) ghi đè mọi trọng số trước nó: chỉ bản ghi cuối cùng
+        có hiệu lực và được tính lại vector hóa từ tọa độ hiện tại, miễn là sau nó không còn node nào dời.
+        """
+        changes = self.changes_since(built_version)
+        if changes is None or any(c.kind not in PATCHABLE_KINDS for c in changes):
+            return None
+
+        rescale = max((k for k, c in enumerate(changes) if c.kind == 'edges_reweighted'), default=-1)
+        if rescale >= 0 and any(c.kind in ('node_moved', 'nodes_moved') for c in changes[rescale + 1:]):
+            return None # Tọa độ hiện tại không còn là tọa độ lúc tính trọng số
+
+        G = self.G
+        weights = {}
+        moved = set()
+        for k, c in enumerate(changes):
+            if c.kind == 'edge_reweighted' and k > rescale and not self.is_directed:
+                weights.update(self._canonical_weights([(c.u, c.v)]))
+            elif c.kind == 'edge_reweighted' and k > rescale:
+                if G.has_edge(c.u, c.v):
+                    weights[(c.u, c.v)] = G[c.u][c.v].get('weight', 1.0)
+                if G.has_edge(c.v, c.u):
+                    weights[(c.v, c.u)] = G[c.v][c.u].get('weight', 1.0)
+            elif c.kind == 'node_moved':
+                moved.add(c.u)
+            elif c.kind == 'nodes_moved':
+                moved.update(c.new)
+        if not weights and not moved and rescale < 0:
+            return core
+        core = core.with_updates(None, {name: self.positions[name] for name in moved})
+        if core is not None and rescale >= 0:
+            core = core.with_distance_weights()
+        if core is not None and weights:
+            core = core.with_updates(weights, None)
+        return core
+
+    def _canonical_weights(self, pairs):
+        """
+        Trọng số dùng chung cho cả 2 hàng CSR của mỗi cặp u-v ở chế độ vô hướng:
+        hai chiều lệch nhau thì lấy chiều nhỏ hơn, nên thuật toán vô hướng thấy cùng một cạnh
+        dù đi theo chiều nào. Trả về {(u, v): w, (v, u): w}.
+        """
+        succ = self._store._succ
+        weights = {}
+        for u, v in pairs:
+            found = [succ[a][b].get('weight', 1.0) for a, b in ((u, v), (v, u)) if b in succ.get(a, ())]
+            if found:
+                weights[(u, v)] = weights[(v, u)] = min(found)
+        return weights
+
     def set_directed(self, directed: bool):
-        """Chuyển đổi kiểu đồ thị (Yêu cầu A.4)"""
-        self.is_directed = directed
-        if directed:
-            self.G = self.G.to_directed()
+        """
+        Chuyển đổi kiểu đồ thị (Yêu cầu A.4).
+        Chỉ đổi view nên là O(1); trọng số riêng từng chiều vẫn được giữ trong kho
+        và xuất hiện lại khi bật chế độ có hướng.
+        """
+        if directed != self.is_directed:
+            self.is_directed = directed
+            self._record('mode_changed', old=not directed, new=directed)
+
+    def asymmetric_routes(self):
+        """Số tuyến có trọng số 2 chiều khác nhau (view vô hướng chỉ hiện 1 chiều)"""
+        return len(self._asymmetric)
+
+    def _track_asymmetry(self, u, v):
+        succ = self._store._succ
+        if u in succ.get(v, ()) and v in succ.get(u, ()) and \
+                succ[u][v].get('weight') != succ[v][u].get('weight'):
+            self._asymmetric.add(frozenset((u, v)))
         else:
-            self.G = self.G.to_undirected()
+            self._asymmetric.discard(frozenset((u, v)))
 
     def add_planet(self, name, x, y, z):
-        """Thêm một nút (Hành tinh)"""
-        self.G.add_node(name)
-        self.positions[name] = np.array([x, y, z])
+        """Thêm một nút (Hành tinh). Nếu đã có thì chỉ cập nhật tọa độ."""
+        new_pos = np.array([x, y, z])
+        if name in self._store:
+            old_pos = self.positions.get(name)
+            self.positions[name] = new_pos
+            self._record('node_moved', name, old=old_pos, new=new_pos)
+            return
+        self._store.add_node(name)
+        self.positions[name] = new_pos
+        self._record('node_added', name, new=new_pos)
+
+    def move_planets(self, positions, reweight=False):
+        """
+        Dời tọa độ hàng loạt (vd. vị trí nội suy tại epoch mới): {tên: (x, y, z)}, tên chưa có bị bỏ qua.
+        Ghi một bản ghi 'nodes_moved' duy nhất nên lõi CSR vẫn được vá tại chỗ.
+        reweight=True: trọng số mọi tuyến = khoảng cách mới (làm tròn như connect_randomly),
+        ghi thêm 'edges_reweighted' (lõi CSR tính lại trọng số vector hóa, không dựng lại).
+        Trả về số node đã dời.
+        """
+        moved = tuple(name for name in positions if name in self._store)
+        if not moved:
+            return 0
+        for name in moved:
+            self.positions[name] = np.asarray(positions[name], dtype=np.float64)
+        self._record('nodes_moved', new=moved)
+
+        if reweight and self._store.number_of_edges():
+            index = {name: i for i, name in enumerate(self._store)}
+            P = np.array([self.positions[name] for name in index], dtype=np.float64)
+            arcs = list(self._store.edges(data=True))
+            src = np.fromiter((index[u] for u, _, _ in arcs), dtype=np.int64, count=len(arcs))
+            dst = np.fromiter((index[v] for _, v, _ in arcs), dtype=np.int64, count=len(arcs))
+            weights = distance_weights(P, src, dst).tolist()
+            for (_, _, data), w in zip(arcs, weights):
+                data['weight'] = w
+            self._asymmetric.clear() # Trọng số theo khoảng cách luôn đối xứng
+            self._record('edges_reweighted', new=len(arcs))
+        return len(moved)
 
     def add_route(self, u, v, weight=1.0):
         """Thêm một cạnh (Tuyến đường)"""
         # Nếu đã có cạnh, cập nhật trọng số
-        self.G.add_edge(u, v, weight=weight)
+        existed = u in self._store and v in self._store and self.G.has_edge(u, v)
+        old = self.G[u][v].get('weight', 1.0) if existed else None
+        self._store.add_edge(u, v, weight=weight)
+        if not self.is_directed:
+            self._store.add_edge(v, u, weight=weight)
+        self._track_asymmetry(u, v)
+        if existed:
+            self._record('edge_reweighted', u, v, old=old, new=weight)
+        else:
+            self._record('edge_added', u, v, new=weight)
+
+    def load_graph(self, G, positions):
+        """Thay toàn bộ đồ thị (ví dụ khi mở file JSON)"""
+        # nx.DiGraph(G) tự tách cạnh vô hướng thành 2 cung
+        self._store = nx.DiGraph(G)
+        self._undirected_view = self._store.to_undirected(as_view=True)
+        self.positions = positions
+        self._asymmetric.clear()
+        if G.is_directed():
+            for u, v in G.edges():
+                self._track_asymmetry(u, v)
+        self._record('loaded')
 
     def calculate_distance(self, u, v):
         """Tính khoảng cách Euclidean giữa 2 hành tinh"""
@@ -41,26 +270,71 @@ class SpaceGraph:
             return np.linalg.norm(p1 - p2)
         return 0.0
 
-    def connect_randomly(self, probability=0.4):
+    def connect_randomly(self, probability=0.4, mode='probability', radius=None, k=None,
+                         seed=None, block_size=route_gen.DEFAULT_BLOCK_SIZE):
         """
-        Tạo các cạnh ngẫu nhiên để test.
+        Tạo các cạnh hàng loạt để test.
         Trọng số = Khoảng cách thực tế.
+        mode:
+          - 'probability': mỗi cặp được nối với xác suất `probability`
+          - 'radius'     : nối các cặp cách nhau không quá `radius` AU
+          - 'knn'        : nối mỗi node với `k` node gần nhất
+        seed cố định bộ sinh ngẫu nhiên để kết quả lặp lại được.
+        """
+        core = self.core
+        pos = core.positions
+        if mode == 'probability':
+            rng = np.random.default_rng(seed)
+            i, j, dist = route_gen.random_pairs(pos, probability, rng, block_size)
+        elif mode == 'radius':
+            if radius is None:
+                raise ValueError("mode='radius' requires a radius")
+            i, j, dist = route_gen.radius_pairs(pos, radius)
+        elif mode == 'knn':
+            if k is None:
+                raise ValueError("mode='knn' requires k")
+            i, j, dist = route_gen.knn_pairs(pos, k, directed=self.is_directed)
+        else:
+            raise ValueError(f"Unknown connect mode: {mode}")
+
+        # Thêm tất cả cạnh trong một lần gọi
+        names = np.array(core.nodes, dtype=object)
+        weights = np.round(dist, 2)
+        n_routes = len(weights)
+        if self.is_directed:
+            self._store.add_weighted_edges_from(zip(names[i], names[j], weights.tolist()))
+            for u, v in zip(names[i], names[j]):
+                if u in self._store._succ[v]:
+                    self._track_asymmetry(u, v)
+        else:
+            # Vô hướng: ghi cả 2 chiều, chỉ cần kiểm tra lại các cặp lệch cũ
+            i, j = np.concatenate([i, j]), np.concatenate([j, i])
+            weights = np.concatenate([weights, weights])
+            self._store.add_weighted_edges_from(zip(names[i], names[j], weights.tolist()))
+            for pair in list(self._asymmetric):
+                self._track_asymmetry(*pair)
+        self._record('edges_bulk', new=n_routes)
+        return n_routes
+
+    def get_sparse_adjacency(self):
+        """
+        Trả về danh sách node và ma trận kề thưa (scipy.sparse CSR).
+        Thứ tự node ổn định theo id của lõi CSR; ma trận được dựng một lần
+        cho mỗi phiên bản đồ thị và dùng chung cho mọi nơi cần.
         """
-        nodes = list(self.G.nodes())
-        import random
-        for i in range(len(nodes)):
-            for j in range(i + 1, len(nodes)):
-                if random.random() < probability:
-                    u, v = nodes[i], nodes[j]
-                    dist = self.calculate_distance(u, v)
-                    self.add_route(u, v, weight=round(dist, 2))
+        core = self.core
+        return core.nodes, core.to_scipy()
 
-    def get_adjacency_matrix(self):
+    def get_adjacency_matrix(self, dense_limit=DENSE_LIMIT):
         """Trả về ma trận kề (NumPy array) và danh sách node"""
-        nodes = list(self.G.nodes())
-        matrix = nx.to_numpy_array(self.G, nodelist=nodes)
-        return nodes, matrix
+        nodes, matrix = self.get_sparse_adjacency()
+        if len(nodes) > dense_limit:
+            raise ValueError(f"Graph has {len(nodes)} nodes; dense matrix is limited to "
+                             f"{dense_limit}. Use get_sparse_adjacency() instead.")
+        return nodes, matrix.toarray()
     
     def clear(self):
-        self.G.clear()
-        self.positions.clear()
\ No newline at end of file
+        self._store.clear()
+        self.positions.clear()
+        self._asymmetric.clear()
+        self._record('cleared')
\ No newline at end of file
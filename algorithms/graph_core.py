@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# Module: graph_core.py
+# Project: solar-system-graph
+# Chức năng: Lõi đồ thị dạng mảng (CSR) để các thuật toán chạy nhanh trên id số nguyên
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+
+def distance_weights(positions, src, dst):
+    """Trọng số tuyến theo khoảng cách Euclid giữa 2 đầu cạnh (AU, làm tròn 2 chữ số như connect_randomly)"""
+    return np.round(np.linalg.norm(positions[src] - positions[dst], axis=1), 2)
+
+
+class GraphCore:
+    """
+    Biểu diễn đồ thị gọn dạng CSR (Compressed Sparse Row).
+    - nodes[i]        : tên node có id = i
+    - index[name]     : id của node
+    - indptr[i:i+2]   : đoạn trong indices/weights chứa các cạnh đi ra từ node i
+    - indices/weights : đỉnh đích và trọng số của từng cạnh
+    - positions       : ma trận (N, 3) float64 tọa độ theo thứ tự id
+    Đồ thị vô hướng lưu cả 2 chiều (u->v và v->u); mỗi hàng sắp theo id đích.
+    Đối tượng này chỉ đọc: khi đồ thị thay đổi thì SpaceGraph dựng lại
+    (hoặc tạo bản vá bằng with_updates nếu cấu trúc không đổi).
+    """
+
+    def __init__(self, nodes, indptr, indices, weights, positions, directed=False):
+        self.nodes = list(nodes)
+        self.index = {name: i for i, name in enumerate(self.nodes)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.positions = positions
+        self.directed = directed
+        self._reverse = None
+        self._csr = None
+        self._distance_scale = None
+        self._by_name = None
+
+    @classmethod
+    def from_networkx(cls, G, positions=None):
+        """Dựng CSR từ đồ thị NetworkX (trọng số mặc định 1.0 như các thuật toán cũ)"""
+        nodes = list(G.nodes())
+        index = {name: i for i, name in enumerate(nodes)}
+        n = len(nodes)
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indices = []
+        weights = []
+        for i, (u, nbrs) in enumerate(G.adjacency()):
+            for v, data in nbrs.items():
+                indices.append(index[v])
+                weights.append(data.get('weight', 1.0))
+            indptr[i + 1] = len(indices)
+
+        # Sắp mỗi hàng theo id đích -> CSR chuẩn hóa, không phụ thuộc thứ tự duyệt của view
+        indices = np.asarray(indices, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+        order = np.lexsort((indices, rows))
+        indices, weights = indices[order], weights[order]
+
+        pos = np.zeros((n, 3), dtype=np.float64)
+        if positions:
+            for i, name in enumerate(nodes):
+                if name in positions:
+                    pos[i] = positions[name]
+
+        return cls(nodes, indptr, indices, weights, pos, directed=G.is_directed())
+
+    # --- Thông tin cơ bản ---
+    @property
+    def n_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def n_edges(self):
+        """Số cạnh thực tế (vô hướng thì mỗi cạnh được lưu 2 lần)"""
+        m = len(self.indices)
+        return m if self.directed else m // 2
+
+    def id_of(self, name):
+        return self.index[name]
+
+    def name_of(self, i):
+        return self.nodes[i]
+
+    def degree(self):
+        """Bậc ra của mọi node (mảng N phần tử)"""
+        return np.diff(self.indptr)
+
+    # --- Truy cập kề ---
+    def neighbors(self, i):
+        """Các id kề với node i (view vào mảng indices, không copy)"""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def neighbor_weights(self, i):
+        return self.weights[self.indptr[i]:self.indptr[i + 1]]
+
+    def name_sorted_indices(self):
+        """
+        Mảng indices với mỗi hàng sắp theo tên node đích (dùng indptr chung).
+        Các thuật toán duyệt cần thứ tự ổn định theo tên: sắp một lần, cache lại,
+        thay vì sorted() ở mỗi lần thăm node.
+        """
+        if self._by_name is None:
+            rank = np.empty(self.n_nodes, dtype=np.int64)
+            rank[sorted(range(self.n_nodes), key=self.nodes.__getitem__)] = np.arange(self.n_nodes)
+            rows = np.repeat(np.arange(self.n_nodes, dtype=np.int64), self.degree())
+            self._by_name = self.indices[np.lexsort((rank[self.indices], rows))]
+        return self._by_name
+
+    def edge_arrays(self):
+        """Trả về (src, dst, weight) của mọi cạnh đã lưu dưới dạng mảng phẳng"""
+        src = np.repeat(np.arange(self.n_nodes, dtype=np.int64), self.degree())
+        return src, self.indices, self.weights
+
+    def reverse(self):
+        """CSR của đồ thị đảo chiều (cạnh vào). Vô hướng thì chính là self."""
+        if not self.directed:
+            return self
+        if self._reverse is None:
+            src, dst, w = self.edge_arrays()
+            order = np.argsort(dst, kind='stable')
+            counts = np.bincount(dst, minlength=self.n_nodes)
+            indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+            np.cumsum(counts, out=indptr[1:])
+            self._reverse = GraphCore(self.nodes, indptr, src[order], w[order],
+                                      self.positions, directed=True)
+            self._reverse._reverse = self
+            self._reverse._distance_scale = self._distance_scale
+        return self._reverse
+
+    def distance_scale(self):
+        """
+        Hệ số s lớn nhất sao cho mọi cạnh thỏa weight >= s * khoảng cách Euclid.
+        h(v) = s * |P[v] - P[t]| khi đó là heuristic chấp nhận được (và nhất quán)
+        cho A*; s = 0 nghĩa là trọng số không dựa trên khoảng cách -> quay về Dijkstra.
+        """
+        if self._distance_scale is None:
+            src, dst, w = self.edge_arrays()
+            scale = 0.0
+            if len(w) and w.min() >= 0:
+                dist = np.linalg.norm(self.positions[src] - self.positions[dst], axis=1)
+                far = dist > 0
+                # Nhân (1 - 1e-9) để sai số làm tròn không làm heuristic vượt trọng số thật
+                scale = float(np.min(w[far] / dist[far])) * (1 - 1e-9) if far.any() else 0.0
+            self._distance_scale = scale
+        return self._distance_scale
+
+    def with_updates(self, weight_updates, position_updates):
+        """
+        Tạo core mới chỉ khác trọng số / tọa độ, dùng chung cấu trúc indptr/indices.
+        - weight_updates  : {(u, v): weight} theo tên node
+        - position_updates: {name: (x, y, z)}
+        Core cũ giữ nguyên (thuật toán đang chạy trên nó không bị ảnh hưởng).
+        Trả về None nếu có cạnh chưa tồn tại trong CSR (cần dựng lại từ đầu).
+        """
+        weights = self.weights
+        if weight_updates:
+            weights = weights.copy()
+            for (u, v), w in weight_updates.items():
+                i, j = self.index.get(u), self.index.get(v)
+                if i is None or j is None:
+                    return None
+                start = self.indptr[i]
+                hit = np.flatnonzero(self.indices[start:self.indptr[i + 1]] == j)
+                if len(hit) == 0:
+                    return None
+                weights[start + hit[0]] = w
+
+        positions = self.positions
+        if position_updates:
+            positions = positions.copy()
+            for name, p in position_updates.items():
+                if name not in self.index:
+                    return None
+                positions[self.index[name]] = p
+
+        core = GraphCore.__new__(GraphCore)
+        core.nodes = self.nodes
+        core.index = self.index
+        core.indptr = self.indptr
+        core.indices = self.indices
+        core.weights = weights
+        core.positions = positions
+        core.directed = self.directed
+        core._reverse = None
+        core._csr = self._csr if weights is self.weights else None # Ma trận kề chỉ phụ thuộc trọng số
+        core._distance_scale = None
+        core._by_name = self._by_name # Cấu trúc không đổi -> thứ tự theo tên vẫn đúng
+        return core
+
+    def with_distance_weights(self):
+        """Core mới cùng cấu trúc, trọng số mọi cạnh = distance_weights theo tọa độ hiện tại"""
+        core = self.with_updates(None, None)
+        src, dst, _ = self.edge_arrays()
+        core.weights = distance_weights(self.positions, src, dst)
+        return core
+
+    def to_scipy(self):
+        """
+        Ma trận kề thưa scipy.sparse.csr_matrix (hàng/cột theo id node).
+        Dùng chung mảng với CSR nên dựng một lần cho mỗi core.
+        """
+        if self._csr is None:
+            n = self.n_nodes
+            self._csr = sp.csr_matrix((self.weights, self.indices, self.indptr), shape=(n, n))
+        return self._csr
+
+    def to_networkx(self):
+        """Chuyển ngược về NetworkX (dùng cho các hàm còn phụ thuộc nx)"""
+        H = nx.DiGraph() if self.directed else nx.Graph()
+        H.add_nodes_from(self.nodes)
+        src, dst, w = self.edge_arrays()
+        names = self.nodes
+        H.add_weighted_edges_from(
+            (names[u], names[v], wt) for u, v, wt in zip(src.tolist(), dst.tolist(), w.tolist())
+        )
+        return H
+
+
+def as_core(G):
+    """Cho phép thuật toán nhận cả nx.Graph lẫn GraphCore"""
+    if isinstance(G, GraphCore):
+        return G
+    return GraphCore.from_networkx(G)
@@ -1,91 +1,286 @@
 # -*- coding: utf-8 -*-
 # Module: mst.py
 # Project: solar-system-graph
-# Chức năng: Tìm Cây khung nhỏ nhất (MST) - Prim & Kruskal
+# Chức năng: Tìm Cây khung nhỏ nhất (MST) - Prim & Kruskal (rừng khung nếu đồ thị không liên thông)
 
-import networkx as nx
-import heapq
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import minimum_spanning_tree as _scipy_mst
 
-def prim_algorithm(G, start_node=None):
+from algorithms.graph_core import as_core
+from algorithms.results import MSTResult
+from algorithms.steps import Step
+
+# =========================================================================
+#  CẤU TRÚC DỮ LIỆU
+# =========================================================================
+
+class UnionFind:
     """
-    Thuật toán Prim: Phát triển cây khung từ một đỉnh ban đầu.
+    Disjoint set trên id 0..n-1 dạng mảng.
+    find lặp với path halving (không đệ quy), union theo rank -> gần như O(1) mỗi thao tác.
     """
-    if start_node is None:
-        start_node = list(G.nodes())[0]
-
-    mst_edges = []
-    visited = {start_node}
-    
-    # Priority Queue chứa (weight, u, v)
-    # Lấy tất cả cạnh nối từ start_node ra ngoài
-    edges_candidate = []
-    for neighbor in G.neighbors(start_node):
-        weight = G[start_node][neighbor].get('weight', 1.0)
-        heapq.heappush(edges_candidate, (weight, start_node, neighbor))
-
-    # Bắt đầu vòng lặp
-    while edges_candidate:
-        weight, u, v = heapq.heappop(edges_candidate)
-        
-        if v in visited:
-            continue
-            
-        visited.add(v)
-        mst_edges.append((u, v))
-        
-        # Yield trạng thái để vẽ: (Node hiện tại, Các node đã nối, Các cạnh MST)
-        yield v, list(visited), mst_edges
-        
-        # Thêm các cạnh từ node mới (v) vào hàng đợi
-        for next_node in G.neighbors(v):
-            if next_node not in visited:
-                new_weight = G[v][next_node].get('weight', 1.0)
-                heapq.heappush(edges_candidate, (new_weight, v, next_node))
-
-# --- Class hỗ trợ cho Kruskal ---
-class UnionFind:
-    def __init__(self, elements):
-        self.parent = {e: e for e in elements}
-    
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.rank = [0] * n
+        self.components = n
+
     def find(self, item):
-        if self.parent[item] == item:
-            return item
-        self.parent[item] = self.find(self.parent[item]) # Path compression
-        return self.parent[item]
-    
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]] # Path halving
+            item = parent[item]
+        return item
+
     def union(self, a, b):
         root_a = self.find(a)
         root_b = self.find(b)
-        if root_a != root_b:
-            self.parent[root_a] = root_b
-            return True
-        return False
+        if root_a == root_b:
+            return False
+        rank = self.rank
+        if rank[root_a] < rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if rank[root_a] == rank[root_b]:
+            rank[root_a] += 1
+        self.components -= 1
+        return True
+
+class IndexedHeap:
+    """
+    Min-heap nhị phân có chỉ mục: mỗi id xuất hiện tối đa một lần,
+    hỗ trợ giảm khóa (decrease-key) O(log n) thay vì đẩy bản ghi trùng.
+    """
+
+    def __init__(self, n):
+        self.heap = []          # id theo thứ tự heap
+        self.key = [0.0] * n
+        self.pos = [-1] * n     # Vị trí của id trong heap (-1: không có trong heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return self.pos[item] >= 0
+
+    def push_or_decrease(self, item, key):
+        """Thêm item, hoặc giảm khóa nếu đã có. Trả về True nếu heap thay đổi."""
+        i = self.pos[item]
+        if i < 0:
+            self.heap.append(item)
+            i = len(self.heap) - 1
+            self.pos[item] = i
+        elif key >= self.key[item]:
+            return False
+        self.key[item] = key
+        self._sift_up(i)
+        return True
+
+    def pop(self):
+        """Lấy id có khóa nhỏ nhất: trả về (key, item)"""
+        heap, pos = self.heap, self.pos
+        top = heap[0]
+        last = heap.pop()
+        pos[top] = -1
+        if heap:
+            heap[0] = last
+            pos[last] = 0
+            self._sift_down(0)
+        return self.key[top], top
+
+    def _sift_up(self, i):
+        heap, pos, key = self.heap, self.pos, self.key
+        item = heap[i]
+        k = key[item]
+        while i > 0:
+            p = (i - 1) >> 1
+            up = heap[p]
+            if key[up] <= k:
+                break
+            heap[i] = up
+            pos[up] = i
+            i = p
+        heap[i] = item
+        pos[item] = i
+
+    def _sift_down(self, i):
+        heap, pos, key = self.heap, self.pos, self.key
+        n = len(heap)
+        item = heap[i]
+        k = key[item]
+        while True:
+            c = 2 * i + 1
+            if c >= n:
+                break
+            if c + 1 < n and key[heap[c + 1]] < key[heap[c]]:
+                c += 1
+            child = heap[c]
+            if key[child] >= k:
+                break
+            heap[i] = child
+            pos[child] = i
+            i = c
+        heap[i] = item
+        pos[item] = i
+
+# =========================================================================
+#  LÕI THUẬT TOÁN (làm việc trên id, dùng chung cho animation và chế độ tính ngay)
+# =========================================================================
+
+def _prim_edges(core, start):
+    """
+    Prim với heap có chỉ mục: mỗi node nằm trong heap tối đa một lần (decrease-key).
+    Khi heap rỗng mà còn node chưa thăm -> bắt đầu cây mới (rừng khung).
+    Yield (u, v, w) cho cạnh mới, hoặc (-1, root, 0.0) khi mở một cây mới.
+    """
+    n = core.n_nodes
+    indptr = core.indptr.tolist()
+    indices = core.indices.tolist()
+    weights = core.weights.tolist()
+    in_tree = [False] * n
+    via = [-1] * n
+    heap = IndexedHeap(n)
+
+    roots = [start] + [x for x in range(n) if x != start]
+    for root in roots:
+        if in_tree[root]:
+            continue
+        yield -1, root, 0.0
+        heap.push_or_decrease(root, 0.0)
+        while heap:
+            w, v = heap.pop()
+            in_tree[v] = True
+            if via[v] >= 0:
+                yield via[v], v, w
+
+            # Cập nhật khóa các node kề bằng decrease-key
+            for k in range(indptr[v], indptr[v + 1]):
+                x = indices[k]
+                if not in_tree[x] and heap.push_or_decrease(x, weights[k]):
+                    via[x] = v
+
+def _half_edges(core):
+    """Các cạnh dạng mảng (vô hướng chỉ lấy nửa u < v vì CSR lưu 2 chiều)"""
+    src, dst, w = core.edge_arrays()
+    if not core.directed:
+        half = src < dst
+        src, dst, w = src[half], dst[half], w[half]
+    return src, dst, w
+
+def _kruskal_edges(core):
+    """
+    Kruskal: sắp thứ tự cạnh bằng np.argsort trên mảng trọng số (không tạo tuple),
+    dừng sớm khi đã đủ n - số thành phần cạnh.
+    Yield (u, v, w) cho từng cạnh được chọn.
+    """
+    src, dst, w = _half_edges(core)
+    order = np.argsort(w, kind='stable')
+    uf = UnionFind(core.n_nodes)
+    for u, v, weight in zip(src[order].tolist(), dst[order].tolist(), w[order].tolist()):
+        if uf.union(u, v):
+            yield u, v, weight
+            if uf.components == 1:
+                return
+
+# =========================================================================
+#  ANIMATION
+# =========================================================================
+
+def prim_algorithm(G, start_node=None):
+    """
+    Thuật toán Prim: Phát triển cây khung từ một đỉnh ban đầu.
+    G có thể là nx.Graph hoặc GraphCore (chạy trực tiếp trên mảng CSR).
+    Đồ thị không liên thông: lần lượt mọc thêm cây từ các node chưa thăm.
+    Yield: Step (node vừa nối và cạnh MST mới)
+    """
+    core = as_core(G)
+    names = core.nodes
+    if not names:
+        return
+    if start_node is None:
+        start_node = names[0]
+
+    pending_root = () # Gốc cây mới được gửi kèm bước kế tiếp
+    for u, v, _ in _prim_edges(core, core.id_of(start_node)):
+        if u < 0:
+            if pending_root:
+                yield Step(pending_root[0], pending_root)
+            pending_root = (names[v],)
+            continue
+
+        # Yield trạng thái để vẽ: (Node hiện tại, Node mới nối, Cạnh MST mới)
+        yield Step(names[v], pending_root + (names[v],), ((names[u], names[v]),))
+        pending_root = ()
+
+    if pending_root:
+        yield Step(pending_root[0], pending_root)
 
 def kruskal_algorithm(G, start_node=None):
     """
     Thuật toán Kruskal: Sắp xếp cạnh và nối dần các thành phần liên thông.
     (start_node không dùng trong Kruskal nhưng giữ để đồng bộ tham số)
+    Yield: Step
     """
-    # 1. Lấy tất cả các cạnh và sắp xếp theo trọng số
-    edges = []
-    for u, v, data in G.edges(data=True):
-        edges.append((data.get('weight', 1.0), u, v))
-    
-    edges.sort() # Sắp xếp tăng dần
-    
-    uf = UnionFind(list(G.nodes()))
-    mst_edges = []
-    visited_nodes_viz = set() # Chỉ dùng để hiển thị animation
-    
-    for weight, u, v in edges:
-        # Nếu u và v chưa kết nối với nhau -> Chọn cạnh này
-        if uf.union(u, v):
-            mst_edges.append((u, v))
-            visited_nodes_viz.add(u)
-            visited_nodes_viz.add(v)
-            
-            # Yield trạng thái
-            yield v, list(visited_nodes_viz), mst_edges
-            
-    # Yield lần cuối để đảm bảo vẽ đủ
-    yield None, list(G.nodes()), mst_edges
\ No newline at end of file
+    core = as_core(G)
+    names = core.nodes
+    touched = [False] * core.n_nodes # Chỉ dùng để hiển thị animation
+
+    for u, v, _ in _kruskal_edges(core):
+        new_nodes = tuple(names[x] for x in (u, v) if not touched[x])
+        touched[u] = touched[v] = True
+
+        # Yield trạng thái
+        yield Step(names[v], new_nodes, ((names[u], names[v]),))
+
+    # Yield lần cuối để đảm bảo tô đủ các node (kể cả node cô lập)
+    yield Step(None, tuple(names[x] for x in range(core.n_nodes) if not touched[x]))
+
+# =========================================================================
+#  CHẾ ĐỘ CHỈ TÍNH TOÁN
+# =========================================================================
+
+def _scipy_forest(core):
+    """
+    Đường nhanh: scipy.sparse.csgraph.minimum_spanning_tree (Kruskal viết bằng C).
+    scipy coi giá trị 0 là "không có cạnh" nên trả về None nếu có cạnh trọng số <= 0.
+    """
+    src, dst, w = _half_edges(core)
+    if len(w) and w.min() <= 0:
+        return None
+    n = core.n_nodes
+    # Có hướng: cạnh hai chiều khác trọng số -> giữ chiều nhẹ hơn (MST xét đồ thị vô hướng nền)
+    a, b = np.minimum(src, dst), np.maximum(src, dst)
+    order = np.lexsort((w, b, a))
+    a, b, w = a[order], b[order], w[order]
+    first = np.ones(len(a), dtype=bool)
+    first[1:] = (a[1:] != a[:-1]) | (b[1:] != b[:-1])
+    keep = first & (a != b)
+    tree = _scipy_mst(sp.csr_matrix((w[keep], (a[keep], b[keep])), shape=(n, n))).tocoo()
+    return zip(tree.row.tolist(), tree.col.tolist(), tree.data.tolist())
+
+def minimum_spanning_tree(G, method='kruskal', start_node=None):
+    """
+    Tính MST một mạch, không animation (rừng khung nhỏ nhất nếu đồ thị không liên thông).
+    method: 'kruskal', 'prim' hoặc 'scipy' (nhanh nhất, tự quay về Kruskal nếu không dùng được).
+    Trả về MSTResult(edges, total_weight, components).
+    """
+    core = as_core(G)
+    names = core.nodes
+
+    if method == 'prim':
+        if core.n_nodes == 0:
+            return MSTResult([], 0, 0) # Đồ thị rỗng: không có node bắt đầu
+        start = core.id_of(start_node) if start_node is not None else 0
+        chosen = [e for e in _prim_edges(core, start) if e[0] >= 0]
+    elif method == 'scipy':
+        forest = _scipy_forest(core)
+        chosen = list(forest) if forest is not None else list(_kruskal_edges(core))
+    elif method == 'kruskal':
+        chosen = list(_kruskal_edges(core))
+    else:
+        raise ValueError(f"Unknown MST method: {method}")
+
+    return MSTResult([(names[u], names[v]) for u, v, _ in chosen],
+                     sum(w for _, _, w in chosen),
+                     core.n_nodes - len(chosen))
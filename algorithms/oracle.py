@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+# Module: oracle.py
+# Project: solar-system-graph
+# Chức năng: Bộ trả lời khoảng cách (Distance Oracle) - tính trước, cập nhật tăng dần
+
+import heapq
+
+import numpy as np
+from scipy.sparse.csgraph import dijkstra, shortest_path
+
+from algorithms.results import PathResult
+from algorithms.shortest_path import _astar_search, _run, _straight_line
+
+# Đồ thị tối đa bao nhiêu node thì lưu toàn bộ ma trận khoảng cách (N x N float64)
+APSP_LIMIT = 3000
+
+# Số landmark mặc định cho chế độ ALT
+DEFAULT_LANDMARKS = 16
+
+class DistanceOracle:
+    """
+    Trả lời nhanh truy vấn khoảng cách / đường đi trên SpaceGraph.
+    - 'apsp'      : ma trận khoảng cách mọi cặp + ma trận predecessor (truy vấn O(1))
+    - 'landmarks' : ALT - khoảng cách tới/từ một số landmark làm cận dưới cho A*
+    - 'auto'      : apsp nếu số node <= apsp_limit, ngược lại landmarks
+    Mỗi truy vấn tự kiểm tra phiên bản đồ thị. Nếu chỉ có thêm cạnh / giảm trọng số
+    thì cập nhật tăng dần; các thay đổi khác thì dựng lại từ đầu.
+    """
+
+    def __init__(self, space_graph, mode='auto', n_landmarks=DEFAULT_LANDMARKS,
+                 apsp_limit=APSP_LIMIT):
+        if mode not in ('auto', 'apsp', 'landmarks'):
+            raise ValueError(f"Unknown oracle mode: {mode}")
+        self.space_graph = space_graph
+        self.requested_mode = mode
+        self.n_landmarks = n_landmarks
+        self.apsp_limit = apsp_limit
+        self.rebuilds = 0
+        self._build()
+
+    # =========================================================================
+    #  DỰNG / CẬP NHẬT
+    # =========================================================================
+
+    def _build(self):
+        core = self.space_graph.core
+        self.core = core
+        self.version = self.space_graph.version
+        self.directed = self.space_graph.is_directed
+
+        mode = self.requested_mode
+        if mode == 'auto':
+            mode = 'apsp' if core.n_nodes <= self.apsp_limit else 'landmarks'
+        self.mode = mode
+
+        # CSR luôn lưu đủ 2 chiều nên csgraph chạy ở chế độ có hướng
+        if mode == 'apsp':
+            self.dist, self.pred = shortest_path(core.to_scipy(), method='D', directed=True,
+                                                 return_predecessors=True)
+        else:
+            self._build_landmarks(core)
+        self.rebuilds += 1
+
+    def _build_landmarks(self, core):
+        """Chọn landmark kiểu 'xa nhất trước' rồi lưu khoảng cách từ/tới từng landmark"""
+        csr = core.to_scipy()
+        n = core.n_nodes
+        k = min(self.n_landmarks, n)
+        landmarks = []
+        rows = []
+        nearest = np.full(n, np.inf)
+        nxt = int(np.argmax(core.degree())) if n else 0
+        for _ in range(k):
+            landmarks.append(nxt)
+            row = dijkstra(csr, directed=True, indices=nxt)
+            rows.append(row)
+            nearest = np.minimum(nearest, row)
+            # Ưu tiên node chưa tới được (thành phần liên thông khác), sau đó node xa nhất
+            unreached = np.flatnonzero(np.isinf(nearest))
+            if len(unreached):
+                nxt = int(unreached[0])
+            else:
+                nxt = int(np.argmax(nearest))
+            if nxt in landmarks:
+                break
+
+        self.landmarks = np.array(landmarks, dtype=np.int64)
+        self.from_lm = np.array(rows).reshape(len(landmarks), n)              # d(l, v)
+        self.to_lm = dijkstra(csr.T.tocsr(), directed=True, indices=self.landmarks)  # d(v, l)
+        self.to_lm = self.to_lm.reshape(len(landmarks), n)
+
+    def refresh(self):
+        """Đồng bộ với phiên bản đồ thị hiện tại (gọi tự động trước mỗi truy vấn)"""
+        sg = self.space_graph
+        if sg.version == self.version:
+            return
+        arcs = self._decreased_arcs(sg.changes_since(self.version))
+        if arcs is None or len(arcs) > max(8, self.core.n_nodes // 8):
+            self._build()
+            return
+
+        # Chỉ đổi trọng số/cạnh giữa các node cũ -> id node không đổi
+        core = sg.core
+        self.core = core
+        for a, b, w in arcs:
+            if self.mode == 'apsp':
+                self._apsp_insert(a, b, w)
+            else:
+                self._landmarks_insert(core, a, b, w)
+        self.version = sg.version
+
+    def _decreased_arcs(self, changes):
+        """
+        Chuyển nhật ký thành danh sách cung (a, b, w) theo id.
+        Trả về None nếu có thay đổi không phải thêm cạnh / giảm trọng số.
+        """
+        if changes is None:
+            return None
+        index = self.core.index
+        arcs = []
+        for c in changes:
+            if c.kind in ('node_moved', 'nodes_moved'):
+                continue
+            if c.kind == 'edge_reweighted' and c.new > c.old:
+                return None
+            if c.kind not in ('edge_added', 'edge_reweighted'):
+                return None
+            if c.u not in index or c.v not in index:
+                return None
+            a, b = index[c.u], index[c.v]
+            arcs.append((a, b, c.new))
+            if not self.directed:
+                arcs.append((b, a, c.new))
+        return arcs
+
+    def _apsp_insert(self, a, b, w):
+        """
+        Thêm cung a->b trọng số w: D[i, j] = min(D[i, j], D[i, a] + w + D[b, j]).
+        Chỉ các hàng i có D[i, a] + w < D[i, b] và cột j có w + D[b, j] < D[a, j] mới có thể đổi.
+        """
+        D, P = self.dist, self.pred
+        rows = np.flatnonzero(D[:, a] + w < D[:, b])
+        cols = np.flatnonzero(w + D[b, :] < D[a, :])
+        if len(rows) == 0 or len(cols) == 0:
+            return
+        via = D[rows, a][:, None] + w + D[b, cols][None, :]
+        block = D[np.ix_(rows, cols)]
+        better = via < block
+        r, c = np.nonzero(better)
+        if len(r) == 0:
+            return
+        ri, cj = rows[r], cols[c]
+        D[ri, cj] = via[r, c]
+        # Đường mới đi i -> ... -> a -> b -> ... -> j: cha của j giống trên đường từ b
+        new_pred = P[b, cj]
+        new_pred[cj == b] = a
+        P[ri, cj] = new_pred
+
+    def _landmarks_insert(self, core, a, b, w):
+        """Cập nhật bảng landmark: chỉ lan truyền qua vùng có khoảng cách giảm"""
+        reverse = core.reverse()
+        for li in range(len(self.landmarks)):
+            row = self.from_lm[li]
+            _propagate_decrease(row, core, b, row[a] + w)
+            row = self.to_lm[li]
+            _propagate_decrease(row, reverse, a, w + row[b])
+
+    # =========================================================================
+    #  TRUY VẤN
+    # =========================================================================
+
+    def distance(self, u, v):
+        """Khoảng cách ngắn nhất u -> v (inf nếu không tới được)"""
+        self.refresh()
+        i, j = self.core.id_of(u), self.core.id_of(v)
+        if self.mode == 'apsp':
+            return float(self.dist[i, j])
+        return self._alt_search(i, j).distance
+
+    def path(self, u, v):
+        """Đường đi ngắn nhất u -> v dạng PathResult (settled = 0 khi đọc từ ma trận)"""
+        self.refresh()
+        i, j = self.core.id_of(u), self.core.id_of(v)
+        if self.mode == 'landmarks':
+            return self._alt_search(i, j)
+
+        names = self.core.nodes
+        d = float(self.dist[i, j])
+        if np.isinf(d):
+            return PathResult([], d, 0)
+        path = [j]
+        while path[-1] != i:
+            path.append(int(self.pred[i, path[-1]]))
+        path.reverse()
+        return PathResult([names[x] for x in path], d, 0)
+
+    def lower_bound(self, u, v):
+        """Cận dưới của khoảng cách u -> v (O(số landmark), hoặc chính xác nếu apsp)"""
+        self.refresh()
+        i, j = self.core.id_of(u), self.core.id_of(v)
+        if self.mode == 'apsp':
+            return float(self.dist[i, j])
+        return float(self._alt_heuristic(j, nodes=[i])[0])
+
+    def _alt_heuristic(self, target, nodes=None):
+        """
+        Cận dưới ALT tới target: max_l (d(l,t) - d(l,v), d(v,l) - d(t,l)) và khoảng cách thẳng.
+        Giá trị không xác định (inf - inf) coi như 0.
+        """
+        fl = self.from_lm if nodes is None else self.from_lm[:, nodes]
+        tl = self.to_lm if nodes is None else self.to_lm[:, nodes]
+        with np.errstate(invalid='ignore'):
+            a = self.from_lm[:, target][:, None] - fl
+            b = tl - self.to_lm[:, target][:, None]
+        h = np.maximum(np.nan_to_num(a, nan=0.0, posinf=np.inf, neginf=0.0).max(axis=0),
+                       np.nan_to_num(b, nan=0.0, posinf=np.inf, neginf=0.0).max(axis=0))
+        h = np.maximum(h, 0.0)
+        if nodes is None:
+            h = np.maximum(h, _straight_line(self.core, target))
+        return h
+
+    def _alt_search(self, i, j):
+        h = self._alt_heuristic(j).tolist()
+        return _run(_astar_search(self.core, i, j, h=h))
+
+def _propagate_decrease(row, core, start, candidate):
+    """
+    Cập nhật tăng dần một hàng khoảng cách khi đường tới `start` ngắn lại còn `candidate`:
+    Dijkstra chỉ chạy trên các node thực sự được cải thiện.
+    """
+    if not candidate < row[start]:
+        return
+    row[start] = candidate
+    indptr, indices, weights = core.indptr, core.indices, core.weights
+    heap = [(candidate, start)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > row[u]:
+            continue
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            nd = d + weights[k]
+            if nd < row[v]:
+                row[v] = nd
+                heapq.heappush(heap, (nd, v))
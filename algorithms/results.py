@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Module: results.py
+# Project: solar-system-graph
+# Chức năng: Kiểu kết quả cho chế độ "chỉ tính toán" (không animation)
+
+from collections import namedtuple
+
+# Mỗi kiểu kết quả có highlight() -> (nodes, edges) để canvas vẽ trạng thái cuối một lần
+
+class TraversalResult(namedtuple('TraversalResult', ['order', 'parents', 'hops'], defaults=(None,))):
+    """Thứ tự duyệt, cha của mỗi node trong cây duyệt ({node: parent}) và số bước nhảy ({node: hops})"""
+    __slots__ = ()
+
+    def highlight(self):
+        return self.order, [(self.parents[n], n) for n in self.order if n in self.parents]
+
+class PathResult(namedtuple('PathResult', ['path', 'distance', 'settled'])):
+    """Đường đi (danh sách node, rỗng nếu không tới được), tổng trọng số, số node đã chốt"""
+    __slots__ = ()
+
+    def highlight(self):
+        return self.path, list(zip(self.path, self.path[1:]))
+
+class MSTResult(namedtuple('MSTResult', ['edges', 'total_weight', 'components'],
+                           defaults=(1,))):
+    """Các cạnh của cây (rừng) khung nhỏ nhất, tổng trọng số và số cây trong rừng"""
+    __slots__ = ()
+
+    def highlight(self):
+        nodes = {}
+        for u, v in self.edges:
+            nodes[u] = nodes[v] = True
+        return list(nodes), self.edges
+
+class FlowResult(namedtuple('FlowResult', ['value', 'flows', 'source_side', 'cut_edges'],
+                            defaults=((), ()))):
+    """
+    Giá trị luồng cực đại, luồng trên từng cạnh ({(u, v): flow}, chỉ cạnh có flow > 0)
+    và lát cắt s-t nhỏ nhất: các node phía source và các cạnh bị cắt (S -> T)
+    """
+    __slots__ = ()
+
+    def highlight(self):
+        nodes = {}
+        for u, v in self.flows:
+            nodes[u] = nodes[v] = True
+        return list(nodes), list(self.flows)
+
+class CircuitResult(namedtuple('CircuitResult', ['circuit', 'added_edges'])):
+    """Chu trình Euler (danh sách cạnh) và các cạnh phải đi lặp do Eulerize"""
+    __slots__ = ()
+
+    def highlight(self):
+        nodes = {}
+        for u, v in self.circuit:
+            nodes[u] = nodes[v] = True
+        return list(nodes), self.circuit
+
+class RouteResult(namedtuple('RouteResult', ['start', 'end', 'path', 'distance'])):
+    """Kết quả một nhiệm vụ trong truy vấn hàng loạt (path rỗng nếu không tới được)"""
+    __slots__ = ()
+
+    def highlight(self):
+        return self.path, list(zip(self.path, self.path[1:]))
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Module: route_gen.py
+# Project: solar-system-graph
+# Chức năng: Sinh tuyến đường hàng loạt theo vị trí không gian (vector hóa NumPy / KD-tree)
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Số cặp (i, j) tối đa xét trong một khối -> giới hạn bộ nhớ (~32 MB float64)
+DEFAULT_BLOCK_SIZE = 1 << 22
+
+def _pair_distances(positions, i, j):
+    """Khoảng cách Euclidean của các cặp (i[k], j[k]) tính một lần cho cả mảng"""
+    return np.linalg.norm(positions[i] - positions[j], axis=1)
+
+def random_pairs(positions, probability, rng, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Chế độ xác suất: mỗi cặp i < j được nối với xác suất `probability`.
+    Duyệt theo khối hàng để bộ nhớ không vượt quá block_size phần tử.
+    Trả về (i, j, dist).
+    """
+    n = len(positions)
+    rows_per_block = max(1, block_size // max(n, 1))
+    cols = np.arange(n)
+    src_parts, dst_parts = [], []
+
+    for start in range(0, n, rows_per_block):
+        rows = np.arange(start, min(start + rows_per_block, n))
+        # Chỉ giữ tam giác trên (j > i) để không sinh trùng cạnh
+        mask = rng.random((len(rows), n)) < probability
+        mask &= cols[None, :] > rows[:, None]
+        r, c = np.nonzero(mask)
+        src_parts.append(rows[r])
+        dst_parts.append(c)
+
+    i = np.concatenate(src_parts) if src_parts else np.empty(0, dtype=np.int64)
+    j = np.concatenate(dst_parts) if dst_parts else np.empty(0, dtype=np.int64)
+    return i, j, _pair_distances(positions, i, j)
+
+def radius_pairs(positions, radius):
+    """Chế độ bán kính: nối mọi cặp cách nhau không quá `radius` AU (KD-tree)"""
+    pairs = cKDTree(positions).query_pairs(radius, output_type='ndarray')
+    i, j = pairs[:, 0], pairs[:, 1]
+    return i, j, _pair_distances(positions, i, j)
+
+def knn_pairs(positions, k, directed=False):
+    """
+    Chế độ k láng giềng gần nhất: mỗi node nối tới k node gần nó nhất.
+    Vô hướng: các cặp trùng (i->j và j->i) được gộp làm một.
+    """
+    n = len(positions)
+    k = min(k, n - 1)
+    if k <= 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+
+    dist, idx = cKDTree(positions).query(positions, k=k + 1)
+    dist = dist.reshape(n, -1)
+    idx = idx.reshape(n, -1)
+
+    # Bỏ chính node đó (có thể không nằm ở cột 0 nếu có các điểm trùng tọa độ)
+    own = np.arange(n)[:, None]
+    keep = idx != own
+    keep &= np.cumsum(keep, axis=1) <= k
+    i = np.broadcast_to(own, idx.shape)[keep]
+    j = idx[keep]
+    d = dist[keep]
+
+    if not directed:
+        lo, hi = np.minimum(i, j), np.maximum(i, j)
+        _, first = np.unique(lo * n + hi, return_index=True)
+        i, j, d = lo[first], hi[first], d[first]
+    return i, j, d
@@ -1,59 +1,286 @@
 # -*- coding: utf-8 -*-
 # Module: shortest_path.py
 # Project: solar-system-graph
-# Chức năng: Thuật toán tìm đường ngắn nhất (Dijkstra)
+# Chức năng: Thuật toán tìm đường ngắn nhất (Dijkstra, A*, tìm kiếm 2 chiều)
 
-import networkx as nx
 import heapq
 
+import numpy as np
+
+from algorithms.graph_core import as_core
+from algorithms.results import PathResult
+from algorithms.steps import Step
+
 def dijkstra_algorithm(G, start, end):
     """
     Tìm đường ngắn nhất dùng Dijkstra.
-    Yield: (current_node, visited_nodes, path_edges)
+    G có thể là nx.Graph hoặc GraphCore (chạy trực tiếp trên mảng CSR).
+    Yield: Step (node vừa chốt, các cạnh mới được xét từ bước trước)
     """
+    core = as_core(G)
+    names = core.nodes
+    indptr = core.indptr.tolist()
+    indices = core.indices.tolist()
+    weights = core.weights.tolist()
+    source = core.id_of(start)
+    target = core.id_of(end)
+
     # Priority Queue: (khoảng_cách, node_hiện_tại)
-    pq = [(0, start)]
+    pq = [(0, source)]
     
-    distances = {node: float('inf') for node in G.nodes()}
-    distances[start] = 0
+    distances = [float('inf')] * core.n_nodes
+    distances[source] = 0
     
-    previous = {node: None for node in G.nodes()}
-    visited = set()
-    path_edges_viz = [] # Chỉ dùng để hiển thị quá trình duyệt
+    previous = [-1] * core.n_nodes
+    visited = [False] * core.n_nodes
+    new_edges_viz = [] # Cạnh mới xét kể từ lần yield trước (chỉ để hiển thị)
     
     while pq:
         current_dist, current_node = heapq.heappop(pq)
         
-        if current_node in visited:
+        if visited[current_node]:
             continue
-        visited.add(current_node)
+        visited[current_node] = True
         
         # Nếu đã đến đích -> Dừng và Reconstruct path
-        if current_node == end:
+        if current_node == target:
             final_path = []
-            curr = end
-            while curr is not None:
+            curr = target
+            while previous[curr] != -1:
                 prev = previous[curr]
-                if prev is not None:
-                    final_path.append((prev, curr))
+                final_path.append((names[prev], names[curr]))
                 curr = prev
             
-            # Yield lần cuối cùng với đường đi hoàn chỉnh
-            yield current_node, list(visited), final_path
+            # Yield lần cuối: thay các cạnh đã xét bằng đường đi hoàn chỉnh
+            yield Step(names[current_node], (names[current_node],), tuple(final_path), clear_edges=True)
             return
 
         # Yield trạng thái đang tìm kiếm
-        yield current_node, list(visited), path_edges_viz
+        yield Step(names[current_node], (names[current_node],), tuple(new_edges_viz))
+        new_edges_viz = []
         
-        for neighbor in G.neighbors(current_node):
-            weight = G[current_node][neighbor].get('weight', 1.0)
-            distance = current_dist + weight
+        for k in range(indptr[current_node], indptr[current_node + 1]):
+            neighbor = indices[k]
+            distance = current_dist + weights[k]
             
             # Chỉ thêm vào visual nếu chưa duyệt
-            if neighbor not in visited:
-                path_edges_viz.append((current_node, neighbor))
+            if not visited[neighbor]:
+                new_edges_viz.append((names[current_node], names[neighbor]))
             
             if distance < distances[neighbor]:
                 distances[neighbor] = distance
                 previous[neighbor] = current_node
-                heapq.heappush(pq, (distance, neighbor))
\ No newline at end of file
+                heapq.heappush(pq, (distance, neighbor))
+
+def dijkstra_path(G, start, end):
+    """
+    Chế độ chỉ tính toán: Dijkstra chạy một mạch, dừng ngay khi chốt đích.
+    Trả về PathResult(path, distance, settled).
+    """
+    core = as_core(G)
+    names = core.nodes
+    indptr = core.indptr.tolist()
+    indices = core.indices.tolist()
+    weights = core.weights.tolist()
+    source = core.id_of(start)
+    target = core.id_of(end)
+
+    distances = [float('inf')] * core.n_nodes
+    distances[source] = 0
+    previous = [-1] * core.n_nodes
+    visited = [False] * core.n_nodes
+    settled = 0
+    pq = [(0, source)]
+
+    while pq:
+        current_dist, u = heapq.heappop(pq)
+        if visited[u]:
+            continue
+        visited[u] = True
+        settled += 1
+        if u == target:
+            break
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            distance = current_dist + weights[k]
+            if distance < distances[v]:
+                distances[v] = distance
+                previous[v] = u
+                heapq.heappush(pq, (distance, v))
+
+    return _make_path_result(names, previous, source, target, distances[target], settled)
+
+def _make_path_result(names, previous, source, target, distance, settled):
+    """Dựng lại đường đi từ mảng previous (dùng chung cho các biến thể tìm đường)"""
+    if distance == float('inf'):
+        return PathResult([], distance, settled)
+    path = [target]
+    while path[-1] != source:
+        path.append(previous[path[-1]])
+    path.reverse()
+    return PathResult([names[i] for i in path], distance, settled)
+
+# =========================================================================
+#  A* VÀ TÌM KIẾM 2 CHIỀU (heuristic = khoảng cách thẳng giữa các hành tinh)
+# =========================================================================
+
+def _straight_line(core, target):
+    """
+    h(v) = s * |P[v] - P[target]| cho mọi node (tính vector hóa một lần).
+    s lấy từ core.distance_scale() nên h luôn chấp nhận được; s = 0 -> h = 0 (Dijkstra).
+    """
+    scale = core.distance_scale()
+    if scale <= 0:
+        return [0.0] * core.n_nodes
+    return (scale * np.linalg.norm(core.positions - core.positions[target], axis=1)).tolist()
+
+def _astar_search(core, source, target, h=None):
+    """
+    Lõi A* trên CSR. Yield (node vừa chốt, node cha) mỗi lần chốt một node,
+    kết thúc bằng return PathResult.
+    h: heuristic cho mọi node (list); mặc định là khoảng cách thẳng tới đích.
+    """
+    names = core.nodes
+    indptr = core.indptr.tolist()
+    indices = core.indices.tolist()
+    weights = core.weights.tolist()
+    if h is None:
+        h = _straight_line(core, target)
+
+    g = [float('inf')] * core.n_nodes
+    g[source] = 0
+    previous = [-1] * core.n_nodes
+    closed = [False] * core.n_nodes
+    settled = 0
+    pq = [(h[source], source)]
+
+    while pq:
+        _, u = heapq.heappop(pq)
+        if closed[u]:
+            continue
+        closed[u] = True
+        settled += 1
+        yield u, previous[u]
+        if u == target:
+            break
+        gu = g[u]
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            cand = gu + weights[k]
+            if cand < g[v]:
+                g[v] = cand
+                previous[v] = u
+                heapq.heappush(pq, (cand + h[v], v))
+
+    return _make_path_result(names, previous, source, target, g[target], settled)
+
+def _run(search):
+    """Chạy hết một lõi tìm kiếm dạng generator và lấy giá trị return"""
+    while True:
+        try:
+            next(search)
+        except StopIteration as stop:
+            return stop.value
+
+def astar_algorithm(G, start, end):
+    """
+    A* có animation: giống Dijkstra nhưng ưu tiên node gần đích theo đường thẳng.
+    Yield: Step
+    """
+    core = as_core(G)
+    names = core.nodes
+    search = _astar_search(core, core.id_of(start), core.id_of(end))
+    while True:
+        try:
+            u, prev = next(search)
+        except StopIteration as stop:
+            result = stop.value
+            break
+        edge = ((names[prev], names[u]),) if prev != -1 else ()
+        yield Step(names[u], (names[u],), edge)
+
+    # Thay cây tìm kiếm bằng đường đi hoàn chỉnh
+    yield Step(end, (), tuple(zip(result.path, result.path[1:])), clear_edges=True)
+
+def astar_path(G, start, end):
+    """Chế độ chỉ tính toán: A* trả về PathResult(path, distance, settled)"""
+    core = as_core(G)
+    return _run(_astar_search(core, core.id_of(start), core.id_of(end)))
+
+def bidirectional_path(G, start, end, heuristic=True):
+    """
+    Tìm đường 2 chiều: một Dijkstra/A* đi từ start, một đi ngược từ end trên đồ thị đảo.
+    Với heuristic=True dùng thế trung bình p(v) = (h_end(v) - h_start(v)) / 2 để cả 2 phía
+    có chi phí rút gọn không âm. Dừng khi top_trước + top_sau >= mu (đường tốt nhất đã thấy).
+    Trả về PathResult, settled = tổng số node đã chốt ở cả 2 phía.
+    """
+    core = as_core(G)
+    names = core.nodes
+    n = core.n_nodes
+    source, target = core.id_of(start), core.id_of(end)
+    if source == target:
+        return PathResult([start], 0.0, 1)
+
+    if heuristic:
+        h_t = _straight_line(core, target)
+        h_s = _straight_line(core, source)
+        pot = [(a - b) / 2 for a, b in zip(h_t, h_s)]
+    else:
+        pot = [0.0] * n
+
+    fwd = core
+    bwd = core.reverse()
+    sides = []
+    for graph, root, sign in ((fwd, source, 1), (bwd, target, -1)):
+        dist = [float('inf')] * n
+        dist[root] = 0.0
+        sides.append({
+            'indptr': graph.indptr.tolist(), 'indices': graph.indices.tolist(),
+            'weights': graph.weights.tolist(), 'sign': sign,
+            'dist': dist, 'pred': [-1] * n, 'closed': [False] * n,
+            'pq': [(sign * pot[root], root)],
+        })
+
+    mu = float('inf')
+    meet = -1
+    settled = 0
+    while sides[0]['pq'] and sides[1]['pq']:
+        if sides[0]['pq'][0][0] + sides[1]['pq'][0][0] >= mu:
+            break
+        # Mở rộng phía có khóa nhỏ hơn
+        side = sides[0] if sides[0]['pq'][0][0] <= sides[1]['pq'][0][0] else sides[1]
+        other = sides[1] if side is sides[0] else sides[0]
+        _, u = heapq.heappop(side['pq'])
+        if side['closed'][u]:
+            continue
+        side['closed'][u] = True
+        settled += 1
+
+        dist, pred, sign = side['dist'], side['pred'], side['sign']
+        other_dist = other['dist']
+        indptr, indices, weights = side['indptr'], side['indices'], side['weights']
+        du = dist[u]
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            cand = du + weights[k]
+            if cand < dist[v]:
+                dist[v] = cand
+                pred[v] = u
+                heapq.heappush(side['pq'], (cand + sign * pot[v], v))
+            if dist[v] + other_dist[v] < mu:
+                mu = dist[v] + other_dist[v]
+                meet = v
+
+    if meet == -1:
+        return PathResult([], float('inf'), settled)
+
+    # Ghép nửa đường trước (start -> meet) và nửa sau (meet -> end)
+    head = [meet]
+    while head[-1] != source:
+        head.append(sides[0]['pred'][head[-1]])
+    head.reverse()
+    tail = meet
+    while tail != target:
+        tail = sides[1]['pred'][tail]
+        head.append(tail)
+    return PathResult([names[i] for i in head], mu, settled)
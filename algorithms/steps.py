@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# Module: steps.py
+# Project: solar-system-graph
+# Chức năng: Giao thức bước animation dạng delta (chỉ gửi phần thay đổi mỗi bước)
+
+from collections import namedtuple
+
+# Một bước của thuật toán, chỉ chứa phần thay đổi so với bước trước:
+# - current     : node đang xét (hoặc None)
+# - nodes       : các node mới được thăm/tô màu ở bước này
+# - edges       : các cạnh mới được thêm vào phần highlight
+# - removed     : các cạnh bị gỡ khỏi phần highlight
+# - clear_edges : True -> xóa toàn bộ cạnh cũ trước khi thêm `edges`
+Step = namedtuple('Step', ['current', 'nodes', 'edges', 'removed', 'clear_edges'],
+                  defaults=((), (), (), False))
+
+class StepState:
+    """
+    Trạng thái đầy đủ được gom từ chuỗi Step.
+    visited / edges là dict (giữ thứ tự thêm vào, tra cứu O(1)).
+    """
+
+    def __init__(self):
+        self.current = None
+        self.visited = {}
+        self.edges = {}
+        self.steps = 0
+
+    def apply(self, step):
+        """Áp dụng một Step, chi phí chỉ tỉ lệ với kích thước phần thay đổi"""
+        self.steps += 1
+        self.current = step.current
+        if step.clear_edges:
+            self.edges.clear()
+        for e in step.removed:
+            self.edges.pop(e, None)
+        for n in step.nodes:
+            self.visited[n] = True
+        for e in step.edges:
+            self.edges[e] = True
+        return self
+
+    def snapshot(self):
+        """Dựng trạng thái đầy đủ dạng cũ: (current_node, visited_nodes, path_edges)"""
+        return self.current, list(self.visited), list(self.edges)
+
+def materialize(steps):
+    """Chạy hết chuỗi Step và trả về StepState cuối cùng"""
+    state = StepState()
+    for step in steps:
+        state.apply(step)
+    return state
+
+def merge_steps(steps):
+    """
+    Gộp nhiều Step liên tiếp thành một Step tương đương (áp dụng một lần cho ra cùng trạng thái).
+    Dùng khi animation bỏ qua các frame trung gian: cạnh thêm rồi gỡ trong cùng lô thì chỉ còn
+    trong removed, clear_edges xóa bỏ mọi thay đổi cạnh trước nó trong lô.
+    Trả về None nếu không có bước nào.
+    """
+    current = None
+    nodes = {}
+    edges = {}
+    removed = {}
+    clear = False
+    count = 0
+    for step in steps:
+        count += 1
+        current = step.current
+        if step.clear_edges:
+            clear = True
+            edges.clear()
+            removed.clear()
+        for e in step.removed:
+            edges.pop(e, None)
+            removed[e] = True
+        for n in step.nodes:
+            nodes[n] = True
+        for e in step.edges:
+            edges[e] = True
+            removed.pop(e, None)
+    if count == 0:
+        return None
+    return Step(current, tuple(nodes), tuple(edges), tuple(removed), clear)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# Module: trace.py
+# Project: solar-system-graph
+# Chức năng: Ghi lại chuỗi Step của một lần chạy dạng gọn (id nguyên + delta + keyframe) để tua / phát lại
+
+from array import array
+from bisect import bisect_right
+
+import numpy as np
+
+from algorithms.steps import Step, StepState
+
+# Keyframe được ghi khi số bản ghi delta cạnh kể từ keyframe trước >= kích thước tập cạnh hiện tại
+# (và cách nhau ít nhất KEYFRAME_MIN_STEPS bước): bộ nhớ keyframe không vượt quá bộ nhớ delta,
+# tua tới một bước chỉ cần nạp một keyframe rồi áp tối đa ~ngần ấy bản ghi.
+KEYFRAME_MIN_STEPS = 256
+
+class TraceRecorder:
+    """
+    Ghi Step thành các mảng phẳng:
+    - node / cạnh được đánh số nguyên (cạnh có hướng theo đúng thứ tự (u, v) trong Step);
+    - mỗi bước: current, cờ clear_edges và số node / cạnh thêm / cạnh gỡ;
+    - keyframe: tập cạnh đầy đủ tại một số bước (node chỉ tăng nên không cần keyframe).
+    """
+
+    def __init__(self, label=""):
+        self.label = label
+        self.names = []
+        self.node_ids = {}
+        self.edge_ids = {}      # (id u, id v) -> id cạnh
+        self.edge_src = array('i')
+        self.edge_dst = array('i')
+
+        self.current = array('i')
+        self.clear = array('b')
+        self.counts = array('I')    # 3 số mỗi bước: node, cạnh thêm, cạnh gỡ
+        self.node_log = array('i')
+        self.add_log = array('i')
+        self.rem_log = array('i')
+
+        self.edges = {}             # Tập cạnh hiện tại (id), để chụp keyframe
+        self.kf_steps = array('q')
+        self.kf_ptr = array('q', [0])
+        self.kf_edges = array('i')
+        self._since_keyframe = 0
+        self._last_keyframe = 0
+
+    def _node(self, name):
+        i = self.node_ids.get(name)
+        if i is None:
+            i = self.node_ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def _edge(self, e):
+        key = (self._node(e[0]), self._node(e[1]))
+        k = self.edge_ids.get(key)
+        if k is None:
+            k = self.edge_ids[key] = len(self.edge_src)
+            self.edge_src.append(key[0])
+            self.edge_dst.append(key[1])
+        return k
+
+    def record(self, step):
+        n = len(self.current)
+        if n - self._last_keyframe >= KEYFRAME_MIN_STEPS and self._since_keyframe >= len(self.edges):
+            self._keyframe(n)
+
+        self.current.append(-1 if step.current is None else self._node(step.current))
+        self.clear.append(1 if step.clear_edges else 0)
+        nodes = [self._node(x) for x in step.nodes]
+        added = [self._edge(e) for e in step.edges]
+        removed = [self._edge(e) for e in step.removed]
+        self.counts.extend((len(nodes), len(added), len(removed)))
+        self.node_log.extend(nodes)
+        self.add_log.extend(added)
+        self.rem_log.extend(removed)
+
+        edges = self.edges
+        if step.clear_edges:
+            edges.clear()
+        for k in removed:
+            edges.pop(k, None)
+        for k in added:
+            edges[k] = True
+        self._since_keyframe += len(added) + len(removed) + (1 if step.clear_edges else 0)
+
+    def _keyframe(self, n):
+        """Tập cạnh trước khi áp bước thứ n"""
+        self.kf_steps.append(n)
+        self.kf_edges.extend(self.edges)
+        self.kf_ptr.append(len(self.kf_edges))
+        self._since_keyframe = 0
+        self._last_keyframe = n
+
+    def finish(self):
+        """Đóng gói thành StepTrace (mảng NumPy)"""
+        counts = np.frombuffer(self.counts, dtype=np.uint32).reshape(-1, 3)
+        total = max(len(self.node_log), len(self.add_log), len(self.rem_log))
+        ptr = np.zeros((len(counts) + 1, 3), dtype=np.int32 if total < 2**31 else np.int64)
+        np.cumsum(counts, axis=0, out=ptr[1:])
+        arrays = {
+            'edge_src': np.frombuffer(self.edge_src, dtype=np.int32),
+            'edge_dst': np.frombuffer(self.edge_dst, dtype=np.int32),
+            'current': np.frombuffer(self.current, dtype=np.int32),
+            'clear': np.frombuffer(self.clear, dtype=np.int8).astype(bool),
+            'ptr': ptr,
+            'node_log': np.frombuffer(self.node_log, dtype=np.int32),
+            'add_log': np.frombuffer(self.add_log, dtype=np.int32),
+            'rem_log': np.frombuffer(self.rem_log, dtype=np.int32),
+            'kf_steps': np.frombuffer(self.kf_steps, dtype=np.int64),
+            'kf_ptr': np.frombuffer(self.kf_ptr, dtype=np.int64),
+            'kf_edges': np.frombuffer(self.kf_edges, dtype=np.int32),
+        }
+        return StepTrace(self.names, arrays, self.label)
+
+class StepTrace:
+    """
+    Chuỗi Step đã ghi, chỉ đọc. seek(k) dựng lại trạng thái sau k bước đầu:
+    nạp keyframe gần nhất phía trước rồi áp các delta cạnh còn lại; tập node đã thăm
+    lấy thẳng từ bước thăm đầu tiên của mỗi node (node không bao giờ bị gỡ).
+    """
+
+    def __init__(self, names, arrays, label=""):
+        self.label = label
+        self.names = list(names)
+        self.arrays = arrays
+        self.n_steps = len(arrays['current'])
+        self._kf_steps = arrays['kf_steps'].tolist()
+
+        # Lần đầu mỗi node xuất hiện trong `nodes`: vị trí trong node_log (giữ đúng thứ tự thăm)
+        # và bước tương ứng (không xuất hiện -> n_steps)
+        node_log = arrays['node_log']
+        step_of = np.repeat(np.arange(self.n_steps), np.diff(arrays['ptr'][:, 0]))
+        self.first_pos = np.full(len(self.names), len(node_log), dtype=np.int64)
+        np.minimum.at(self.first_pos, node_log, np.arange(len(node_log)))
+        self.first_visit = np.append(step_of, self.n_steps)[self.first_pos]
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self.arrays.values()) + self.first_pos.nbytes + self.first_visit.nbytes
+
+    def step(self, i):
+        """Step thứ i (dạng tên) như lúc ghi"""
+        a, names = self.arrays, self.names
+        (n0, e0, r0), (n1, e1, r1) = a['ptr'][i], a['ptr'][i + 1]
+        current = int(a['current'][i])
+        return Step(names[current] if current >= 0 else None,
+                    tuple(names[x] for x in a['node_log'][n0:n1].tolist()),
+                    tuple(self._edge_name(k) for k in a['add_log'][e0:e1].tolist()),
+                    tuple(self._edge_name(k) for k in a['rem_log'][r0:r1].tolist()),
+                    bool(a['clear'][i]))
+
+    def steps(self):
+        """Phát lại toàn bộ chuỗi Step"""
+        for i in range(self.n_steps):
+            yield self.step(i)
+
+    def _edge_name(self, k):
+        a = self.arrays
+        return self.names[a['edge_src'][k]], self.names[a['edge_dst'][k]]
+
+    def seek(self, k):
+        """StepState sau k bước đầu (0 <= k <= n_steps)"""
+        k = max(0, min(k, self.n_steps))
+        a, names = self.arrays, self.names
+
+        # Keyframe gần nhất <= k, rồi áp delta cạnh từ đó tới bước k
+        j = bisect_right(self._kf_steps, k) - 1
+        if j >= 0:
+            start = self._kf_steps[j]
+            base = a['kf_edges'][a['kf_ptr'][j]:a['kf_ptr'][j + 1]]
+        else:
+            start, base = 0, a['kf_edges'][:0]
+        edges = self._replay_edges(base, start, k)
+
+        state = StepState()
+        state.steps = k
+        current = int(a['current'][k - 1]) if k > 0 else -1
+        state.current = names[current] if current >= 0 else None
+        visited = np.flatnonzero(self.first_visit < k)
+        visited = visited[np.argsort(self.first_pos[visited])]
+        state.visited = dict.fromkeys((names[i] for i in visited.tolist()), True)
+        src, dst = a['edge_src'][edges].tolist(), a['edge_dst'][edges].tolist()
+        state.edges = dict.fromkeys(((names[u], names[v]) for u, v in zip(src, dst)), True)
+        return state
+
+    def _replay_edges(self, base, start, k):
+        """
+        Tập cạnh (mảng id) sau bước k - 1, xuất phát từ tập `base` trước bước `start`.
+        Mỗi cạnh chỉ phụ thuộc thao tác cuối cùng với nó trong đoạn (trong một bước: gỡ trước, thêm sau);
+        bước clear_edges cuối cùng trong đoạn thay base bằng tập rỗng.
+        """
+        a = self.arrays
+        cleared = np.flatnonzero(a['clear'][start:k])
+        if len(cleared):
+            start += int(cleared[-1])
+            base = base[:0]
+        if start >= k:
+            return base
+        ptr = a['ptr']
+        removed = a['rem_log'][ptr[start, 2]:ptr[k, 2]]
+        added = a['add_log'][ptr[start, 1]:ptr[k, 1]]
+        # Khóa thứ tự: bước * 2 (+1 với thao tác thêm)
+        rem_key = 2 * np.repeat(np.arange(start, k), np.diff(ptr[start:k + 1, 2]))
+        add_key = 2 * np.repeat(np.arange(start, k), np.diff(ptr[start:k + 1, 1])) + 1
+        ids = np.concatenate([removed, added])
+        key = np.concatenate([rem_key, add_key])
+        order = np.lexsort((key, ids))
+        ids, key = ids[order], key[order]
+        last = np.ones(len(ids), dtype=bool)
+        last[:-1] = ids[1:] != ids[:-1]
+        ids, is_add = ids[last], key[last] % 2 == 1
+        return np.union1d(np.setdiff1d(base, ids[~is_add]), ids[is_add])
+
+def record(steps, label=""):
+    """Ghi cả chuỗi Step (vd. từ một generator thuật toán) thành StepTrace"""
+    recorder = TraceRecorder(label)
+    for step in steps:
+        recorder.record(step)
+    return recorder.finish()
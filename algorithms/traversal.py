@@ -1,56 +1,159 @@
 # -*- coding: utf-8 -*-
 # Module: traversal.py
 # Project: solar-system-graph
-# Chức năng: Các thuật toán duyệt đồ thị (BFS, DFS) hỗ trợ Animation
+# Chức năng: Các thuật toán duyệt đồ thị (BFS theo tầng, BFS đa nguồn, DFS) hỗ trợ Animation
 
-import networkx as nx
-from collections import deque
+import numpy as np
+
+from algorithms.graph_core import as_core
+from algorithms.results import TraversalResult
+from algorithms.steps import Step
+
+# Mọi thuật toán duyệt hàng xóm theo thứ tự tên (GraphCore.name_sorted_indices, sắp một lần)
+
+def _bfs_levels(core, sources):
+    """
+    BFS đồng bộ theo tầng: mở rộng cả frontier một lúc bằng NumPy.
+    Thứ tự node trong mỗi tầng giống BFS tuần tự (theo frontier, rồi theo tên hàng xóm).
+    Trả về (dist, parent, levels): dist = số bước nhảy (-1 nếu không tới được),
+    parent = node cha trong cây BFS (-1 với nguồn), levels = list mảng id theo từng tầng.
+    """
+    n = core.n_nodes
+    indptr = core.indptr
+    indices = core.name_sorted_indices()
+    dist = np.full(n, -1, dtype=np.int64)
+    parent = np.full(n, -1, dtype=np.int64)
+
+    # Nguồn trùng lặp chỉ giữ lần xuất hiện đầu
+    sources = np.asarray(sources, dtype=np.int64)
+    _, first = np.unique(sources, return_index=True)
+    frontier = sources[np.sort(first)]
+    dist[frontier] = 0
+    levels = [frontier]
+
+    level = 0
+    while len(frontier):
+        # Gom toàn bộ hàng xóm của frontier thành một mảng phẳng
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            break
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+        nbrs = indices[offsets]
+        origin = np.repeat(frontier, counts)
+
+        fresh = dist[nbrs] < 0
+        nbrs, origin = nbrs[fresh], origin[fresh]
+        # Lần gặp đầu tiên quyết định cha (đúng như BFS tuần tự)
+        _, first = np.unique(nbrs, return_index=True)
+        first.sort()
+        frontier = nbrs[first]
+        level += 1
+        dist[frontier] = level
+        parent[frontier] = origin[first]
+        if len(frontier):
+            levels.append(frontier)
+
+    return dist, parent, levels
+
+def bfs_arrays(G, sources):
+    """
+    BFS đa nguồn (sources: tên một node hoặc list tên).
+    Trả về (dist, parent) dạng mảng theo id của GraphCore: số bước nhảy tới nguồn gần nhất
+    (-1 nếu không tới được) và node cha trong rừng BFS (-1 với nguồn).
+    """
+    core = as_core(G)
+    if not isinstance(sources, (list, tuple, set)):
+        sources = [sources]
+    dist, parent, _ = _bfs_levels(core, [core.id_of(s) for s in sources])
+    return dist, parent
 
 def bfs_traversal(G, start_node):
     """
-    Thuật toán duyệt theo chiều rộng (BFS).
-    Yield: (current_node, visited_nodes, edges_traversed)
-    """
-    visited = set()
-    queue = deque([start_node])
-    visited.add(start_node)
-    
-    # Danh sách cạnh đã duyệt để vẽ
-    path_edges = []
-    
-    while queue:
-        current = queue.popleft()
-        
-        # Trả về trạng thái hiện tại để vẽ UI
-        yield current, list(visited), path_edges
-        
-        # Duyệt các hàng xóm
-        neighbors = sorted(list(G.neighbors(current))) # Sort để thứ tự ổn định
-        for neighbor in neighbors:
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append(neighbor)
-                path_edges.append((current, neighbor))
-                # Yield ngay khi tìm thấy cạnh mới
-                yield neighbor, list(visited), path_edges
+    Thuật toán duyệt theo chiều rộng (BFS), animation theo từng tầng.
+    G có thể là nx.Graph hoặc GraphCore (chạy trực tiếp trên mảng CSR).
+    start_node có thể là list để duyệt đa nguồn.
+    Yield: Step (cả tầng mới và các cạnh cây BFS dẫn tới tầng đó)
+    """
+    core = as_core(G)
+    names = core.nodes
+    starts = start_node if isinstance(start_node, (list, tuple)) else [start_node]
+    _, parent, levels = _bfs_levels(core, [core.id_of(s) for s in starts])
+
+    for level in levels:
+        ids = level.tolist()
+        edges = tuple((names[p], names[v]) for p, v in zip(parent[level].tolist(), ids) if p >= 0)
+        yield Step(names[ids[0]], tuple(names[i] for i in ids), edges)
+
+def _dfs_tree(core, start):
+    """
+    DFS lặp với con trỏ hàng xóm cho mỗi node trên stack: không đẩy trùng,
+    cạnh cây chỉ được ghi khi node con thực sự được thăm qua nó.
+    Yield (parent, node) theo thứ tự thăm (parent = -1 với start).
+    """
+    indptr = core.indptr.tolist()
+    indices = core.name_sorted_indices().tolist()
+    visited = [False] * core.n_nodes
+    visited[start] = True
+    pointer = indptr[:-1]
+    stack = [start]
+    yield -1, start
+
+    while stack:
+        u = stack[-1]
+        p, end = pointer[u], indptr[u + 1]
+        while p < end and visited[indices[p]]:
+            p += 1
+        pointer[u] = p + 1
+        if p < end:
+            v = indices[p]
+            visited[v] = True
+            stack.append(v)
+            yield u, v
+        else:
+            stack.pop() # Hết hàng xóm -> quay lui
 
 def dfs_traversal(G, start_node):
     """
     Thuật toán duyệt theo chiều sâu (DFS).
+    Yield: Step (node vừa thăm và cạnh cây dẫn tới nó)
     """
-    visited = set()
-    stack = [start_node]
-    path_edges = []
-    
-    while stack:
-        current = stack.pop()
-        
-        if current not in visited:
-            visited.add(current)
-            yield current, list(visited), path_edges
-            
-            neighbors = sorted(list(G.neighbors(current)), reverse=True)
-            for neighbor in neighbors:
-                if neighbor not in visited:
-                    stack.append(neighbor)
-                    path_edges.append((current, neighbor))
\ No newline at end of file
+    core = as_core(G)
+    names = core.nodes
+    for u, v in _dfs_tree(core, core.id_of(start_node)):
+        edges = ((names[u], names[v]),) if u >= 0 else ()
+        yield Step(names[v], (names[v],), edges)
+
+# =========================================================================
+#  CHẾ ĐỘ CHỈ TÍNH TOÁN (không yield, chạy hết tốc độ)
+# =========================================================================
+
+def _traversal_result(names, order, parent, dist):
+    return TraversalResult([names[i] for i in order],
+                           {names[i]: names[parent[i]] for i in order if parent[i] != -1},
+                           {names[i]: dist[i] for i in order})
+
+def bfs_order(G, start_node):
+    """
+    BFS chạy một mạch (start_node có thể là list -> đa nguồn).
+    Trả về TraversalResult(order, parents, hops).
+    """
+    core = as_core(G)
+    starts = start_node if isinstance(start_node, (list, tuple)) else [start_node]
+    dist, parent, levels = _bfs_levels(core, [core.id_of(s) for s in starts])
+    order = np.concatenate(levels).tolist()
+    return _traversal_result(core.nodes, order, parent.tolist(), dist.tolist())
+
+def dfs_order(G, start_node):
+    """DFS chạy một mạch. Cha của node là node thực sự đưa nó vào cây; hops = độ sâu trong cây DFS."""
+    core = as_core(G)
+    order = []
+    parent = [-1] * core.n_nodes
+    depth = [0] * core.n_nodes
+    for u, v in _dfs_tree(core, core.id_of(start_node)):
+        order.append(v)
+        if u >= 0:
+            parent[v] = u
+            depth[v] = depth[u] + 1
+    return _traversal_result(core.nodes, order, parent, depth)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Module: conftest.py
+# Project: solar-system-graph
+# Chức năng: Cấu hình chung cho pytest (đường dẫn gói, QApplication không cần màn hình, cache tạm)
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+@pytest.fixture(scope="session")
+def qapp():
+    """Một QCoreApplication cho cả phiên test (timer / luồng Qt cần event loop)"""
+    from PyQt6.QtCore import QCoreApplication
+    return QCoreApplication.instance() or QCoreApplication([])
+
+@pytest.fixture(scope="session", autouse=True)
+def ephemeris_cache_path(tmp_path_factory):
+    """Cache ephemeris mặc định trỏ vào thư mục tạm: test không bao giờ ghi vào ~/.solar-system-graph"""
+    from utils.astro_data import CACHE_PATH_ENV
+    path = str(tmp_path_factory.mktemp("cache") / "ephemeris.sqlite")
+    old = os.environ.get(CACHE_PATH_ENV)
+    os.environ[CACHE_PATH_ENV] = path
+    yield path
+    if old is None:
+        os.environ.pop(CACHE_PATH_ENV, None)
+    else:
+        os.environ[CACHE_PATH_ENV] = old
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# Module: horizons_stub.py
+# Project: solar-system-graph
+# Chức năng: Server Horizons giả lập cục bộ (http.server) trả bảng VECTORS dựng sẵn, để test đường tải không cần mạng
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.ephemeris import calendar_date, julian_day
+
+def stub_position(body_id, jd):
+    """Vị trí giả lập mà server trả về cho thiên thể tại ngày Julius jd"""
+    return int(body_id) / 100.0, jd - 2460000.0, -0.1
+
+class HorizonsStub:
+    """
+    Server chạy trên luồng riêng, cổng ngẫu nhiên. Dùng với `with`; url là địa chỉ API.
+    plan = {body id: [hành động lần 1, lần 2, ...]} (hết danh sách thì lặp lại hành động cuối,
+    không có trong plan = 'ok'). Hành động:
+      'ok'      : bảng VECTORS từ START_TIME tới STOP_TIME, bước 1 ngày
+      'short'   : như 'ok' nhưng thiếu dòng cuối (lưới thời gian lệch)
+      'garbage' : HTTP 200 nhưng không có khối $$SOE..$$EOE
+      'slow'    : chờ slow_delay giây rồi mới trả lời như 'ok'
+      số nguyên : mã lỗi HTTP (vd. 503, 400)
+    Mỗi yêu cầu chờ thêm `delay` giây. hits = {body id: số yêu cầu}, max_in_flight = số yêu cầu đồng thời lớn nhất.
+    """
+
+    def __init__(self, plan=None, delay=0.0, slow_delay=2.0):
+        self.plan = dict(plan or {})
+        self.delay = delay
+        self.slow_delay = slow_delay
+        self.hits = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                try:
+                    stub._handle(self)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # Phía client đã bỏ cuộc (timeout)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/api/horizons.api"
+
+    def _handle(self, request):
+        query = {k: v[0].strip("'") for k, v in parse_qs(urlparse(request.path).query).items()}
+        body_id = query['COMMAND']
+        with self._lock:
+            attempt = self.hits.get(body_id, 0)
+            self.hits[body_id] = attempt + 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            actions = self.plan.get(body_id, ['ok'])
+            action = actions[min(attempt, len(actions) - 1)]
+            time.sleep(self.delay)
+            if isinstance(action, int):
+                request.send_response(action)
+                request.end_headers()
+                return
+            if action == 'slow':
+                time.sleep(self.slow_delay)
+            if action == 'garbage':
+                text = "No ephemeris for target"
+            else:
+                text = self._table(body_id, query['START_TIME'], query['STOP_TIME'], short=action == 'short')
+            payload = json.dumps({'result': text}).encode()
+            request.send_response(200)
+            request.send_header('Content-Type', 'application/json')
+            request.end_headers()
+            request.wfile.write(payload)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def _table(body_id, start, stop, short=False):
+        first, last = julian_day(start), julian_day(stop)
+        n = int(round(last - first)) + 1 - (1 if short else 0)
+        rows = []
+        for k in range(n):
+            jd = first + k
+            x, y, z = stub_position(body_id, jd)
+            rows.append(f"{jd:.9f}, A.D. {calendar_date(jd):%Y-%b-%d %H:%M}:00.0000, "
+                        f"{x:.15E}, {y:.15E}, {z:.15E},")
+        return "header\n$$SOE\n" + "\n".join(rows) + "\n$$EOE\nfooter\n"
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Module: test_adjacency.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra xuất ma trận kề thưa: đúng với networkx, dựng một lần cho mỗi phiên bản đồ thị
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithms.graph_base import SpaceGraph
+from utils.converters import graph_to_adj_matrix_text
+
+def _graph(n=30, seed=3):
+    rng = np.random.default_rng(seed)
+    sg = SpaceGraph()
+    for i in range(n):
+        sg.add_planet(f"p{i}", *rng.uniform(-10, 10, 3))
+    sg.connect_randomly(0.2, seed=seed)
+    return sg
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_sparse_adjacency_matches_networkx(directed):
+    sg = _graph()
+    sg.set_directed(directed)
+    if directed:
+        sg.add_route("p0", "p1", 42.0)
+    nodes, matrix = sg.get_sparse_adjacency()
+    expected = nx.to_scipy_sparse_array(sg.G, nodelist=nodes, weight='weight')
+    assert (matrix != expected).nnz == 0
+    assert np.array_equal(sg.get_adjacency_matrix()[1], expected.toarray())
+
+def test_matrix_is_reused_until_the_graph_changes():
+    sg = _graph()
+    nodes, matrix = sg.get_sparse_adjacency()
+    assert sg.get_sparse_adjacency()[1] is matrix
+    sg.move_planets({"p3": (0.0, 0.0, 0.0)}) # Dời tọa độ không đổi trọng số: ma trận giữ nguyên
+    assert sg.get_sparse_adjacency()[1] is matrix
+
+    sg.add_route("p0", "p1", 42.0)
+    nodes2, changed = sg.get_sparse_adjacency()
+    assert changed is not matrix
+    assert changed[nodes2.index("p0"), nodes2.index("p1")] == 42.0
+
+def test_dense_export_is_limited():
+    sg = _graph(n=12)
+    with pytest.raises(ValueError):
+        sg.get_adjacency_matrix(dense_limit=10)
+    with pytest.raises(ValueError):
+        graph_to_adj_matrix_text(sg, dense_limit=10)
+    text = graph_to_adj_matrix_text(sg)
+    assert len(text.splitlines()) == 13
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+# Module: test_animation.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra bộ lập lịch animation (bỏ qua tới cuối)
+
+import threading
+import time
+
+from algorithms.steps import Step, materialize
+from ui.animation import AnimationScheduler
+
+def _wait(qapp, predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.005)
+    return predicate()
+
+def test_skip_to_end_draws_final_state_once(qapp):
+    steps = [Step(f"n{i}", (f"n{i}",), ((f"n{i}", f"n{i + 1}"),)) for i in range(200)]
+    steps.append(Step("n200", ("n200",), (), (("n0", "n1"),)))
+    produced = threading.Event()
+    release = threading.Event()
+
+    def make_steps():
+        yield from steps
+        produced.set()
+        release.wait(5.0) # Worker chưa kết thúc khi bấm Skip to End
+
+    scheduler = AnimationScheduler()
+    frames, finished = [], []
+    scheduler.frame.connect(frames.append)
+    scheduler.finished.connect(finished.append)
+    scheduler.submit("test", make_steps, expected=len(steps))
+    scheduler.skip_to_end() # Bấm ngay: không frame trung gian nào được vẽ
+    assert _wait(qapp, lambda: produced.is_set() and scheduler.worker.queue.empty())
+    release.set() # Lần lấy cuối chỉ còn phần tử kết thúc
+    assert _wait(qapp, lambda: finished)
+
+    assert finished == [len(steps)]
+    assert len(frames) == 1
+    expected = materialize(steps)
+    drawn = materialize(frames)
+    assert scheduler.state.edges == expected.edges
+    assert set(drawn.edges) == set(expected.edges)
+    assert set(drawn.visited) == set(expected.visited)
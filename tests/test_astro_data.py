@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Module: test_astro_data.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra đường tải Horizons (fetch_bodies / fetch_range) qua server giả lập cục bộ
+
+import time
+
+import numpy as np
+import pytest
+
+from utils.astro_data import PLANET_IDS, HorizonsHTTPTransport, fetch_bodies, fetch_range
+from utils.ephemeris import julian_day
+from horizons_stub import HorizonsStub, stub_position
+
+EPOCH = '2026-10-17'
+
+def _fetch(stub, bodies=None, **kwargs):
+    kwargs.setdefault('timeout', 2.0)
+    kwargs.setdefault('retries', 0)
+    kwargs.setdefault('backoff', 0.01)
+    return fetch_bodies(bodies or PLANET_IDS, EPOCH, HorizonsHTTPTransport(stub.url), **kwargs)
+
+def test_fetch_bodies_returns_stub_vectors():
+    with HorizonsStub() as stub:
+        result = _fetch(stub)
+    assert result.errors == {}
+    assert list(result.positions) == list(PLANET_IDS)
+    for name, body_id in PLANET_IDS.items():
+        assert np.allclose(result.positions[name], stub_position(body_id, julian_day(EPOCH)))
+
+def test_fetches_run_concurrently():
+    with HorizonsStub(delay=0.3) as stub:
+        start = time.perf_counter()
+        result = _fetch(stub, workers=8)
+        elapsed = time.perf_counter() - start
+    assert len(result.positions) == len(PLANET_IDS)
+    assert stub.max_in_flight > 1
+    assert elapsed < 0.3 * len(PLANET_IDS) / 2
+
+def test_slow_request_times_out():
+    with HorizonsStub({'399': ['slow']}, slow_delay=2.0) as stub:
+        start = time.perf_counter()
+        result = _fetch(stub, timeout=0.3)
+        elapsed = time.perf_counter() - start
+    assert 'Earth' in result.errors and 'timed out' in result.errors['Earth']
+    assert len(result.positions) == len(PLANET_IDS) - 1
+    assert elapsed < 1.5
+
+def test_server_error_is_retried_with_backoff():
+    with HorizonsStub({'499': [503, 503, 'ok']}) as stub:
+        start = time.perf_counter()
+        result = _fetch(stub, {'Mars': '499'}, retries=3, backoff=0.1)
+        elapsed = time.perf_counter() - start
+    assert result.errors == {}
+    assert stub.hits['499'] == 3
+    assert elapsed >= 0.1 + 0.2 # backoff, 2 * backoff
+
+def test_retries_are_bounded():
+    with HorizonsStub({'499': [503]}) as stub:
+        result = _fetch(stub, {'Mars': '499'}, retries=2)
+    assert 'Mars' in result.errors
+    assert stub.hits['499'] == 3
+
+@pytest.mark.parametrize('action, message', [(400, 'rejected'), ('garbage', 'No ephemeris block')])
+def test_client_and_parse_errors_are_not_retried(action, message):
+    with HorizonsStub({'799': [action, 'ok']}) as stub:
+        result = _fetch(stub, {'Uranus': '799'}, retries=3)
+    assert message in result.errors['Uranus']
+    assert stub.hits['799'] == 1
+
+def test_partial_results_keep_per_body_errors():
+    plan = {'799': [400], '899': ['garbage'], '499': [503, 'ok']}
+    with HorizonsStub(plan) as stub:
+        result = _fetch(stub, retries=1)
+    assert set(result.errors) == {'Uranus', 'Neptune'}
+    assert set(result.positions) == set(PLANET_IDS) - {'Uranus', 'Neptune'}
+    assert list(result.positions) == [name for name in PLANET_IDS if name in result.positions]
+
+def test_fetch_range_stacks_tracks_on_one_grid():
+    plan = {'899': ['short'], '799': [503, 'ok']}
+    with HorizonsStub(plan) as stub:
+        result = fetch_range(PLANET_IDS, EPOCH, '2026-10-27', transport=HorizonsHTTPTransport(stub.url),
+                             timeout=2.0, retries=1, backoff=0.01)
+    assert np.allclose(result.times, julian_day(EPOCH) + np.arange(11))
+    assert set(result.errors) == {'Neptune'} and 'grid mismatch' in result.errors['Neptune']
+    assert stub.hits['799'] == 2
+    earth = result.tracks['Earth']
+    assert earth.shape == (11, 3)
+    assert np.allclose(earth, [stub_position('399', jd) for jd in result.times])
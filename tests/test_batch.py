@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Module: test_batch.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra truy vấn tuyến hàng loạt (nhiều tiến trình, CSR memory-map)
+
+import os
+import tracemalloc
+
+import numpy as np
+
+from algorithms import batch
+from algorithms.graph_base import SpaceGraph
+
+def _graph(n=80, seed=1):
+    rng = np.random.default_rng(seed)
+    sg = SpaceGraph()
+    for i in range(n):
+        sg.add_planet(f"p{i}", *rng.uniform(-10, 10, 3))
+    sg.connect_randomly(0.1, seed=seed)
+    return sg
+
+def test_parallel_routes_match_serial():
+    core = _graph().core
+    pairs = [(f"p{i}", f"p{(i * 7) % 80}") for i in range(80)]
+    serial = {(r.start, r.end): r.distance for r in batch.batch_routes(core, pairs, workers=1)}
+    parallel = {(r.start, r.end): r.distance
+                for r in batch.batch_routes(core, pairs, workers=2, block_size=80 * 10)}
+    assert parallel == serial
+
+def test_shared_csr_is_int32(monkeypatch):
+    core = _graph().core
+    saved = {}
+    real_save = np.save
+    monkeypatch.setattr(np, 'save', lambda path, arr: saved.__setitem__(os.path.basename(path), arr.dtype)
+                        or real_save(path, arr))
+    pairs = [(f"p{i}", "p0") for i in range(80)]
+    list(batch.batch_routes(core, pairs, workers=2, block_size=80 * 10))
+    assert saved['indices.npy'] == np.int32 and saved['indptr.npy'] == np.int32
+
+def test_worker_attach_does_not_copy_indices(tmp_path):
+    core = _graph(n=2000).core
+    csr = core.to_scipy()
+    np.save(tmp_path / "data.npy", csr.data)
+    np.save(tmp_path / "indices.npy", csr.indices.astype(np.int32))
+    np.save(tmp_path / "indptr.npy", csr.indptr.astype(np.int32))
+    tracemalloc.start()
+    batch._attach_worker(str(tmp_path), core.n_nodes)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert batch._WORKER_CSR.indices.dtype == np.int32
+    assert peak < csr.indices.nbytes // 4
+
+def test_empty_batch_yields_nothing():
+    core = _graph(n=10).core
+    assert list(batch.batch_routes(core, [], workers=2)) == []
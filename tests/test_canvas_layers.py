@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Module: test_canvas_layers.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra lớp highlight theo slot của canvas (chỉ ghi phần thay đổi, dùng lại slot, nới bộ đệm)
+
+import numpy as np
+from matplotlib.lines import Line2D
+
+from ui.canvas_widget import _SlotLayer
+
+def _segment(k):
+    return np.array([[k, 0.0], [k, 1.0]])
+
+def _drawn(layer):
+    """Các đoạn đang vẽ theo dữ liệu của artist (bỏ các dòng NaN)"""
+    x, y = layer.artist.get_data()
+    xy = np.column_stack([x, y]).reshape(-1, 3, 2)[:, :2]
+    return sorted(int(s[0, 0]) for s in xy if not np.isnan(s[0, 0]))
+
+def test_updates_only_touch_changed_slots():
+    layer = _SlotLayer(Line2D([], []), dim=2, rows=3, capacity=2)
+    layer.update(((k, _segment(k)) for k in range(5)), [])
+    assert _drawn(layer) == [0, 1, 2, 3, 4]
+    assert len(layer.buffer) >= 5 * 3  # Bộ đệm đã được nới
+
+    slot = layer.slots[3]
+    before = layer.buffer.copy()
+    layer.update([], [3])
+    assert _drawn(layer) == [0, 1, 2, 4]
+    changed = np.flatnonzero(np.any(~np.isclose(before, layer.buffer, equal_nan=True), axis=1))
+    assert set(changed) <= {slot * 3, slot * 3 + 1}
+
+    layer.update([(7, _segment(7))], [])
+    assert layer.slots[7] == slot  # Slot vừa trả lại được dùng lại
+    assert _drawn(layer) == [0, 1, 2, 4, 7]
+
+def test_duplicates_and_unknown_keys_are_ignored():
+    layer = _SlotLayer(Line2D([], []), dim=2, rows=3)
+    assert layer.update([(1, _segment(1))], [])
+    assert not layer.update([(1, _segment(1))], [9])
+    assert len(layer) == 1
+
+def test_emptied_layer_starts_over():
+    layer = _SlotLayer(Line2D([], []), dim=2, rows=1)
+    layer.update(((k, np.array([[k, k]])) for k in range(4)), [])
+    layer.update([], range(4))
+    assert layer.used == 0 and not layer.free
+    assert len(layer.artist.get_xdata()) == 0
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Module: test_dynamic_mst.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra DynamicMST: hoán đổi tăng dần khớp với MST tính lại từ đầu
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithms import mst
+from algorithms.dynamic_mst import DynamicMST
+from algorithms.graph_base import SpaceGraph
+from algorithms.steps import Step, StepState
+
+def _graph(directed, n=50, seed=8):
+    rng = np.random.default_rng(seed)
+    sg = SpaceGraph()
+    sg.set_directed(directed)
+    for i in range(n):
+        sg.add_planet(f"p{i}", *rng.uniform(-10, 10, 3))
+    for u, v in rng.integers(0, n, (n, 2)).tolist():
+        if u != v:
+            sg.add_route(f"p{u}", f"p{v}", float(rng.uniform(5, 20)))
+    return sg, rng
+
+def _changes(sg, rng, count):
+    """Thêm tuyến (có thể nối hai cây), giảm trọng số, thêm node mới"""
+    names = list(sg.G.nodes())
+    for _ in range(count):
+        r = rng.random()
+        if r < 0.4:
+            u, v, w = list(sg.G.edges(data='weight'))[int(rng.integers(sg.G.number_of_edges()))]
+            sg.add_route(u, v, w * rng.uniform(0.1, 0.9))
+        elif r < 0.9:
+            u, v = rng.choice(names, 2, replace=False).tolist()
+            if not sg.G.has_edge(u, v) and not sg.G.has_edge(v, u):
+                sg.add_route(u, v, float(rng.uniform(0.5, 20)))
+        else:
+            name = f"new{len(names)}"
+            sg.add_planet(name, *rng.uniform(-10, 10, 3))
+            names.append(name)
+
+def _assert_minimal_forest(sg, dyn):
+    scratch = mst.minimum_spanning_tree(sg.core, 'kruskal')
+    result = dyn.result()
+    assert result.total_weight == pytest.approx(scratch.total_weight)
+    assert result.components == scratch.components
+    forest = nx.Graph(result.edges)
+    assert nx.is_forest(forest)
+    # Mỗi cạnh cây là một tuyến có thật, trọng số nhẹ nhất trong hai chiều
+    base = sg.G
+    for u, v in result.edges:
+        weights = [base[a][b]['weight'] for a, b in ((u, v), (v, u)) if base.has_edge(a, b)]
+        assert weights and dyn.tree[u][v] == pytest.approx(min(weights))
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_incremental_swaps_match_scratch(directed):
+    sg, rng = _graph(directed)
+    dyn = DynamicMST(sg)
+    state = StepState().apply(Step(None, tuple(dyn.tree), tuple(dyn.edges())))
+    for _ in range(30):
+        _changes(sg, rng, 3)
+        for step in dyn.refresh():
+            state.apply(step)
+        _assert_minimal_forest(sg, dyn)
+        # Các Step trả về mô tả đúng phần cây thay đổi
+        assert {frozenset(e) for e in state.edges} == {frozenset(e) for e in dyn.edges()}
+    assert dyn.rebuilds == 1
+
+def test_heavier_tree_edge_rebuilds():
+    sg, _ = _graph(False)
+    dyn = DynamicMST(sg)
+    u, v = dyn.edges()[0]
+    sg.add_route(u, v, 1000.0)
+    steps = dyn.refresh()
+    assert dyn.rebuilds == 2 and steps[0].clear_edges
+    _assert_minimal_forest(sg, dyn)
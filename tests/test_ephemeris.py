@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Module: test_ephemeris.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra nội suy Hermite của Ephemeris (độ chính xác, giá trị tại mốc, đường vô hướng / vector)
+
+import numpy as np
+import pytest
+
+from utils.ephemeris import J2000, Ephemeris
+
+def _circle(times):
+    """Hai thiên thể trên quỹ đạo tròn (chu kỳ 2π ngày tính từ J2000) -> mảng (T, 2, 3)"""
+    t = np.asarray(times, dtype=np.float64) - J2000
+    earth = np.stack([np.cos(t), np.sin(t), np.zeros_like(t)], axis=1)
+    mars = np.stack([1.5 * np.cos(t / 2), 1.5 * np.sin(t / 2), 0.1 * t], axis=1)
+    return np.stack([earth, mars], axis=1)
+
+def test_interpolation_tracks_smooth_orbit():
+    times = J2000 + np.linspace(0.0, 10.0, 101)
+    eph = Ephemeris(["Earth", "Mars"], times, _circle(times))
+    queries = J2000 + np.linspace(0.0, 10.0, 997)
+    err = np.abs(eph.at(queries) - _circle(queries)).max()
+    assert err < 1e-4
+
+def test_exact_at_knots():
+    times = J2000 + np.linspace(0.0, 5.0, 11)
+    positions = _circle(times)
+    eph = Ephemeris(["Earth", "Mars"], times, positions)
+    assert np.allclose(eph.at(times), positions, atol=1e-12)
+    for k, t in enumerate(times):
+        assert np.allclose(eph.at(t), positions[k], atol=1e-12)
+
+def test_scalar_path_matches_vector_path():
+    times = J2000 + np.array([0.0, 0.7, 1.5, 3.0, 3.2, 5.0])
+    eph = Ephemeris(["Earth", "Mars"], times, _circle(times))
+    queries = J2000 + np.random.default_rng(3).uniform(0.0, 5.0, 50)
+    vector = eph.at(queries)
+    for k, t in enumerate(queries):
+        assert np.allclose(eph.at(t), vector[k], atol=1e-12)
+
+def test_two_epochs_interpolate_linearly():
+    eph = Ephemeris(["Earth"], [J2000, J2000 + 2.0], [[[0.0, 0.0, 0.0]], [[2.0, 4.0, -2.0]]])
+    assert np.allclose(eph.at(J2000 + 0.5), [[0.5, 1.0, -0.5]])
+    assert np.allclose(eph.at(J2000 + np.array([1.0, 2.0])), [[[1.0, 2.0, -1.0]], [[2.0, 4.0, -2.0]]])
+
+def test_outside_range_raises():
+    times = J2000 + np.linspace(0.0, 1.0, 5)
+    eph = Ephemeris(["Earth", "Mars"], times, _circle(times))
+    with pytest.raises(ValueError):
+        eph.at(J2000 + 1.5)
+    with pytest.raises(ValueError):
+        eph.at(J2000 + np.array([0.5, -0.1]))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Module: test_ephemeris_cache.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra cache ephemeris SQLite (TTL, cắt LRU theo used_at, dùng bản cũ khi offline)
+
+import logging
+
+import numpy as np
+import pytest
+
+from utils import astro_data
+from utils.astro_data import AstroDataFetcher, EphemerisCache
+
+class Clock:
+    """Thay time.time trong astro_data bằng đồng hồ chỉnh tay"""
+
+    def __init__(self, monkeypatch, now=1000.0):
+        self.now = now
+        monkeypatch.setattr(astro_data.time, 'time', lambda: self.now)
+
+@pytest.fixture
+def clock(monkeypatch):
+    return Clock(monkeypatch)
+
+def test_default_path_comes_from_environment(ephemeris_cache_path):
+    assert EphemerisCache().path == ephemeris_cache_path
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = EphemerisCache(tmp_path / "c.sqlite", ttl=100)
+    cache.put_many({'399': np.array([1.0, 2.0, 3.0])}, "2026-01-01")
+    clock.now += 99
+    assert np.allclose(cache.get_many(['399'], "2026-01-01")['399'], [1.0, 2.0, 3.0])
+    clock.now += 2
+    assert cache.get_many(['399'], "2026-01-01") == {}
+    # Hết hạn nhưng vẫn còn cho chế độ offline
+    epoch, vector = cache.latest('399')
+    assert epoch == "2026-01-01" and np.allclose(vector, [1.0, 2.0, 3.0])
+
+def test_put_many_trims_least_recently_used(tmp_path, clock):
+    cache = EphemerisCache(tmp_path / "c.sqlite", max_entries=3)
+    for body in ('199', '299', '399'):
+        clock.now += 1
+        cache.put_many({body: np.zeros(3)}, "2026-01-01")
+    clock.now += 1
+    cache.get_many(['199'], "2026-01-01")  # 199 vừa được dùng: 299 thành bản lâu không dùng nhất
+    clock.now += 1
+    cache.put_many({'499': np.ones(3)}, "2026-01-01")
+    left = cache.get_many(['199', '299', '399', '499'], "2026-01-01")
+    assert sorted(left) == ['199', '399', '499']
+
+def test_offline_fetch_falls_back_to_latest(tmp_path, qapp, clock):
+    cache = EphemerisCache(tmp_path / "c.sqlite", ttl=100)
+    cache.put_many({'399': np.array([1.0, 0.0, 0.0])}, "2026-01-01")
+    clock.now += 1
+    cache.put_many({'399': np.array([0.9, 0.4, 0.0])}, "2026-01-05")
+    clock.now += 1000  # Mọi bản ghi đã hết hạn
+
+    fetcher = AstroDataFetcher(use_realtime=False, bodies={'Earth': '399', 'Mars': '499'}, cache=cache)
+    ready, errors = [], []
+    fetcher.data_ready.connect(ready.append)
+    fetcher.body_errors.connect(errors.append)
+    fetcher.run()
+
+    assert np.allclose(ready[0]['Earth'], [0.9, 0.4, 0.0])
+    assert 'Mars' not in ready[0]
+    assert "2026-01-05" in errors[0]['Earth']
+    assert fetcher.cache_hits == 0
+
+def test_unusable_cache_is_disabled_and_logged(tmp_path, qapp, caplog):
+    fetcher = AstroDataFetcher(use_realtime=False, bodies={'Earth': '399'},
+                               cache=EphemerisCache(str(tmp_path))) # Thư mục, không phải file
+    with caplog.at_level(logging.WARNING, logger=astro_data.__name__):
+        assert fetcher._cached('get_many', ['399'], "2026-01-01") is None
+    assert fetcher.cache is None
+    assert "Ephemeris cache disabled" in caplog.text
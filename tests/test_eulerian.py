@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Module: test_eulerian.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra chu trình Euler (Hierholzer) và Eulerize: chu trình hợp lệ, chi phí đi lặp nhỏ nhất
+
+from collections import Counter
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithms import eulerian
+from algorithms.graph_base import SpaceGraph
+
+def _graph(directed, n=24, extra=30, seed=4):
+    """Vòng p0 -> p1 -> ... -> p0 (liên thông / liên thông mạnh) cộng thêm các tuyến ngẫu nhiên"""
+    rng = np.random.default_rng(seed)
+    sg = SpaceGraph()
+    sg.set_directed(directed)
+    for i in range(n):
+        sg.add_planet(f"p{i}", *rng.uniform(-10, 10, 3))
+    for i in range(n):
+        sg.add_route(f"p{i}", f"p{(i + 1) % n}", float(rng.integers(1, 10)))
+    for u, v in rng.integers(0, n, (extra, 2)):
+        if u != v:
+            sg.add_route(f"p{u}", f"p{v}", float(rng.integers(1, 10)))
+    return sg
+
+def _key(u, v, directed):
+    return (u, v) if directed else frozenset((u, v))
+
+def _assert_valid_circuit(sg, result, start):
+    directed = sg.is_directed
+    circuit = result.circuit
+    assert circuit[0][0] == start and circuit[-1][1] == start
+    assert all(a[1] == b[0] for a, b in zip(circuit, circuit[1:]))
+    # Mỗi tuyến được đi đúng một lần, cộng thêm các lần đi lặp do Eulerize
+    expected = Counter(_key(u, v, directed) for u, v in sg.G.edges())
+    expected.update(_key(u, v, directed) for u, v in result.added_edges)
+    assert Counter(_key(u, v, directed) for u, v in circuit) == expected
+    assert all(sg.G.has_edge(u, v) for u, v in result.added_edges)
+
+def _min_matching_cost(G, odd):
+    """Ghép cặp hoàn hảo nhỏ nhất giữa các node lẻ, vét cạn (chỉ dùng với ít node)"""
+    dist = dict(nx.all_pairs_dijkstra_path_length(G))
+    if not odd:
+        return 0.0
+    first, rest = odd[0], odd[1:]
+    return min(dist[first][x] + _min_matching_cost(G, [y for y in rest if y != x]) for x in rest)
+
+def _cost(sg, edges):
+    return sum(sg.G[u][v]['weight'] for u, v in edges)
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_eulerized_circuit_is_valid(directed):
+    sg = _graph(directed)
+    result = eulerian.eulerian_circuit(sg.core, "p0")
+    assert result.added_edges
+    _assert_valid_circuit(sg, result, "p0")
+
+    steps = list(eulerian.find_eulerian_circuit(sg.core, "p0"))
+    assert [step.edges[0] for step in steps] == result.circuit
+
+def test_undirected_eulerize_cost_is_minimal():
+    sg = _graph(False, n=10, extra=6)
+    odd = [n for n, d in sg.G.degree() if d % 2]
+    assert 2 <= len(odd) <= 10
+    result = eulerian.eulerian_circuit(sg.core, "p0")
+    assert _cost(sg, result.added_edges) == pytest.approx(_min_matching_cost(sg.G, odd))
+
+def test_directed_eulerize_cost_is_minimal():
+    sg = _graph(True)
+    # Tham chiếu: luồng chi phí nhỏ nhất từ node thừa cung vào tới node thừa cung ra
+    H = nx.DiGraph()
+    for v in sg.G:
+        H.add_node(v, demand=sg.G.out_degree(v) - sg.G.in_degree(v))
+    H.add_edges_from((u, v, {'weight': int(d['weight'])}) for u, v, d in sg.G.edges(data=True))
+    result = eulerian.eulerian_circuit(sg.core, "p3")
+    assert _cost(sg, result.added_edges) == pytest.approx(nx.min_cost_flow_cost(H))
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_greedy_eulerize_still_gives_valid_circuit(monkeypatch, directed):
+    monkeypatch.setattr(eulerian, 'EXACT_MATCHING_LIMIT', 0)
+    sg = _graph(directed, n=60, extra=90)
+    _assert_valid_circuit(sg, eulerian.eulerian_circuit(sg.core, "p0"), "p0")
+
+def test_eulerian_graph_needs_no_extra_edges():
+    sg = _graph(False, extra=0)
+    result = eulerian.eulerian_circuit(sg.core, "p5")
+    assert result.added_edges == []
+    _assert_valid_circuit(sg, result, "p5")
+
+def test_disconnected_routes_raise():
+    sg = _graph(False, n=6, extra=0)
+    sg.add_planet("far1", 50.0, 0.0, 0.0)
+    sg.add_planet("far2", 51.0, 0.0, 0.0)
+    sg.add_route("far1", "far2", 1.0)
+    with pytest.raises(ValueError):
+        eulerian.eulerian_circuit(sg.core, "p0")
+    with pytest.raises(ValueError):
+        eulerian.eulerian_circuit(SpaceGraph().core)
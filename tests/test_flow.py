@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Module: test_flow.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra luồng cực đại với đầu vào suy biến
+
+import networkx as nx
+import pytest
+
+from algorithms import flow
+
+def _graph():
+    G = nx.DiGraph()
+    G.add_weighted_edges_from([('A', 'B', 3.0), ('B', 'C', 2.0), ('A', 'C', 1.0), ('C', 'A', 4.0)])
+    return G
+
+@pytest.mark.parametrize('method', sorted(flow.ENGINES))
+def test_source_equal_to_sink_is_rejected(method):
+    G = _graph()
+    with pytest.raises(ValueError, match="Source and sink"):
+        flow.max_flow(G, 'A', 'A', method)
+    with pytest.raises(ValueError, match="Source and sink"):
+        list(flow.flow_steps(G, 'A', 'A', method))
+
+@pytest.mark.parametrize('method', sorted(flow.ENGINES))
+def test_max_flow_value(method):
+    assert flow.max_flow(_graph(), 'A', 'C', method).value == pytest.approx(3.0)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Module: test_graph_base.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra SpaceGraph: đổi chế độ không copy, dời tọa độ / tính lại trọng số được vá tại chỗ trên lõi CSR
+
+import numpy as np
+import pytest
+
+from algorithms.graph_base import SpaceGraph
+from algorithms.graph_core import GraphCore
+
+def _graph(n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    sg = SpaceGraph()
+    for i in range(n):
+        sg.add_planet(f"p{i}", *rng.uniform(-10, 10, 3))
+    sg.connect_randomly(0.3, seed=seed)
+    return sg, rng
+
+def _assert_same_core(core, sg):
+    fresh = GraphCore.from_networkx(sg.G, sg.positions)
+    assert core.nodes == fresh.nodes
+    assert np.array_equal(core.indices, fresh.indices)
+    assert np.array_equal(core.weights, fresh.weights)
+    assert np.array_equal(core.positions, fresh.positions)
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_move_planets_with_reweight_patches_core(monkeypatch, directed):
+    sg, rng = _graph()
+    sg.set_directed(directed)
+    base = sg.core
+    builds = []
+    real = GraphCore.from_networkx.__func__
+    monkeypatch.setattr(GraphCore, 'from_networkx',
+                        classmethod(lambda cls, *a: builds.append(1) or real(cls, *a)))
+
+    for _ in range(3): # Nhiều lần kéo thanh epoch giữa hai lần đọc core
+        sg.move_planets({name: p + rng.normal(0, 0.5, 3) for name, p in sg.positions.items()}, reweight=True)
+    core = sg.core
+    assert not builds
+    assert core.indptr is base.indptr
+    monkeypatch.undo()
+    _assert_same_core(core, sg)
+
+def test_move_after_reweight_rebuilds_correctly():
+    sg, rng = _graph()
+    sg.core
+    sg.move_planets({'p0': np.zeros(3)}, reweight=True)
+    sg.move_planets({'p1': np.ones(3)}) # Trọng số giữ theo tọa độ cũ của p1
+    _assert_same_core(sg.core, sg)
+
+def _asymmetric_graph():
+    sg = SpaceGraph()
+    for name, p in (('A', (0, 0, 0)), ('B', (1, 0, 0)), ('C', (2, 0, 0))):
+        sg.add_planet(name, *p)
+    sg.set_directed(True)
+    sg.add_route('A', 'B', 1.0)
+    sg.add_route('B', 'A', 5.0)
+    sg.add_route('B', 'C', 2.0)
+    sg.add_route('C', 'B', 2.0)
+    return sg
+
+def _weight(core, u, v):
+    i, j = core.index[u], core.index[v]
+    row = slice(core.indptr[i], core.indptr[i + 1])
+    return float(core.weights[row][core.indices[row] == j][0])
+
+def test_undirected_view_uses_one_weight_per_route():
+    sg = _asymmetric_graph()
+    assert sg.asymmetric_routes() == 1
+    sg.set_directed(False)
+    core = sg.core
+    assert _weight(core, 'A', 'B') == _weight(core, 'B', 'A') == 1.0
+    assert np.array_equal(sg.get_sparse_adjacency()[1].toarray(), sg.get_sparse_adjacency()[1].toarray().T)
+
+    # Vá theo nhật ký (đổi trọng số một chiều trong chế độ có hướng) vẫn giữ trọng số chung
+    sg.set_directed(True)
+    sg.add_route('B', 'A', 0.5)
+    sg.set_directed(False)
+    patched = sg.core
+    assert patched.indptr is core.indptr
+    assert _weight(patched, 'A', 'B') == _weight(patched, 'B', 'A') == 0.5
+
+    # Directed giữ nguyên trọng số riêng từng chiều
+    sg.set_directed(True)
+    assert _weight(sg.core, 'A', 'B') == 1.0 and _weight(sg.core, 'B', 'A') == 0.5
+
+def test_positions_version_ignores_edge_changes():
+    sg, _ = _graph(n=6)
+    before = sg.positions_version
+    sg.add_route("p0", "p1", 3.0)
+    sg.add_route("p0", "p1", 4.0)
+    sg.connect_randomly(0.5, seed=1)
+    sg.set_directed(True)
+    assert sg.positions_version == before
+
+    sg.move_planets({"p0": (1.0, 2.0, 3.0)}, reweight=True)
+    assert sg.positions_version == before + 1
+    sg.add_planet("p0", 0.0, 0.0, 0.0)
+    sg.add_planet("extra", 0.0, 0.0, 0.0)
+    assert sg.positions_version == before + 3
+    sg.clear()
+    assert sg.positions_version == before + 4
+
+def test_mode_switch_keeps_store_and_cores(monkeypatch):
+    sg, _ = _graph()
+    undirected_view = sg.G
+    undirected = sg.core
+    sg.set_directed(True)
+    assert sg.G is sg._store
+    directed = sg.core
+    builds = []
+    real = GraphCore.from_networkx.__func__
+    monkeypatch.setattr(GraphCore, 'from_networkx',
+                        classmethod(lambda cls, *a: builds.append(1) or real(cls, *a)))
+
+    for _ in range(3): # Bật/tắt liên tục: không copy đồ thị, không dựng lại lõi
+        sg.set_directed(False)
+        assert sg.G is undirected_view and sg.core is undirected
+        sg.set_directed(True)
+        assert sg.core is directed
+    assert not builds
+
+def test_one_way_routes_survive_mode_switch():
+    sg = _asymmetric_graph()
+    sg.add_route('A', 'C', 7.0) # Chỉ có chiều A -> C
+    sg.set_directed(False)
+    assert sg.G.has_edge('C', 'A')
+    assert sg.G.number_of_edges() == 3
+    sg.set_directed(True)
+    assert not sg.G.has_edge('C', 'A')
+    assert sg.G['A']['B']['weight'] == 1.0 and sg.G['B']['A']['weight'] == 5.0
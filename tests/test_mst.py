@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Module: test_mst.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra lõi MST (union-find mảng, Prim heap có chỉ mục) so với networkx
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from algorithms import mst
+from algorithms.graph_base import SpaceGraph
+
+METHODS = ['prim', 'kruskal', 'scipy']
+
+def _graph(n=60, probability=0.1, seed=0):
+    rng = np.random.default_rng(seed)
+    sg = SpaceGraph()
+    for i in range(n):
+        sg.add_planet(f"p{i}", *rng.uniform(-10, 10, 3))
+    sg.connect_randomly(probability, seed=seed)
+    return sg
+
+@pytest.mark.parametrize('method', METHODS)
+def test_empty_graph_gives_empty_tree(method):
+    assert mst.minimum_spanning_tree(SpaceGraph().core, method) == mst.MSTResult([], 0, 0)
+
+def test_prim_steps_on_empty_graph():
+    assert list(mst.prim_algorithm(SpaceGraph().core)) == []
+
+@pytest.mark.parametrize('method', METHODS)
+@pytest.mark.parametrize('probability', [0.02, 0.15])
+def test_forest_matches_networkx(method, probability):
+    sg = _graph(probability=probability)
+    result = mst.minimum_spanning_tree(sg.core, method)
+    forest = nx.minimum_spanning_tree(sg.G.to_undirected())
+    assert result.total_weight == pytest.approx(forest.size(weight='weight'))
+    assert result.components == nx.number_connected_components(sg.G.to_undirected())
+    assert len(result.edges) == sg.G.number_of_nodes() - result.components
+    # Các cạnh chọn ra phải tạo rừng (không chu trình) trên đồ thị gốc
+    chosen = nx.Graph(result.edges)
+    assert nx.is_forest(chosen) and all(sg.G.has_edge(u, v) for u, v in result.edges)
+
+def test_union_find_tracks_components():
+    uf = mst.UnionFind(6)
+    assert uf.union(0, 1) and uf.union(2, 3) and uf.union(1, 3)
+    assert not uf.union(0, 2)
+    assert uf.components == 3
+    assert uf.find(0) == uf.find(3) != uf.find(4)
+
+def test_indexed_heap_decrease_key_keeps_one_entry():
+    heap = mst.IndexedHeap(5)
+    for item, key in [(0, 5.0), (1, 3.0), (2, 4.0)]:
+        heap.push_or_decrease(item, key)
+    assert heap.push_or_decrease(0, 1.0)
+    assert not heap.push_or_decrease(2, 9.0)
+    assert len(heap) == 3
+    assert [heap.pop() for _ in range(3)] == [(1.0, 0), (3.0, 1), (4.0, 2)]
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Module: test_oracle.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra Distance Oracle: cập nhật tăng dần (thêm cạnh / giảm trọng số) khớp với dựng lại từ đầu
+
+import numpy as np
+import pytest
+from scipy.sparse.csgraph import dijkstra
+
+from algorithms.graph_base import SpaceGraph
+from algorithms.oracle import DistanceOracle
+
+def _graph(directed, n=60, seed=6):
+    rng = np.random.default_rng(seed)
+    sg = SpaceGraph()
+    sg.set_directed(directed)
+    for i in range(n):
+        sg.add_planet(f"p{i}", *rng.uniform(-10, 10, 3))
+    for u, v in rng.integers(0, n, (2 * n, 2)).tolist():
+        if u != v:
+            sg.add_route(f"p{u}", f"p{v}", float(rng.uniform(5, 20)))
+    return sg, rng
+
+def _changes(sg, rng, count):
+    """Vài thay đổi chỉ làm khoảng cách giảm: thêm tuyến mới hoặc giảm trọng số tuyến có sẵn"""
+    names = list(sg.G.nodes())
+    existing = list(sg.G.edges(data='weight'))
+    for _ in range(count):
+        if rng.random() < 0.5:
+            u, v, w = existing[int(rng.integers(len(existing)))]
+            sg.add_route(u, v, w * rng.uniform(0.1, 0.9))
+        else:
+            u, v = rng.choice(names, 2, replace=False).tolist()
+            if not sg.G.has_edge(u, v):
+                sg.add_route(u, v, float(rng.uniform(0.5, 20)))
+
+def _assert_path_consistent(sg, oracle, u, v):
+    result = oracle.path(u, v)
+    if np.isinf(result.distance):
+        assert result.path == []
+        return
+    assert result.path[0] == u and result.path[-1] == v
+    length = sum(sg.G[a][b]['weight'] for a, b in zip(result.path, result.path[1:]))
+    assert length == pytest.approx(result.distance)
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_apsp_incremental_matches_rebuild(directed):
+    sg, rng = _graph(directed)
+    oracle = DistanceOracle(sg, mode='apsp')
+    names = list(sg.G.nodes())
+    for _ in range(15):
+        _changes(sg, rng, 3)
+        oracle.refresh()
+        fresh = DistanceOracle(sg, mode='apsp')
+        assert np.allclose(oracle.dist, fresh.dist)
+        for u, v in rng.choice(names, (5, 2)).tolist():
+            _assert_path_consistent(sg, oracle, u, v)
+    assert oracle.rebuilds == 1  # Mọi lần đồng bộ đều đi đường tăng dần
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_landmark_incremental_matches_rebuild(directed):
+    sg, rng = _graph(directed)
+    oracle = DistanceOracle(sg, mode='landmarks', n_landmarks=6)
+    names = list(sg.G.nodes())
+    for _ in range(15):
+        _changes(sg, rng, 3)
+        oracle.refresh()
+        csr = sg.core.to_scipy()
+        assert np.allclose(oracle.from_lm, dijkstra(csr, directed=True, indices=oracle.landmarks))
+        assert np.allclose(oracle.to_lm, dijkstra(csr.T.tocsr(), directed=True, indices=oracle.landmarks))
+        fresh = DistanceOracle(sg, mode='apsp')
+        for u, v in rng.choice(names, (5, 2)).tolist():
+            assert oracle.distance(u, v) == pytest.approx(fresh.distance(u, v))
+            assert oracle.lower_bound(u, v) <= fresh.distance(u, v) + 1e-9
+    assert oracle.rebuilds == 1
+
+def test_weight_increase_triggers_rebuild():
+    sg, _ = _graph(False)
+    oracle = DistanceOracle(sg, mode='apsp')
+    u, v, w = next(iter(sg.G.edges(data='weight')))
+    sg.add_route(u, v, w * 3)
+    assert oracle.distance(u, v) == pytest.approx(DistanceOracle(sg, mode='apsp').distance(u, v))
+    assert oracle.rebuilds == 2
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Module: test_trace.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra bản ghi animation: seek qua keyframe và lưu / đọc lại file .npz
+
+import numpy as np
+import pytest
+
+from algorithms import shortest_path
+from algorithms.graph_base import SpaceGraph
+from algorithms.steps import Step, StepState
+from algorithms.trace import KEYFRAME_MIN_STEPS, record
+from utils.file_io import load_trace_from_npz, save_trace_to_npz
+
+def _random_steps(n_steps=3 * KEYFRAME_MIN_STEPS + 50, n_nodes=40, seed=5):
+    """Chuỗi Step ngẫu nhiên có thêm / gỡ cạnh và thỉnh thoảng xóa hết (tên node có dấu)"""
+    rng = np.random.default_rng(seed)
+    names = [f"Trạm {i}" for i in range(n_nodes)]
+    lit = {}
+    steps = []
+    for i in range(n_steps):
+        clear = i % 300 == 299
+        if clear:
+            lit.clear()
+        removed = tuple(e for e in list(lit)[:int(rng.integers(0, 3))])
+        for e in removed:
+            del lit[e]
+        added = []
+        for u, v in rng.integers(0, n_nodes, (int(rng.integers(0, 4)), 2)).tolist():
+            e = (names[u], names[v])
+            if e not in lit and e not in added:
+                added.append(e)
+        lit.update(dict.fromkeys(added, True))
+        current = names[int(rng.integers(n_nodes))] if i % 7 else None
+        steps.append(Step(current, tuple({n for e in added for n in e}), tuple(added), removed, clear))
+    return steps
+
+def _states(steps):
+    """Trạng thái sau k bước đầu, với mọi k"""
+    state, out = StepState(), [StepState()]
+    for step in steps:
+        state.apply(step)
+        snap = StepState()
+        snap.current, snap.visited, snap.edges, snap.steps = \
+            state.current, dict(state.visited), dict(state.edges), state.steps
+        out.append(snap)
+    return out
+
+def _assert_same_state(got, want):
+    assert got.steps == want.steps
+    assert got.current == want.current
+    assert list(got.visited) == list(want.visited)
+    assert set(got.edges) == set(want.edges)
+
+@pytest.fixture
+def steps():
+    return _random_steps()
+
+def test_seek_matches_sequential_replay(steps):
+    trace = record(steps, "random")
+    assert len(trace.arrays['kf_steps']) > 0  # Đủ dài để có keyframe
+    states = _states(steps)
+    for k in [0, 1, 2, KEYFRAME_MIN_STEPS - 1, KEYFRAME_MIN_STEPS, KEYFRAME_MIN_STEPS + 1, 299, 300, 301,
+              len(steps) - 1, len(steps)]:
+        _assert_same_state(trace.seek(k), states[k])
+
+def test_npz_round_trip(tmp_path, steps):
+    trace = record(steps, "Dijkstra: Trạm 0 → Trạm 9")
+    path = tmp_path / "trace.npz"
+    ok, _ = save_trace_to_npz(trace, str(path))
+    assert ok
+    ok, loaded = load_trace_from_npz(str(path))
+    assert ok
+    assert loaded.label == trace.label and loaded.names == trace.names
+    assert loaded.n_steps == len(steps)
+    assert list(loaded.steps()) == steps
+    states = _states(steps)
+    for k in range(0, len(steps) + 1, 37):
+        _assert_same_state(loaded.seek(k), states[k])
+
+def test_algorithm_trace_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    sg = SpaceGraph()
+    for i in range(50):
+        sg.add_planet(f"p{i}", *rng.uniform(-10, 10, 3))
+    sg.connect_randomly(0.1, seed=0)
+    steps = list(shortest_path.dijkstra_algorithm(sg.core, "p0", "p49"))
+    path = tmp_path / "dijkstra.npz"
+    assert save_trace_to_npz(record(steps, "Dijkstra"), str(path))[0]
+    ok, loaded = load_trace_from_npz(str(path))
+    assert ok and list(loaded.steps()) == steps
+
+def test_loading_a_missing_file_fails_cleanly(tmp_path):
+    assert load_trace_from_npz(str(tmp_path / "missing.npz")) == (False, None)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Module: test_traversal.py
+# Project: solar-system-graph
+# Chức năng: Kiểm tra BFS theo tầng (vector hóa) và DFS lặp so với bản tuần tự kinh điển
+
+from collections import deque
+
+import numpy as np
+import pytest
+
+from algorithms import traversal
+from algorithms.graph_base import SpaceGraph
+from algorithms.steps import StepState
+
+def _graph(directed, n=120, probability=0.03, seed=2):
+    rng = np.random.default_rng(seed)
+    sg = SpaceGraph()
+    for i in range(n):
+        sg.add_planet(f"p{i}", *rng.uniform(-10, 10, 3))
+    sg.connect_randomly(probability, seed=seed)
+    sg.set_directed(directed)
+    if directed:
+        # Thêm các tuyến một chiều: đồ thị có hướng khác hẳn view vô hướng
+        for u, v in rng.integers(0, n, (n // 2, 2)):
+            sg.add_route(f"p{u}", f"p{v}", 1.0)
+    return sg.core
+
+def _neighbors(core, u):
+    """Hàng xóm theo thứ tự tên (như các thuật toán duyệt)"""
+    names = core.nodes
+    return sorted(set(core.neighbors(u).tolist()), key=names.__getitem__)
+
+def _sequential_bfs(core, sources):
+    names = core.nodes
+    ids = list(dict.fromkeys(core.id_of(s) for s in sources))
+    parents, hops = {}, {names[i]: 0 for i in ids}
+    order, queue = [], deque(ids)
+    while queue:
+        u = queue.popleft()
+        order.append(names[u])
+        for v in _neighbors(core, u):
+            if names[v] not in hops:
+                hops[names[v]] = hops[names[u]] + 1
+                parents[names[v]] = names[u]
+                queue.append(v)
+    return order, parents, hops
+
+def _recursive_dfs(core, start):
+    names = core.nodes
+    order, parents, seen = [], {}, set()
+
+    def visit(u):
+        seen.add(u)
+        order.append(names[u])
+        for v in _neighbors(core, u):
+            if v not in seen:
+                parents[names[v]] = names[u]
+                visit(v)
+
+    visit(core.id_of(start))
+    return order, parents
+
+@pytest.mark.parametrize('directed', [False, True])
+@pytest.mark.parametrize('sources', [["p0"], ["p5", "p17", "p5", "p90"]])
+def test_level_synchronous_bfs_matches_sequential(directed, sources):
+    core = _graph(directed)
+    order, parents, hops = _sequential_bfs(core, sources)
+    result = traversal.bfs_order(core, sources)
+    assert result.order == order
+    assert result.parents == parents
+    assert result.hops == hops
+
+    dist, parent = traversal.bfs_arrays(core, sources)
+    assert {core.nodes[i]: d for i, d in enumerate(dist.tolist()) if d >= 0} == hops
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_bfs_steps_cover_one_level_each(directed):
+    core = _graph(directed)
+    order, parents, hops = _sequential_bfs(core, ["p0"])
+    steps = list(traversal.bfs_traversal(core, "p0"))
+    assert [n for step in steps for n in step.nodes] == order
+    for level, step in enumerate(steps):
+        assert {hops[n] for n in step.nodes} == {level}
+    state = StepState()
+    for step in steps:
+        state.apply(step)
+    assert set(state.edges) == {(p, n) for n, p in parents.items()}
+
+@pytest.mark.parametrize('directed', [False, True])
+def test_iterative_dfs_matches_recursive(directed):
+    core = _graph(directed, probability=0.05)
+    order, parents = _recursive_dfs(core, "p3")
+    result = traversal.dfs_order(core, "p3")
+    assert result.order == order
+    assert result.parents == parents
+    assert [step.current for step in traversal.dfs_traversal(core, "p3")] == order
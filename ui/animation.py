@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# Module: animation.py
+# Project: solar-system-graph
+# Chức năng: Chạy thuật toán trên luồng riêng (hàng đợi bước có giới hạn) và lập lịch animation
+#            tách nhịp bước thuật toán khỏi nhịp vẽ (gộp nhiều bước mỗi frame)
+
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+from PyQt6.QtCore import QObject, QThread, QTimer, Qt, pyqtSignal
+
+from algorithms.steps import StepState, merge_steps
+from algorithms.trace import TraceRecorder
+
+TARGET_FPS = 30          # Số frame / giây mong muốn
+TARGET_DURATION = 20.0   # Giây cho cả lần chạy ở tốc độ 1× (đồ thị lớn)
+BASE_STEP_RATE = 1000 / 150  # Bước / giây tối thiểu ở 1× (nhịp cũ 150ms/bước cho đồ thị nhỏ)
+MAX_LAG = 0.25           # Giây: số bước "nợ" tối đa khi frame chậm (tránh dồn cả cục sau khi bị treo)
+STEP_QUEUE_SIZE = 4096   # Số bước tối đa chờ trong hàng đợi (worker dừng lại khi đầy)
+
+# Một lần chạy đang chờ: make_steps() trả về generator Step, được gọi trên luồng worker
+AnimationRun = namedtuple('AnimationRun', ['label', 'make_steps', 'expected'])
+
+_DONE = object() # Phần tử cuối hàng đợi khi generator chạy hết
+
+class StepWorker(QThread):
+    """
+    Chạy generator thuật toán (kể cả phần chuẩn bị nặng như Eulerize) trên luồng riêng,
+    đẩy từng Step vào hàng đợi có giới hạn: hàng đợi đầy thì worker chờ (backpressure).
+    Mọi Step đồng thời được ghi vào trace (StepTrace có sẵn trước khi phần tử cuối được đẩy vào hàng đợi).
+    Kết thúc bằng _DONE hoặc đối tượng Exception. Hủy bằng cancel(): worker dừng ở bước kế tiếp.
+    """
+
+    def __init__(self, make_steps, label="", maxsize=STEP_QUEUE_SIZE):
+        super().__init__()
+        self.make_steps = make_steps
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.recorder = TraceRecorder(label)
+        self.trace = None
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        try:
+            for step in self.make_steps():
+                self.recorder.record(step)
+                if not self._put(step):
+                    return
+            end = _DONE
+        except Exception as e:
+            end = e
+        self.trace = self.recorder.finish()
+        self._put(end)
+
+    def _put(self, item):
+        """Đẩy vào hàng đợi, chờ khi đầy nhưng vẫn kiểm tra hủy. Trả về False nếu đã bị hủy."""
+        while not self._cancelled.is_set():
+            try:
+                self.queue.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+class AnimationScheduler(QObject):
+    """
+    Lập lịch animation cho các lần chạy (AnimationRun) nối tiếp nhau.
+    - Mỗi lần chạy có một StepWorker; luồng GUI chỉ lấy Step ra khỏi hàng đợi theo nhịp của nó.
+    - Nhịp bước (bước / giây) chọn sao cho ~expected bước chạy hết trong TARGET_DURATION, nhân với speed.
+    - Nhịp frame đo theo chi phí vẽ thực tế: frame chậm thì giãn chu kỳ timer,
+      mỗi frame gộp nhiều bước hơn (merge_steps) nên tổng thời lượng không đổi.
+    - Frame trung gian bị bỏ qua không làm sai trạng thái: mọi bước vẫn được áp vào `state`,
+      canvas nhận một Step đã gộp tương đương.
+    """
+    started = pyqtSignal(str)       # Nhãn của lần chạy vừa bắt đầu
+    frame = pyqtSignal(object)      # Step đã gộp của frame này
+    finished = pyqtSignal(int)      # Tổng số bước
+    failed = pyqtSignal(str)        # Lỗi khi chạy generator
+
+    def __init__(self, fps=TARGET_FPS, duration=TARGET_DURATION, parent=None):
+        super().__init__(parent)
+        self.fps = fps
+        self.duration = duration
+        self.speed = 1.0
+        self.state = StepState()
+        self.frames = 0
+        self.render_cost = 0.0  # Giây / frame (trung bình trượt: xử lý + phần vẽ trễ trong event loop)
+        self.pending = deque()  # Các AnimationRun đang xếp hàng
+        self.worker = None
+        self.trace = None       # StepTrace của lần chạy vừa kết thúc (kể cả khi lỗi giữa chừng)
+        self._retired = set()   # Worker đã hủy nhưng chưa thoát hẳn (giữ tham chiếu tới khi xong)
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self._tick)
+
+    @property
+    def running(self):
+        return self.worker is not None
+
+    @property
+    def busy(self):
+        """Đang chạy hoặc còn lần chạy xếp hàng"""
+        return self.running or bool(self.pending)
+
+    def submit(self, label, make_steps, expected=None):
+        """
+        Xếp một lần chạy vào hàng; rảnh thì chạy ngay.
+        expected: ước lượng số bước (vd. số node), tự tăng nếu chạy vượt.
+        Trả về số lần chạy đang chờ phía trước (0 = bắt đầu ngay).
+        """
+        self.pending.append(AnimationRun(label, make_steps, expected))
+        if self.running:
+            return len(self.pending)
+        self._start_next()
+        return 0
+
+    def _start_next(self):
+        if not self.pending:
+            return
+        run = self.pending.popleft()
+        self.state = StepState()
+        self.frames = 0
+        self.expected = max(run.expected or 0, 1)
+        self.render_cost = 0.0
+        self._credit = 1.0  # Bước đầu hiện ngay ở frame đầu tiên
+        self._work = 0.0
+        self._skip = False
+        self._held = None   # Delta chưa vẽ (khi bỏ qua tới cuối)
+        self._end = None
+        self._last = time.perf_counter()
+
+        self.worker = StepWorker(run.make_steps, run.label)
+        self.started.emit(run.label)
+        self.worker.start()
+        self.timer.start(self._interval_ms())
+
+    def cancel(self):
+        """Hủy lần chạy hiện tại và mọi lần đang chờ; có hiệu lực ngay với GUI"""
+        self.pending.clear()
+        self._stop()
+
+    def _stop(self):
+        self.timer.stop()
+        worker, self.worker = self.worker, None
+        if worker is None:
+            return
+        worker.cancel()
+        if worker.isRunning():
+            self._retired.add(worker)
+            worker.finished.connect(lambda: self._retired.discard(worker))
+
+    def set_speed(self, speed):
+        """Đổi hệ số tốc độ (áp dụng ngay cả khi đang chạy)"""
+        self.speed = speed
+
+    def skip_to_end(self):
+        """Không vẽ các frame trung gian nữa: lấy hết các bước còn lại, vẽ trạng thái cuối một lần"""
+        if self.running:
+            self._skip = True
+            self._tick()
+
+    # =========================================================================
+    #  NHỊP
+    # =========================================================================
+
+    def step_rate(self):
+        """Số bước / giây ở tốc độ hiện tại"""
+        expected = max(self.expected, self.state.steps * 1.25)
+        return max(BASE_STEP_RATE, expected / self.duration) * self.speed
+
+    def _interval_ms(self):
+        return int(max(1000.0 / self.fps, self.render_cost * 1000.0))
+
+    def _tick(self):
+        if not self.running:
+            return
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        # Thời gian event loop bận ngoài tick (vd. draw_idle của 3D) cũng là chi phí vẽ
+        busy = max(0.0, elapsed - max(self.timer.interval() / 1000.0, self._work))
+
+        if self._skip:
+            self._advance(None)
+            return
+
+        rate = self.step_rate()
+        self._credit = min(self._credit + elapsed * rate, max(1.0, rate * MAX_LAG))
+        n = int(self._credit)
+        if n == 0:
+            self._work = 0.0
+            return
+        state = self.state
+        before = state.steps
+        drawn = self._advance(n)
+        if self.state is not state:
+            return # Lần chạy đã kết thúc (có thể đã sang lần chạy kế tiếp)
+        self._credit -= state.steps - before # Hàng đợi cạn (worker chậm) thì giữ lại phần chưa dùng
+        if drawn:
+            self._work = time.perf_counter() - now
+            cost = self._work + busy
+            self.render_cost = cost if self.frames <= 1 else 0.8 * self.render_cost + 0.2 * cost
+        if self.running:
+            self.timer.setInterval(self._interval_ms())
+
+    def _pull(self, n):
+        """Lấy tối đa n bước đang có trong hàng đợi (None = tất cả), không chờ worker"""
+        q = self.worker.queue
+        taken = 0
+        while n is None or taken < n:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                return
+            if item is _DONE or isinstance(item, BaseException):
+                self._end = item
+                return
+            self.state.apply(item)
+            taken += 1
+            yield item
+
+    def _advance(self, n):
+        """Gộp các bước lấy được thành một frame (hoặc giữ lại khi đang bỏ qua). Trả về True nếu đã vẽ."""
+        merged = merge_steps(self._pull(n))
+        if self._held is not None:
+            # Lần lấy cuối có thể chỉ gồm phần tử kết thúc: vẫn phải vẽ delta đang giữ
+            merged = self._held if merged is None else merge_steps((self._held, merged))
+        drawn = False
+        if merged is not None:
+            if self._skip and self._end is None:
+                self._held = merged
+            else:
+                self._held = None
+                self.frames += 1
+                self.frame.emit(merged)
+                drawn = True
+                if not self.running:
+                    return drawn # Bị hủy trong lúc vẽ
+
+        end = self._end
+        if end is not None:
+            self.trace = self.worker.trace
+            self._stop()
+            if isinstance(end, BaseException):
+                self.failed.emit(str(end))
+            else:
+                self.finished.emit(self.state.steps)
+            self._start_next()
+        return drawn
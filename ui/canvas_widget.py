@@ -3,16 +3,76 @@
 # Project: solar-system-graph
 # Chức năng: Widget hiển thị đồ thị hỗ trợ chuyển đổi linh hoạt 2D/3D và Smart Scaling
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QCheckBox, QHBoxLayout, QRadioButton, QButtonGroup, QLabel
+from time import perf_counter
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QCheckBox, QHBoxLayout, QRadioButton, QButtonGroup, QLabel, QComboBox
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
 from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from mpl_toolkits.mplot3d.art3d import Line3D, Line3DCollection
 import matplotlib.pyplot as plt
 import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import minimum_spanning_tree
 
 # Cấu hình Style tối
 plt.style.use('dark_background')
 
+# Màu cạnh / node
+EDGE_COLOR = '#34495e'
+PATH_COLOR = '#f1c40f'
+NODE_COLOR = '#3498db'
+SUN_COLOR = '#e67e22'
+HIGHLIGHT_COLOR = '#e74c3c'
+
+# =========================================================================
+#  SMART SCALE: phép co giãn tọa độ hiển thị, áp dụng một lần cho cả ma trận (N, 3)
+# =========================================================================
+
+def _radial(P, scaled_length):
+    """Giữ hướng, thay độ dài |p| bằng scaled_length(|p|); điểm ở gốc giữ nguyên"""
+    r = np.linalg.norm(P, axis=1, keepdims=True)
+    safe = np.where(r > 0, r, 1.0)
+    return np.where(r > 0, P / safe * scaled_length(safe), P)
+
+def power_scale(P, power=0.45, gain=6.0):
+    """|p| -> gain * |p|^power (mặc định cũ, nén quỹ đạo ngoài)"""
+    return _radial(P, lambda r: gain * r ** power)
+
+def log_scale(P, gain=6.0):
+    """|p| -> gain * log(1 + |p|)"""
+    return _radial(P, lambda r: gain * np.log1p(r))
+
+def linear_scale(P):
+    """Tọa độ thật"""
+    return P
+
+# Thêm phép chiếu mới: chỉ cần đăng ký một hàm (N, 3) -> (N, 3) vào đây
+SCALE_TRANSFORMS = {
+    'Power': power_scale,
+    'Log': log_scale,
+    'Linear': linear_scale,
+}
+
+# Số kết quả biến đổi được giữ lại (theo phiên bản vị trí, phép chiếu, 2D/3D)
+DISPLAY_CACHE_SIZE = 8
+
+# =========================================================================
+#  LEVEL OF DETAIL: ngân sách cho lớp nền khi danh mục lớn
+# =========================================================================
+
+LABEL_BUDGET = 60       # Số nhãn tối đa trong khung nhìn
+LABEL_GRID = 12         # Mỗi ô lưới (LABEL_GRID x LABEL_GRID trên khung nhìn) tối đa một nhãn
+EDGE_BUDGET = 4000      # Số cạnh nền tối đa: cây khung + mẫu ngẫu nhiên phần còn lại
+NODE_BUDGET = 1500      # Quá ngưỡng này trong khung nhìn thì gộp node thành sprite mật độ
+SPRITE_GRID = 40        # Độ phân giải lưới gộp node
+LOD_TIME_BUDGET = 0.03  # Giây cho mỗi lần đánh giá lại LOD (phần còn lại để frame sau)
+LOD_DELAY_MS = 40       # Gom các lần zoom/pan liên tiếp thành một lần đánh giá
+
 class GraphWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -47,7 +107,8 @@ class GraphWidget(QWidget):
         self.mode_group = QButtonGroup(self)
         self.mode_group.addButton(self.radio_3d)
         self.mode_group.addButton(self.radio_2d)
-        self.mode_group.buttonToggled.connect(self.refresh_view)
+        # buttonToggled phát 2 lần mỗi lần đổi (nút tắt + nút bật): chỉ vẽ lại theo nút được bật
+        self.mode_group.buttonToggled.connect(lambda button, checked: checked and self.refresh_view())
 
         # 3. Controls: Smart Scaling
         self.chk_log_scale = QCheckBox("Smart Scale")
@@ -55,12 +116,18 @@ class GraphWidget(QWidget):
         self.chk_log_scale.setStyleSheet("color: #f1c40f; font-weight: bold; margin-left: 15px;")
         self.chk_log_scale.toggled.connect(self.refresh_view)
 
+        self.combo_scale = QComboBox()
+        self.combo_scale.addItems([name for name in SCALE_TRANSFORMS if name != 'Linear'])
+        self.combo_scale.currentTextChanged.connect(self.refresh_view)
+        self.chk_log_scale.toggled.connect(self.combo_scale.setEnabled)
+
         # Add to layout
         tool_layout.addWidget(self.toolbar)
         tool_layout.addWidget(lbl_mode)
         tool_layout.addWidget(self.radio_3d)
         tool_layout.addWidget(self.radio_2d)
         tool_layout.addWidget(self.chk_log_scale)
+        tool_layout.addWidget(self.combo_scale)
         
         layout.addLayout(tool_layout)
         layout.addWidget(self.canvas)
@@ -68,44 +135,113 @@ class GraphWidget(QWidget):
         # Cache dữ liệu
         self.cached_G = None
         self.cached_pos = None
-        self.cached_path = None
-        self.cached_highlight = None
+        self.cached_version = None
+        self.cached_positions_version = None
         self.axes = None
 
-    def _transform_coords(self, pos_3d):
-        """Co giãn không gian để dễ nhìn"""
-        if not self.chk_log_scale.isChecked():
-            return pos_3d
+        # Cảnh đã dựng (artist dùng lại giữa các frame) + nền cho blitting 2D
+        self.scene = None
+        self._background = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
 
-        new_pos = {}
-        POWER_FACTOR = 0.45 # Căn chỉnh lại một chút cho 2D đẹp hơn
-        
-        for node, coord in pos_3d.items():
-            arr = np.array(coord)
-            dist = np.linalg.norm(arr)
-            if dist == 0: 
-                new_pos[node] = arr
-            else:
-                scale_len = dist ** POWER_FACTOR
-                new_pos[node] = (arr / dist) * (scale_len * 6)
-        return new_pos
+        # Tọa độ hiển thị đã biến đổi: {(positions_version, phép chiếu, is_2d): ma trận}
+        self._display_cache = {}
+
+        # Zoom/pan (NavigationToolbar) -> đánh giá lại LOD sau một khoảng trễ ngắn
+        self._lod_timer = QTimer(self)
+        self._lod_timer.setSingleShot(True)
+        self._lod_timer.setInterval(LOD_DELAY_MS)
+        self._lod_timer.timeout.connect(self._run_lod)
+
+    def scale_mode(self):
+        """Tên phép chiếu đang chọn (Smart Scale tắt -> Linear)"""
+        return self.combo_scale.currentText() if self.chk_log_scale.isChecked() else 'Linear'
+
+    def _display_coords(self, nodes, pos_3d, positions_version, is_2d):
+        """
+        Co giãn không gian để dễ nhìn: ma trận (N, 2|3) theo thứ tự `nodes`.
+        Cache theo (phiên bản tọa độ, phép chiếu, 2D/3D) nên các frame animation,
+        việc thêm/đổi cạnh và bật/tắt lại chế độ cũ không tính lại.
+        """
+        mode = self.scale_mode()
+        key = (positions_version, mode, is_2d)
+        cache = self._display_cache
+        if positions_version is not None and key in cache:
+            return cache[key]
+
+        P = np.array([pos_3d[n] for n in nodes], dtype=float).reshape(-1, 3)
+        display = SCALE_TRANSFORMS[mode](P)
+        if is_2d:
+            display = display[:, :2]
+        display.setflags(write=False)
+
+        if positions_version is not None:
+            if len(cache) >= DISPLAY_CACHE_SIZE:
+                cache.pop(next(iter(cache)))
+            cache[key] = display
+        return display
 
     def refresh_view(self):
-        """Vẽ lại khi thay đổi cấu hình"""
+        """Vẽ lại khi thay đổi cấu hình (giữ nguyên phần đang highlight)"""
         if self.cached_G:
-            self.plot_graph(self.cached_G, self.cached_pos, self.cached_path, self.cached_highlight)
+            scene = self.scene
+            self.plot_graph(self.cached_G, self.cached_pos,
+                            set(scene.path_edges) if scene else None,
+                            set(scene.highlighted) if scene else None,
+                            scene.overlay if scene else None,
+                            version=self.cached_version,
+                            positions_version=self.cached_positions_version)
 
-    def plot_graph(self, G, pos_3d, path_edges=None, highlighted_nodes=None):
+    # =========================================================================
+    #  VẼ: dựng cảnh một lần cho mỗi phiên bản đồ thị, sau đó chỉ cập nhật màu/độ dày
+    # =========================================================================
+
+    def plot_graph(self, G, pos_3d, path_edges=None, highlighted_nodes=None, overlay_edges=None,
+                   version=None, positions_version=None):
+        """
+        Vẽ đồ thị với phần highlight cho trước (trạng thái đầy đủ).
+        - version: phiên bản đồ thị (SpaceGraph.version). Cùng phiên bản + cùng chế độ xem thì
+          các artist được dùng lại, chỉ cạnh/node đổi trạng thái mới được cập nhật.
+          None -> luôn dựng lại.
+        - positions_version: phiên bản tọa độ (SpaceGraph.positions_version), khóa cache tọa độ
+          hiển thị: thêm/đổi cạnh không làm tính lại phép chiếu. None -> không cache.
+        - overlay_edges: các cặp (u, v) không nhất thiết là cạnh của G (vd. cây Gomory-Hu),
+          vẽ nét đứt phía trên đồ thị.
+        """
         self.cached_G = G
         self.cached_pos = pos_3d
-        self.cached_path = path_edges
-        self.cached_highlight = highlighted_nodes
+        self.cached_version = version
+        self.cached_positions_version = positions_version
 
+        is_2d = self.radio_2d.isChecked()
+        key = (id(G), version if version is not None else object(), is_2d, self.scale_mode())
+        if self.scene is None or self.scene.key != key:
+            self._build_scene(G, pos_3d, key, is_2d)
+
+        scene = self.scene
+        scene.set_edges(set(path_edges) if path_edges else set())
+        scene.set_nodes(set(highlighted_nodes) if highlighted_nodes else set())
+        full = scene.set_overlay(overlay_edges)
+        self._present(full)
+
+    def apply_step(self, step):
+        """
+        Cập nhật theo một Step (delta) trên cảnh hiện tại: chi phí tỉ lệ với phần thay đổi.
+        Gọi plot_graph trước để dựng cảnh / xóa highlight cũ.
+        """
+        scene = self.scene
+        if scene is None:
+            return
+        removed = list(scene.path_edges) if step.clear_edges else list(step.removed)
+        scene.update_edges(step.edges, removed)
+        scene.update_nodes(step.nodes)
+        self._present()
+
+    def _build_scene(self, G, pos_3d, key, is_2d):
         # Reset Figure để đổi Projection (2D <-> 3D)
         self.fig.clear()
-        
-        is_2d = self.radio_2d.isChecked()
-        
+        self._background = None
+
         if is_2d:
             self.axes = self.fig.add_subplot(111) # 2D Plot
             self.axes.set_facecolor('#0b0f19')
@@ -118,68 +254,446 @@ class GraphWidget(QWidget):
             self.axes.yaxis.set_pane_color((0,0,0,0))
             self.axes.zaxis.set_pane_color((0,0,0,0))
 
-        ax = self.axes
-        display_pos = self._transform_coords(pos_3d)
-
-        # --- VẼ ---
-        # 1. Edges
-        for u, v in G.edges():
-            p1 = display_pos[u]
-            p2 = display_pos[v]
-            
-            # Màu sắc cạnh
-            color = '#34495e'
-            width = 1.0 if is_2d else 0.8
-            alpha = 0.5
-            
-            # Highlight đường đi
-            if path_edges and ((u, v) in path_edges or (v, u) in path_edges):
-                color = '#f1c40f' 
-                width = 3.0
-                alpha = 1.0
-            
-            if is_2d:
-                ax.plot([p1[0], p2[0]], [p1[1], p2[1]], color=color, linewidth=width, alpha=alpha)
-            else:
-                ax.plot([p1[0], p2[0]], [p1[1], p2[1]], [p1[2], p2[2]], 
-                        color=color, linewidth=width, alpha=alpha)
+        if not is_2d:
+            # Vẽ theo zorder (nền -> highlight) thay vì sắp theo độ sâu giữa các collection
+            self.axes.computed_zorder = False
 
-        # 2. Nodes
-        xs = [display_pos[n][0] for n in G.nodes()]
-        ys = [display_pos[n][1] for n in G.nodes()]
-        zs = [display_pos[n][2] for n in G.nodes()] if not is_2d else None
-        
-        colors = []
-        sizes = []
-        for n in G.nodes():
-            s = 60 if is_2d else 40 # 2D thì vẽ to hơn chút
-            c = '#3498db'
-            if n == 'Sun': 
-                c = '#e67e22'; s = 120
-            elif highlighted_nodes and n in highlighted_nodes:
-                c = '#e74c3c'; s = 80
-            colors.append(c)
-            sizes.append(s)
-
-        if is_2d:
-            ax.scatter(xs, ys, s=sizes, c=colors, edgecolors='white', alpha=1.0, zorder=5)
-        else:
-            ax.scatter(xs, ys, zs, s=sizes, c=colors, edgecolors='white', alpha=1.0)
-
-        # 3. Labels
-        for node, p in display_pos.items():
-            if node in G.nodes():
-                if is_2d:
-                    ax.text(p[0], p[1]+0.8, f"{node}", color='white', fontsize=9, 
-                            ha='center', va='bottom', fontweight='bold')
-                else:
-                    offset = 0.5 if self.chk_log_scale.isChecked() else 1.0
-                    ax.text(p[0] + offset, p[1], p[2], f"{node}", color='white', fontsize=8)
+        nodes = list(G.nodes())
+        display = self._display_coords(nodes, pos_3d, self.cached_positions_version, is_2d)
+        offset = 0.5 if self.chk_log_scale.isChecked() else 1.0
+        self.scene = _Scene(key, self.axes, G, nodes, display, is_2d, offset)
 
         # Tắt trục tọa độ cho đẹp
+        ax = self.axes
         ax.set_xticks([])
         ax.set_yticks([])
         if not is_2d: ax.set_zticks([])
-        
-        # Vẽ lại
-        self.canvas.draw_idle()
\ No newline at end of file
+
+        # Zoom/pan từ NavigationToolbar đổi giới hạn trục -> lên lịch đánh giá lại LOD
+        for name in ('xlim_changed', 'ylim_changed') + (() if is_2d else ('zlim_changed',)):
+            ax.callbacks.connect(name, self._schedule_lod)
+
+    def _schedule_lod(self, ax=None):
+        self._lod_timer.start()
+
+    def _run_lod(self):
+        """Đánh giá lại LOD trong ngân sách thời gian; chưa xong thì hẹn tiếp ở lần sau"""
+        scene = self.scene
+        if scene is None:
+            return
+        pending = scene.update_lod(LOD_TIME_BUDGET)
+        self.canvas.draw_idle()
+        if pending:
+            self._lod_timer.start()
+
+    def _on_draw(self, event):
+        """Sau mỗi lần vẽ đầy đủ (2D): lưu nền tĩnh rồi vẽ các artist động lên trên"""
+        scene = self.scene
+        if scene is None or not scene.is_2d:
+            self._background = None
+            return
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in scene.animated:
+            self.fig.draw_artist(artist)
+
+    def _present(self, full=False):
+        """2D: blit (khôi phục nền + vẽ lại cạnh/node); 3D hoặc chưa có nền: vẽ lại cả figure"""
+        scene = self.scene
+        if full or not scene.is_2d or self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        for artist in scene.animated:
+            self.fig.draw_artist(artist)
+        self.canvas.blit(self.fig.bbox)
+
+class _SlotLayer:
+    """
+    Dữ liệu của một lớp highlight vẽ bằng một đường duy nhất (Line2D / Line3D), giữ suốt đời cảnh.
+    Mỗi phần tử (khóa -> `rows` dòng tọa độ) chiếm một slot cố định trong bộ đệm; slot trống là NaN
+    nên không được vẽ (với cạnh: dòng NaN cuối slot ngắt nét giữa các đoạn).
+    update() chỉ ghi các slot thay đổi rồi đặt lại dữ liệu một lần: phần Python tỉ lệ với delta,
+    không dựng lại danh sách đoạn / artist. Hết slot thì nhân đôi bộ đệm.
+    """
+
+    def __init__(self, artist, dim, rows, capacity=64):
+        self.artist = artist
+        self.dim = dim
+        self.rows = rows
+        self.slots = {}       # Khóa -> slot
+        self.free = []        # Slot đã trả lại (trong phạm vi đã dùng)
+        self.used = 0         # Số slot đầu bộ đệm từng được cấp
+        self.buffer = np.full((capacity * rows, dim), np.nan)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def update(self, added, removed):
+        """added: các cặp (khóa, mảng (<= rows, dim)); removed: các khóa. Khóa đã có thì bỏ qua."""
+        rows, buf = self.rows, self.buffer
+        changed = False
+        for key in removed:
+            slot = self.slots.pop(key, None)
+            if slot is not None:
+                buf[slot * rows:(slot + 1) * rows] = np.nan
+                self.free.append(slot)
+                changed = True
+        for key, coords in added:
+            if key in self.slots:
+                continue
+            slot = self._take()
+            buf = self.buffer
+            buf[slot * rows:slot * rows + len(coords)] = coords
+            self.slots[key] = slot
+            changed = True
+        if not changed:
+            return False
+        if not self.slots:
+            self.free.clear()  # Toàn bộ đã là NaN: cấp lại từ đầu bộ đệm
+            self.used = 0
+        data = self.buffer[:self.used * rows]
+        if self.dim == 2:
+            self.artist.set_data(data[:, 0], data[:, 1])
+        else:
+            self.artist.set_data_3d(data[:, 0], data[:, 1], data[:, 2])
+        return True
+
+    def _take(self):
+        if self.free:
+            return self.free.pop()
+        if self.used * self.rows == len(self.buffer):
+            grown = np.full((2 * len(self.buffer), self.dim), np.nan)
+            grown[:len(self.buffer)] = self.buffer
+            self.buffer = grown
+        self.used += 1
+        return self.used - 1
+
+class _Scene:
+    """
+    Các artist của một lần dựng:
+    - lớp nền tĩnh: một LineCollection (Line3DCollection) cho mọi cạnh, một scatter cho mọi node, nhãn;
+    - lớp highlight: một đường (cạnh) và một lớp marker (node) bền vững theo slot (_SlotLayer),
+      chỉ chứa các phần tử đang được tô, vẽ đè lên nền.
+    Với danh mục lớn, lớp nền đi qua level of detail theo khung nhìn (update_lod): nhãn được lọc
+    theo độ quan trọng, cạnh giới hạn theo EDGE_BUDGET, node dày đặc gộp thành sprite mật độ.
+    Mỗi bước chỉ ghi các slot highlight thay đổi (tỉ lệ với delta), nền không phải vẽ lại
+    (2D: nền được lưu làm background cho blitting).
+    """
+
+    def __init__(self, key, ax, G, nodes, display, is_2d, label_offset):
+        self.key = key
+        self.ax = ax
+        self.is_2d = is_2d
+        self.display = display      # Ma trận tọa độ hiển thị (N, 2|3) theo thứ tự nodes
+        self.path_edges = {}        # Cạnh đang highlight (theo khóa được truyền vào)
+        self.highlighted = {}       # Node đang highlight
+        self.overlay = None
+        self.overlay_artist = None
+
+        self.nodes = nodes
+        self.node_ids = {n: i for i, n in enumerate(nodes)}
+
+        # --- Cạnh ---
+        self.edges = list(G.edges())
+        self.edge_ids = {}          # (u, v) và (v, u) -> các chỉ số cạnh
+        for k, (u, v) in enumerate(self.edges):
+            self.edge_ids.setdefault((u, v), []).append(k)
+            if u != v:
+                self.edge_ids.setdefault((v, u), []).append(k)
+        self.segments = self._segments(self.edges)
+        pairs = np.array([(self.node_ids[u], self.node_ids[v]) for u, v in self.edges],
+                         dtype=np.int64).reshape(-1, 2)
+        self.edge_src, self.edge_dst = pairs[:, 0], pairs[:, 1]
+        width = 1.0 if is_2d else 0.8
+        collection = LineCollection if is_2d else Line3DCollection
+        self.edge_artist = collection(self.segments[:0], colors=EDGE_COLOR, linewidths=width, alpha=0.5)
+        if is_2d:
+            ax.add_collection(self.edge_artist, autolim=False)
+        else:
+            # Collection rỗng làm autolim 3D lỗi; giới hạn trục đặt theo toàn bộ node ở dưới
+            ax.add_collection3d(self.edge_artist, autolim=False)
+        # Highlight đường đi: mỗi cạnh đang tô là một slot (u, v, NaN ngắt nét)
+        self.path_artist = self._line(color=PATH_COLOR, linewidth=3.0, solid_capstyle='butt', zorder=3)
+        self.lit_edges = _SlotLayer(self.path_artist, self.display.shape[1], rows=3)
+
+        # --- Mức độ quan trọng (chọn nhãn / node vẽ riêng): bậc, Mặt Trời luôn đứng đầu ---
+        n = len(nodes)
+        importance = (np.bincount(self.edge_src, minlength=n) +
+                      np.bincount(self.edge_dst, minlength=n)).astype(float)
+        if 'Sun' in self.node_ids:
+            importance[self.node_ids['Sun']] = np.inf
+        self.rank = np.argsort(-importance, kind='stable')  # Id node theo độ quan trọng giảm dần
+        self.backbone = None     # Mặt nạ cạnh thuộc cây khung (tính khi vượt EDGE_BUDGET)
+        self.edge_priority = None
+
+        # --- Node ---
+        self.size = 60 if is_2d else 40 # 2D thì vẽ to hơn chút
+        self.node_colors = np.array([to_rgba(SUN_COLOR if n == 'Sun' else NODE_COLOR) for n in nodes])
+        self.node_sizes = np.array([120 if n == 'Sun' else self.size for n in nodes], dtype=float)
+        self.node_artist = None
+        self.sprite_artist = None
+        self.drawn_nodes = None
+        # Highlight node: marker trên một đường không nét (Mặt Trời giữ màu riêng nên không tô)
+        self.lit_artist = self._line(linestyle='none', marker='o', markersize=np.sqrt(80),
+                                     markerfacecolor=HIGHLIGHT_COLOR, markeredgecolor='white', zorder=6)
+        self.lit_nodes = _SlotLayer(self.lit_artist, self.display.shape[1], rows=1)
+
+        # --- Nhãn: một nhóm Text cố định, gán lại cho các node được chọn ---
+        self.label_offset = label_offset
+        self.labels = []
+
+        # Giới hạn trục theo toàn bộ node (lớp nền chỉ chứa một phần nên không autoscale được)
+        if n:
+            lo, hi = display.min(axis=0), display.max(axis=0)
+            pad = np.maximum((hi - lo) * 0.05, 1.0)
+            ax.set_xlim(lo[0] - pad[0], hi[0] + pad[0])
+            ax.set_ylim(lo[1] - pad[1], hi[1] + pad[1])
+            if not is_2d:
+                ax.set_zlim(lo[2] - pad[2], hi[2] + pad[2])
+        ax.set_autoscale_on(False)
+        # Hộp bao của từng cạnh: cạnh cắt ngang khung nhìn vẫn được giữ dù hai đầu nằm ngoài
+        self.edge_lo = self.segments.min(axis=1)
+        self.edge_hi = self.segments.max(axis=1)
+
+        self._lod_view = None
+        self._lod_stage = 0
+        self.update_lod()
+
+        # 2D: lớp highlight được vẽ riêng bằng blitting
+        if is_2d:
+            self.path_artist.set_animated(True)
+            self.lit_artist.set_animated(True)
+
+    @property
+    def animated(self):
+        return [self.path_artist, self.lit_artist]
+
+    def _segments(self, pairs):
+        """Mảng đoạn thẳng (M, 2, dim) lấy thẳng từ ma trận tọa độ hiển thị"""
+        ids = np.array([(self.node_ids[u], self.node_ids[v]) for u, v in pairs],
+                       dtype=np.int64).reshape(-1, 2)
+        return self.display[ids]
+
+    def _line(self, **style):
+        """Đường rỗng (Line2D / Line3D) gắn vào trục, dữ liệu do _SlotLayer đặt sau"""
+        line = Line2D([], [], **style) if self.is_2d else Line3D([], [], [], **style)
+        self.ax.add_line(line)
+        return line
+
+    def _scatter(self, P, sizes, colors, **style):
+        style = {'edgecolors': 'white', 'alpha': 1.0, 'zorder': 5, **style}
+        if self.is_2d:
+            return self.ax.scatter(P[:, 0], P[:, 1], s=sizes, c=colors, **style)
+        return self.ax.scatter(P[:, 0], P[:, 1], P[:, 2], s=sizes, c=colors, **style)
+
+    def _replace_scatter(self, artist, P, sizes, colors, **style):
+        """2D: cập nhật scatter tại chỗ; 3D: không đổi tọa độ được qua API công khai -> tạo lại"""
+        if artist is not None and self.is_2d:
+            artist.set_offsets(P)
+            artist.set_sizes(sizes)
+            artist.set_facecolors(colors)
+            return artist
+        if artist is not None:
+            artist.remove()
+        return self._scatter(P, sizes, colors, **style)
+
+    # --- Level of detail (lớp nền) ---
+    def view_bounds(self):
+        """Khung nhìn hiện tại theo tọa độ hiển thị: (lo, hi) mỗi mảng dài 2|3"""
+        ax = self.ax
+        lims = [ax.get_xlim(), ax.get_ylim()] + ([] if self.is_2d else [ax.get_zlim()])
+        lims = np.array(lims, dtype=float)
+        return lims.min(axis=1), lims.max(axis=1)
+
+    def update_lod(self, budget=None):
+        """
+        Chọn lại lớp nền theo khung nhìn: nhãn -> cạnh -> node/sprite.
+        budget: số giây tối đa (None = làm hết). Giai đoạn còn lại được làm tiếp ở lần gọi sau
+        nếu khung nhìn không đổi (đổi khung nhìn thì làm lại từ đầu).
+        Trả về True nếu còn giai đoạn chưa làm.
+        """
+        lo, hi = self.view_bounds()
+        view = (tuple(lo), tuple(hi))
+        if view != self._lod_view:
+            self._lod_view = view
+            self._lod_stage = 0
+            self.in_view = np.all((self.display >= lo) & (self.display <= hi), axis=1)
+
+        stages = (self._lod_labels, self._lod_edges, self._lod_nodes)
+        deadline = None if budget is None else perf_counter() + budget
+        while self._lod_stage < len(stages):
+            stages[self._lod_stage](lo, hi)
+            self._lod_stage += 1
+            if deadline is not None and perf_counter() > deadline:
+                break
+        return self._lod_stage < len(stages)
+
+    def _grid_cells(self, ids, lo, hi, size, dims):
+        """Chỉ số ô lưới size^dims (trên khung nhìn) của các node"""
+        span = np.maximum(hi[:dims] - lo[:dims], 1e-12)
+        cell = np.floor((self.display[ids, :dims] - lo[:dims]) / span * size).astype(np.int64)
+        return np.ravel_multi_index(tuple(np.clip(cell, 0, size - 1).T), (size,) * dims)
+
+    def _lod_labels(self, lo, hi):
+        """Nhãn cho các node quan trọng nhất trong khung nhìn, mỗi ô lưới tối đa một nhãn (tránh chồng)"""
+        ranked = self.rank[self.in_view[self.rank]]
+        if len(ranked) > LABEL_BUDGET:
+            _, first = np.unique(self._grid_cells(ranked, lo, hi, LABEL_GRID, 2), return_index=True)
+            ranked = ranked[np.sort(first)]
+        chosen = ranked[:LABEL_BUDGET].tolist()
+
+        while len(self.labels) < len(chosen):
+            if self.is_2d:
+                text = self.ax.text(0, 0, "", color='white', fontsize=9,
+                                    ha='center', va='bottom', fontweight='bold', clip_on=True)
+            else:
+                text = self.ax.text(0, 0, 0, "", color='white', fontsize=8)
+            self.labels.append(text)
+        for text, i in zip(self.labels, chosen):
+            p = self.display[i]
+            if self.is_2d:
+                text.set_position((p[0], p[1] + 0.8))
+            else:
+                text.set_position_3d((p[0] + self.label_offset, p[1], p[2]))
+            text.set_text(f"{self.nodes[i]}")
+            text.set_visible(True)
+        for text in self.labels[len(chosen):]:
+            text.set_visible(False)
+
+    def _lod_edges(self, lo, hi):
+        """
+        Cạnh nền: mọi cạnh cắt khung nhìn nếu nằm trong EDGE_BUDGET; vượt thì giữ cây khung
+        (xương sống) và lấy mẫu cố định từ phần còn lại. Cạnh highlight nằm ở lớp riêng nên luôn đủ.
+        """
+        if len(self.edges) <= EDGE_BUDGET:
+            if not len(self.edge_artist.get_segments()):
+                self.edge_artist.set_segments(self.segments)
+            return
+        idx = np.flatnonzero(np.all((self.edge_hi >= lo) & (self.edge_lo <= hi), axis=1))
+        if len(idx) > EDGE_BUDGET:
+            if self.backbone is None:
+                self._build_backbone()
+            tree = self.backbone[idx]
+            back = self._sample(idx[tree], EDGE_BUDGET)
+            idx = np.concatenate([back, self._sample(idx[~tree], EDGE_BUDGET - len(back))])
+        self.edge_artist.set_segments(self.segments[idx])
+
+    def _sample(self, idx, k):
+        """k cạnh theo thứ tự lấy mẫu cố định (cùng khung nhìn -> cùng kết quả, không nhấp nháy)"""
+        if k >= len(idx):
+            return idx
+        if k <= 0:
+            return idx[:0]
+        return idx[np.argpartition(self.edge_priority[idx], k)[:k]]
+
+    def _build_backbone(self):
+        """Cây khung nhỏ nhất theo độ dài hiển thị (scipy) + thứ tự lấy mẫu cố định cho các cạnh khác"""
+        n, m = len(self.nodes), len(self.edges)
+        length = np.linalg.norm(self.segments[:, 1] - self.segments[:, 0], axis=1) + 1e-9
+        a = np.minimum(self.edge_src, self.edge_dst)
+        b = np.maximum(self.edge_src, self.edge_dst)
+        # Cạnh song song / hai chiều: chỉ giữ một cạnh mỗi cặp (scipy cộng dồn phần tử trùng)
+        order = np.lexsort((length, b, a))
+        first = np.ones(m, dtype=bool)
+        first[1:] = (a[order][1:] != a[order][:-1]) | (b[order][1:] != b[order][:-1])
+        keep = order[first & (a[order] != b[order])]
+        tree = minimum_spanning_tree(sp.csr_matrix((length[keep], (a[keep], b[keep])),
+                                                   shape=(n, n))).tocoo()
+        keys = a[keep] * n + b[keep]
+        sorter = np.argsort(keys)
+        hit = np.searchsorted(keys, tree.row.astype(np.int64) * n + tree.col, sorter=sorter)
+        self.backbone = np.zeros(m, dtype=bool)
+        self.backbone[keep[sorter[hit]]] = True
+        self.edge_priority = np.random.default_rng(0).permutation(m)
+
+    def _lod_nodes(self, lo, hi):
+        """
+        Node: vẽ riêng từng node nếu số node trong khung nhìn nằm trong NODE_BUDGET; nếu không,
+        chỉ vẽ riêng các node quan trọng nhất, phần còn lại gộp theo lưới thành sprite mật độ
+        (tâm = trọng tâm các node trong ô, diện tích theo số node).
+        """
+        if len(self.nodes) <= NODE_BUDGET:
+            if self.node_artist is None:
+                self.node_artist = self._scatter(self.display, self.node_sizes, self.node_colors)
+            return
+        ranked = self.rank[self.in_view[self.rank]]
+        single, rest = (ranked, ranked[:0]) if len(ranked) <= NODE_BUDGET else \
+            (ranked[:NODE_BUDGET // 2], ranked[NODE_BUDGET // 2:])
+        self.drawn_nodes = single
+        self.node_artist = self._replace_scatter(self.node_artist, self.display[single],
+                                                 self.node_sizes[single], self.node_colors[single])
+
+        # 3D: lưới thô hơn để tổng số ô tương đương lưới 2D
+        dims = self.display.shape[1]
+        grid = SPRITE_GRID if dims == 2 else int(round(SPRITE_GRID ** (2 / 3)))
+        _, inverse, counts = np.unique(self._grid_cells(rest, lo, hi, grid, dims),
+                                       return_inverse=True, return_counts=True)
+        centers = np.column_stack([np.bincount(inverse, weights=self.display[rest, d]) / counts
+                                   for d in range(dims)]).reshape(-1, dims)
+        sizes = self.size * 0.5 * np.sqrt(counts)
+        self.sprite_artist = self._replace_scatter(self.sprite_artist, centers, sizes,
+                                                   np.tile(to_rgba(NODE_COLOR, 0.3), (len(counts), 1)),
+                                                   edgecolors='none', alpha=None, zorder=2)
+
+    # --- Cạnh ---
+    def set_edges(self, new_edges):
+        """Đặt toàn bộ tập cạnh highlight, chỉ cập nhật phần chênh lệch"""
+        old = self.path_edges
+        self.update_edges([e for e in new_edges if e not in old],
+                          [e for e in old if e not in new_edges])
+
+    def update_edges(self, added, removed):
+        touched = set()
+        for e in removed:
+            if self.path_edges.pop(e, None) is not None:
+                touched.update(self.edge_ids.get(e, ()))
+        for e in added:
+            self.path_edges[e] = True
+            touched.update(self.edge_ids.get(e, ()))
+        if not touched:
+            return
+
+        path = self.path_edges
+        lit, dark = [], []
+        for k in touched:
+            u, v = self.edges[k]
+            (lit if (u, v) in path or (v, u) in path else dark).append(k)
+        self.lit_edges.update(((k, self.segments[k]) for k in lit), dark)
+
+    # --- Node ---
+    def set_nodes(self, new_nodes):
+        old = self.highlighted
+        removed = [n for n in old if n not in new_nodes]
+        for n in removed:
+            del old[n]
+        self.update_nodes(new_nodes, removed)
+
+    def update_nodes(self, added, removed=()):
+        fresh = [n for n in added if n not in self.highlighted]
+        for n in fresh:
+            self.highlighted[n] = True
+        ids = self.node_ids
+        self.lit_nodes.update(((n, self.display[ids[n]][None]) for n in fresh if n in ids and n != 'Sun'),
+                              removed)
+
+    # --- Overlay ---
+    def set_overlay(self, overlay_edges):
+        """Thay lớp overlay (nét đứt). Trả về True nếu cần vẽ lại toàn bộ."""
+        overlay = list(overlay_edges) if overlay_edges else None
+        if overlay == self.overlay:
+            return False
+        self.overlay = overlay
+        if self.overlay_artist is not None:
+            self.overlay_artist.remove()
+            self.overlay_artist = None
+        if overlay:
+            segments = self._segments(overlay)
+            if self.is_2d:
+                self.overlay_artist = LineCollection(segments, colors='#1abc9c', linewidths=1.5,
+                                                     linestyles='--', alpha=0.9, zorder=4)
+                self.ax.add_collection(self.overlay_artist)
+            else:
+                self.overlay_artist = Line3DCollection(segments, colors='#1abc9c', linewidths=1.2,
+                                                       linestyles='--', alpha=0.9)
+                self.ax.add_collection3d(self.overlay_artist, autolim=False)
+        return True
@@ -4,13 +4,16 @@
 # Chức năng: Panel điều khiển bên trái (Chọn thuật toán, Nút bấm, Console log)
 
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QGroupBox, QComboBox, QHBoxLayout, 
-                             QPushButton, QLabel, QCheckBox, QTextEdit, QFormLayout)
-from PyQt6.QtCore import pyqtSignal
+                             QPushButton, QLabel, QCheckBox, QTextEdit, QFormLayout, QSlider)
+from PyQt6.QtCore import Qt, pyqtSignal
+from datetime import timedelta
 
 class ControlPanel(QWidget):
     # Định nghĩa các Tín hiệu (Signals) để giao tiếp với Main Window
     signal_load_data = pyqtSignal()            # Yêu cầu tải dữ liệu
-    signal_run_algo = pyqtSignal(str, str, str) # (Tên thuật toán, Start Node, End Node)
+    signal_load_ephemeris = pyqtSignal()       # Tải quỹ đạo cả khoảng thời gian
+    signal_epoch = pyqtSignal(int)             # Epoch mới: số giờ tính từ đầu khoảng
+    signal_run_algo = pyqtSignal(str, str, str, bool) # (Tên thuật toán, Start Node, End Node, Tính ngay)
     signal_graph_mode = pyqtSignal(bool)       # True = Có hướng, False = Vô hướng
     signal_clear_viz = pyqtSignal()            # Xóa màu vẽ cũ
     
@@ -19,6 +22,14 @@ class ControlPanel(QWidget):
     signal_save_graph = pyqtSignal()           # Lưu file
     signal_load_graph = pyqtSignal()           # Mở file
 
+    # --- Điều khiển animation ---
+    signal_speed = pyqtSignal(float)           # Hệ số tốc độ (1×, 10×)
+    signal_skip = pyqtSignal()                 # Bỏ qua tới trạng thái cuối
+    signal_seek = pyqtSignal(int)              # Tua bản ghi tới bước k
+    signal_replay_trace = pyqtSignal()         # Phát lại bản ghi (không tính lại)
+    signal_save_trace = pyqtSignal()
+    signal_load_trace = pyqtSignal()
+
     def __init__(self, parent=None):
         super().__init__(parent)
         
@@ -45,8 +56,22 @@ class ControlPanel(QWidget):
         hbox_io.addWidget(self.btn_save)
         hbox_io.addWidget(self.btn_open)
         
+        # Quỹ đạo theo thời gian: tải một lần, kéo thanh epoch để dời hành tinh (nội suy)
+        self.btn_ephemeris = QPushButton("🛰️ Load Orbits (Time Range)")
+        self.btn_ephemeris.clicked.connect(self.signal_load_ephemeris.emit)
+        hbox_epoch = QHBoxLayout()
+        self.slider_epoch = QSlider(Qt.Orientation.Horizontal)
+        self.slider_epoch.valueChanged.connect(self._on_epoch)
+        self.lbl_epoch = QLabel("Epoch: —")
+        hbox_epoch.addWidget(self.slider_epoch)
+        hbox_epoch.addWidget(self.lbl_epoch)
+        self.epoch_start = None
+        self.set_epoch_range(None, 0)
+
         layout_data.addWidget(self.btn_load)
         layout_data.addLayout(hbox_io)
+        layout_data.addWidget(self.btn_ephemeris)
+        layout_data.addLayout(hbox_epoch)
         grp_data.setLayout(layout_data)
         
         # --- GROUP 2: CẤU HÌNH ĐỒ THỊ ---
@@ -77,9 +102,15 @@ class ControlPanel(QWidget):
             "BFS (Breadth-First Search)", 
             "DFS (Depth-First Search)",
             "Dijkstra (Shortest Path)",
+            "A* (Heuristic Shortest Path)",
+            "Bidirectional A* (Shortest Path)",
+            "Distance Oracle (Precomputed Routes)",
             "MST (Prim Algorithm)",
             "MST (Kruskal Algorithm)",
             "Max Flow (Ford-Fulkerson)",
+            "Max Flow (Dinic)",
+            "Max Flow (Push-Relabel)",
+            "Gomory-Hu Tree (All-Pairs Min Cut)",
             "Eulerian Circuit"  # <--- ĐÃ THÊM MỤC NÀY ĐỂ CHẠY FILE EULERIAN.PY
         ])
         
@@ -91,17 +122,57 @@ class ControlPanel(QWidget):
         form_layout.addRow("Start Node:", self.combo_start)
         form_layout.addRow("Target Node:", self.combo_end)
         
+        # Chế độ chỉ tính toán: bỏ animation, hiện kết quả ngay
+        self.chk_instant = QCheckBox("⚡ Show result instantly (no animation)")
+
         # Nút chạy
         self.btn_run = QPushButton("🚀 EXECUTE MISSION")
         self.btn_run.setStyleSheet("background-color: #27ae60; color: white; font-weight: bold; padding: 10px;")
         self.btn_run.clicked.connect(self._on_run_clicked)
         
+        # Tốc độ animation + bỏ qua tới cuối
+        hbox_speed = QHBoxLayout()
+        self.combo_speed = QComboBox()
+        for label, factor in (("1×", 1.0), ("10×", 10.0)):
+            self.combo_speed.addItem(label, factor)
+        self.combo_speed.currentIndexChanged.connect(
+            lambda _: self.signal_speed.emit(self.combo_speed.currentData()))
+        self.btn_skip = QPushButton("⏭ Skip to End")
+        self.btn_skip.clicked.connect(self.signal_skip.emit)
+        hbox_speed.addWidget(QLabel("Speed:"))
+        hbox_speed.addWidget(self.combo_speed)
+        hbox_speed.addWidget(self.btn_skip)
+
+        # Thanh thời gian: tua bản ghi của lần chạy gần nhất
+        hbox_timeline = QHBoxLayout()
+        self.slider_timeline = QSlider(Qt.Orientation.Horizontal)
+        self.slider_timeline.valueChanged.connect(self._on_seek)
+        self.lbl_timeline = QLabel("Step 0 / 0")
+        hbox_timeline.addWidget(self.slider_timeline)
+        hbox_timeline.addWidget(self.lbl_timeline)
+
+        hbox_trace = QHBoxLayout()
+        self.btn_replay = QPushButton("▶ Replay")
+        self.btn_save_trace = QPushButton("💾 Save Trace")
+        self.btn_load_trace = QPushButton("📂 Load Trace")
+        self.btn_replay.clicked.connect(self.signal_replay_trace.emit)
+        self.btn_save_trace.clicked.connect(self.signal_save_trace.emit)
+        self.btn_load_trace.clicked.connect(self.signal_load_trace.emit)
+        hbox_trace.addWidget(self.btn_replay)
+        hbox_trace.addWidget(self.btn_save_trace)
+        hbox_trace.addWidget(self.btn_load_trace)
+        self.set_timeline(0)
+
         # Nút Reset màu
         self.btn_clear = QPushButton("Reset Visualization")
         self.btn_clear.clicked.connect(self.signal_clear_viz.emit)
 
         layout_algo.addLayout(form_layout)
+        layout_algo.addWidget(self.chk_instant)
         layout_algo.addWidget(self.btn_run)
+        layout_algo.addLayout(hbox_speed)
+        layout_algo.addLayout(hbox_timeline)
+        layout_algo.addLayout(hbox_trace)
         layout_algo.addWidget(self.btn_clear)
         grp_algo.setLayout(layout_algo)
 
@@ -135,6 +206,40 @@ class ControlPanel(QWidget):
         
         self.log(f"System updated: Found {len(planets)} celestial objects.")
 
+    def set_timeline(self, n_steps):
+        """Đặt thanh thời gian cho bản ghi n_steps bước (0 = chưa có bản ghi), con trỏ ở cuối"""
+        self.slider_timeline.blockSignals(True)
+        self.slider_timeline.setRange(0, n_steps)
+        self.slider_timeline.setValue(n_steps)
+        self.slider_timeline.blockSignals(False)
+        self.lbl_timeline.setText(f"Step {n_steps} / {n_steps}")
+        for widget in (self.slider_timeline, self.btn_replay, self.btn_save_trace):
+            widget.setEnabled(n_steps > 0)
+
+    def _on_seek(self, value):
+        self.lbl_timeline.setText(f"Step {value} / {self.slider_timeline.maximum()}")
+        self.signal_seek.emit(value)
+
+    def set_epoch_range(self, start, hours):
+        """Thanh epoch từ datetime `start`, bước 1 giờ, dài `hours` giờ (start None = chưa có quỹ đạo)"""
+        self.epoch_start = start
+        self.slider_epoch.blockSignals(True)
+        self.slider_epoch.setRange(0, hours)
+        self.slider_epoch.setValue(0)
+        self.slider_epoch.blockSignals(False)
+        self.slider_epoch.setEnabled(start is not None and hours > 0)
+        self._show_epoch(0)
+
+    def _show_epoch(self, value):
+        if self.epoch_start is None:
+            self.lbl_epoch.setText("Epoch: —")
+        else:
+            self.lbl_epoch.setText(f"{self.epoch_start + timedelta(hours=value):%Y-%m-%d %H:00}")
+
+    def _on_epoch(self, value):
+        self._show_epoch(value)
+        self.signal_epoch.emit(value)
+
     def log(self, message):
         """Ghi log ra màn hình"""
         self.txt_log.append(f">> {message}")
@@ -150,4 +255,4 @@ class ControlPanel(QWidget):
             self.log("ERROR: Data not loaded properly.")
             return
 
-        self.signal_run_algo.emit(algo, start, end)
\ No newline at end of file
+        self.signal_run_algo.emit(algo, start, end, self.chk_instant.isChecked())
\ No newline at end of file
@@ -5,15 +5,17 @@
 
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QTableWidget, QTableWidgetItem, 
                              QTabWidget, QTextEdit, QPushButton)
-import networkx as nx
-import numpy as np
+
+# Bảng N x N chỉ vẽ được khi đồ thị nhỏ; lớn hơn thì hiện dạng thưa (hàng, cột, trọng số)
+MATRIX_TABLE_LIMIT = 300
 
 class DataViewDialog(QDialog):
-    def __init__(self, G, parent=None):
+    def __init__(self, space_graph, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Graph Data Inspector")
         self.resize(800, 600)
-        self.G = G
+        self.space_graph = space_graph
+        self.G = space_graph.G
         
         layout = QVBoxLayout(self)
         
@@ -44,30 +46,45 @@ class DataViewDialog(QDialog):
         layout.addWidget(btn_close)
 
     def _setup_matrix_tab(self):
-        nodes = list(self.G.nodes())
+        # Lấy ma trận kề thưa dùng chung từ SpaceGraph (không dựng N x N)
+        nodes, matrix = self.space_graph.get_sparse_adjacency()
         n = len(nodes)
+        labels = [str(node) for node in nodes]
+
+        if n > MATRIX_TABLE_LIMIT:
+            self._setup_sparse_matrix_table(labels, matrix)
+            return
         
         # Cấu hình bảng
         self.tab_matrix.setRowCount(n)
         self.tab_matrix.setColumnCount(n)
-        self.tab_matrix.setHorizontalHeaderLabels(nodes)
-        self.tab_matrix.setVerticalHeaderLabels(nodes)
-        
-        # Lấy ma trận từ NetworkX
-        matrix = nx.to_numpy_array(self.G, nodelist=nodes)
+        self.tab_matrix.setHorizontalHeaderLabels(labels)
+        self.tab_matrix.setVerticalHeaderLabels(labels)
         
         for r in range(n):
             for c in range(n):
-                val = matrix[r][c]
-                # Nếu val > 0 thì hiển thị trọng số, 0 thì để trống cho dễ nhìn
-                text = f"{val:.1f}" if val > 0 else "0"
-                item = QTableWidgetItem(text)
-                
-                # Tô màu nhẹ cho các ô có giá trị
+                self.tab_matrix.setItem(r, c, QTableWidgetItem("0"))
+
+        # Chỉ các ô khác 0 mới cần đọc từ CSR
+        for r in range(n):
+            start, end = matrix.indptr[r], matrix.indptr[r + 1]
+            for c, val in zip(matrix.indices[start:end], matrix.data[start:end]):
                 if val > 0:
+                    # Nếu val > 0 thì hiển thị trọng số và tô màu nhẹ
+                    item = QTableWidgetItem(f"{val:.1f}")
                     item.setBackground(util_color(200, 255, 200)) # Xanh nhạt
-                    
-                self.tab_matrix.setItem(r, c, item)
+                    self.tab_matrix.setItem(r, int(c), item)
+
+    def _setup_sparse_matrix_table(self, labels, matrix):
+        """Đồ thị lớn: liệt kê các ô khác 0 của ma trận thưa (Row, Col, Value)"""
+        coo = matrix.tocoo()
+        self.tab_matrix.setRowCount(coo.nnz)
+        self.tab_matrix.setColumnCount(3)
+        self.tab_matrix.setHorizontalHeaderLabels(["Row", "Column", "Value"])
+        for i, (r, c, val) in enumerate(zip(coo.row, coo.col, coo.data)):
+            self.tab_matrix.setItem(i, 0, QTableWidgetItem(labels[r]))
+            self.tab_matrix.setItem(i, 1, QTableWidgetItem(labels[c]))
+            self.tab_matrix.setItem(i, 2, QTableWidgetItem(f"{val:.1f}"))
 
     def _setup_adj_list_tab(self):
         text = ""
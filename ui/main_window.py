@@ -5,15 +5,18 @@
 
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QMessageBox, 
                              QStatusBar, QFileDialog)
-from PyQt6.QtCore import QTimer
+from functools import partial
+import time
 
 # --- IMPORT CÁC MODULE GIAO DIỆN ---
 from ui.canvas_widget import GraphWidget
 from ui.controls import ControlPanel
 from ui.dialogs import DataViewDialog
+from ui.animation import AnimationScheduler
 
 # --- IMPORT CÁC MODULE XỬ LÝ DỮ LIỆU ---
-from utils.astro_data import AstroDataFetcher
+from utils.astro_data import AstroDataFetcher, EphemerisFetcher, EPHEMERIS_SPAN_DAYS
+from utils.ephemeris import calendar_date
 from algorithms.graph_base import SpaceGraph
 import utils.file_io as file_io
 
@@ -23,6 +26,12 @@ import algorithms.shortest_path as sp
 import algorithms.mst as mst
 import algorithms.flow as flow
 import algorithms.eulerian as eulerian
+from algorithms.steps import StepState
+from algorithms.oracle import DistanceOracle
+from algorithms.dynamic_mst import DynamicMST
+from algorithms.gomory_hu import GomoryHuTree, gomory_hu_tree
+from algorithms.results import (TraversalResult, PathResult, MSTResult,
+                                FlowResult, CircuitResult)
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -33,6 +42,9 @@ class MainWindow(QMainWindow):
         
         # --- 1. CORE LOGIC ---
         self.graph_manager = SpaceGraph()
+        self.oracle = None # DistanceOracle, dựng lười ở truy vấn đầu tiên
+        self.dynamic_mst = None # DynamicMST, cập nhật tăng dần theo nhật ký thay đổi
+        self._mst_delta = None # (cây cũ, Step hoán đổi) chờ show_result vẽ tăng dần
         
         # --- 2. GUI SETUP ---
         self.central_widget = QWidget()
@@ -54,17 +66,37 @@ class MainWindow(QMainWindow):
         
         # --- 3. KẾT NỐI TÍN HIỆU (WIRING) ---
         self._connect_signals()
+        self.fetcher = None # AstroDataFetcher của lần tải gần nhất
+        self.ephemeris_fetcher = None
+        self.ephemeris = None # Ephemeris (quỹ đạo theo thời gian) để đổi epoch không cần tải lại
 
         # --- 4. ANIMATION ENGINE ---
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.run_animation_step)
-        self.current_algo_generator = None 
-        self.is_running = False
+        # Bộ lập lịch gộp nhiều bước mỗi frame theo chi phí vẽ đo được
+        self.animator = AnimationScheduler(parent=self)
+        self.animator.started.connect(self.on_animation_started)
+        self.animator.frame.connect(self.run_animation_step)
+        self.animator.finished.connect(self.on_animation_finished)
+        self.animator.failed.connect(self.on_animation_failed)
+        self.control_panel.signal_speed.connect(self.animator.set_speed)
+        self.control_panel.signal_skip.connect(self.animator.skip_to_end)
+        self.step_state = StepState()
+        self.trace = None # StepTrace của lần chạy gần nhất (tua / phát lại / lưu)
+        self.control_panel.signal_seek.connect(self.seek_trace)
+        self.control_panel.signal_replay_trace.connect(self.replay_trace)
+        self.control_panel.signal_save_trace.connect(self.save_trace_file)
+        self.control_panel.signal_load_trace.connect(self.load_trace_file)
+
+    @property
+    def is_running(self):
+        """Đang có animation chạy hoặc xếp hàng"""
+        return self.animator.busy
 
     def _connect_signals(self):
         """Kết nối các nút bấm từ ControlPanel với các hàm xử lý tại đây"""
         # Nhóm Dữ liệu & File
         self.control_panel.signal_load_data.connect(self.start_loading_data)
+        self.control_panel.signal_load_ephemeris.connect(self.start_loading_ephemeris)
+        self.control_panel.signal_epoch.connect(self.set_epoch)
         self.control_panel.signal_save_graph.connect(self.save_graph_file)
         self.control_panel.signal_load_graph.connect(self.load_graph_file)
         
@@ -88,10 +120,17 @@ class MainWindow(QMainWindow):
         self.fetcher = AstroDataFetcher(use_realtime=True)
         self.fetcher.data_ready.connect(self.on_data_loaded)
         self.fetcher.data_error.connect(self.on_data_error)
+        self.fetcher.body_errors.connect(self.on_body_errors)
         self.fetcher.start()
 
     def on_data_loaded(self, planet_data):
         self.statusBar().showMessage(f"Data Loaded: {len(planet_data)} objects.")
+        if self.fetcher is not None and self.fetcher.cache_hits:
+            self.control_panel.log(f"💽 {self.fetcher.cache_hits} bodies loaded from ephemeris cache.")
+        self._init_graph(planet_data)
+
+    def _init_graph(self, planet_data):
+        """Dựng đồ thị mới từ {tên: (x, y, z)} với các tuyến ngẫu nhiên"""
         self.graph_manager.clear()
         
         # Thêm node
@@ -105,6 +144,53 @@ class MainWindow(QMainWindow):
         self._refresh_ui_after_load()
         self.control_panel.log(f"Graph initialized with {self.graph_manager.G.number_of_edges()} routes.")
 
+    def start_loading_ephemeris(self):
+        self.control_panel.btn_ephemeris.setEnabled(False)
+        self.control_panel.log(f"Requesting {EPHEMERIS_SPAN_DAYS}-day orbits from JPL Horizons...")
+        self.statusBar().showMessage("Downloading orbit range...")
+
+        self.ephemeris_fetcher = EphemerisFetcher()
+        self.ephemeris_fetcher.ephemeris_ready.connect(self.on_ephemeris_loaded)
+        self.ephemeris_fetcher.data_error.connect(self.on_ephemeris_error)
+        self.ephemeris_fetcher.body_errors.connect(self.on_body_errors)
+        self.ephemeris_fetcher.start()
+
+    def on_ephemeris_loaded(self, ephemeris):
+        self.ephemeris = ephemeris
+        self.control_panel.btn_ephemeris.setEnabled(True)
+        hours = int(round((ephemeris.stop - ephemeris.start) * 24))
+        self.control_panel.set_epoch_range(calendar_date(ephemeris.start), hours)
+        self.control_panel.log(f"🛰️ Orbits loaded: {len(ephemeris.names)} bodies × {len(ephemeris.times)} "
+                               f"epochs ({ephemeris.nbytes / 1024:.0f} KB).")
+        self.statusBar().showMessage("Orbits loaded. Drag the epoch slider to move the planets.")
+        if self.graph_manager.G.number_of_nodes() == 0:
+            self._init_graph(ephemeris.positions_at(ephemeris.start))
+        else:
+            self.set_epoch(0)
+
+    def on_ephemeris_error(self, error_msg):
+        self.control_panel.log(f"ERROR: {error_msg}")
+        self.control_panel.btn_ephemeris.setEnabled(True)
+
+    def set_epoch(self, hours):
+        """Dời hành tinh tới epoch (giờ tính từ đầu khoảng quỹ đạo) bằng nội suy; tuyến lấy lại trọng số theo khoảng cách"""
+        ephemeris = self.ephemeris
+        if ephemeris is None:
+            return
+        if self.is_running:
+            self.statusBar().showMessage("Epoch change ignored while an animation is running.")
+            return
+        t = min(ephemeris.start + hours / 24.0, ephemeris.stop)
+        moved = self.graph_manager.move_planets(ephemeris.positions_at(t), reweight=True)
+        if moved:
+            self.redraw()
+            self.statusBar().showMessage(f"Epoch {calendar_date(t):%Y-%m-%d %H:00}: {moved} bodies moved.")
+
+    def on_body_errors(self, errors):
+        """Các thiên thể tải lỗi (phần còn lại vẫn được dùng)"""
+        for name, error_msg in errors.items():
+            self.control_panel.log(f"⚠️ {name}: {error_msg}")
+
     def on_data_error(self, error_msg):
         self.control_panel.log(f"ERROR: {error_msg}")
         QMessageBox.critical(self, "Data Error", error_msg)
@@ -131,8 +217,7 @@ class MainWindow(QMainWindow):
         if filename:
             success, G, positions = file_io.load_graph_from_json(filename)
             if success:
-                self.graph_manager.G = G
-                self.graph_manager.positions = positions
+                self.graph_manager.load_graph(G, positions)
                 self._refresh_ui_after_load()
                 self.control_panel.log(f"📂 Loaded graph from {filename}")
             else:
@@ -140,7 +225,7 @@ class MainWindow(QMainWindow):
 
     def _refresh_ui_after_load(self):
         """Hàm phụ trợ để vẽ lại và cập nhật list sau khi Load Data/File"""
-        self.canvas_widget.plot_graph(self.graph_manager.G, self.graph_manager.positions)
+        self.redraw()
         self.control_panel.update_planet_list(list(self.graph_manager.G.nodes()))
         self.control_panel.btn_load.setEnabled(True)
         self.control_panel.btn_load.setText("♻ Reload Data")
@@ -153,112 +238,305 @@ class MainWindow(QMainWindow):
         self.graph_manager.set_directed(is_directed)
         mode = "Directed" if is_directed else "Undirected"
         self.control_panel.log(f"Graph mode changed to: {mode}")
-        self.canvas_widget.plot_graph(self.graph_manager.G, self.graph_manager.positions)
+        n_asym = self.graph_manager.asymmetric_routes()
+        if not is_directed and n_asym:
+            self.control_panel.log(f"ℹ️ {n_asym} routes have different weights per direction. "
+                                   "Undirected view shows one of them; directed weights are kept.")
+        self.redraw()
+
+    def redraw(self, path_edges=None, highlighted_nodes=None, overlay_edges=None):
+        """Vẽ lại đồ thị hiện tại; canvas dùng lại các artist nếu phiên bản đồ thị không đổi"""
+        self.canvas_widget.plot_graph(self.graph_manager.G, self.graph_manager.positions,
+                                      path_edges, highlighted_nodes, overlay_edges,
+                                      version=self.graph_manager.version,
+                                      positions_version=self.graph_manager.positions_version)
 
     def show_data_dialog(self):
         if self.graph_manager.G.number_of_nodes() == 0:
             QMessageBox.warning(self, "No Data", "Please load data first!")
             return
-        dialog = DataViewDialog(self.graph_manager.G, self)
+        dialog = DataViewDialog(self.graph_manager, self)
         dialog.exec()
 
     def reset_visualization(self):
         if self.is_running:
-            self.timer.stop()
-            self.is_running = False
-        self.canvas_widget.plot_graph(self.graph_manager.G, self.graph_manager.positions)
+            self.animator.cancel()
+            self.control_panel.log("⏹️ Animation cancelled.")
+        self.redraw()
         self.control_panel.log("Visualization reset.")
 
     # =========================================================================
     #  PHẦN 3: THUẬT TOÁN & ANIMATION (TRÁI TIM CỦA APP)
     # =========================================================================
 
-    def execute_algorithm(self, algo_name, start_node, end_node):
-        if self.is_running:
-            self.control_panel.log("⚠️ An algorithm is already running. Please wait or reset.")
-            return
-
+    def execute_algorithm(self, algo_name, start_node, end_node, instant=False):
+        """
+        Chạy thuật toán đã chọn.
+        instant=False: animation từng bước; instant=True: tính một mạch và vẽ kết quả ngay.
+        Animation chạy trên luồng worker; nếu đang có animation thì lần chạy mới được xếp hàng.
+        """
         G = self.graph_manager.G
         if G.number_of_nodes() == 0:
             QMessageBox.warning(self, "No Data", "Graph is empty.")
             return
 
+        # Thuật toán chạy trên lõi CSR, NetworkX chỉ dùng để vẽ/chỉnh sửa
+        core = self.graph_manager.core
+
         self.control_panel.log(f"🚀 Initializing {algo_name}...")
         
         try:
+            # Mỗi thuật toán có 2 lối vào: generator (animation) và hàm tính thẳng (kết quả)
             # 1. Traversal Algorithms
             if "BFS" in algo_name:
                 self.control_panel.log(f"📍 Start: {start_node}")
-                self.current_algo_generator = traversal.bfs_traversal(G, start_node)
+                animate = partial(traversal.bfs_traversal, core, start_node)
+                compute = partial(traversal.bfs_order, core, start_node)
             
             elif "DFS" in algo_name:
                 self.control_panel.log(f"📍 Start: {start_node}")
-                self.current_algo_generator = traversal.dfs_traversal(G, start_node)
+                animate = partial(traversal.dfs_traversal, core, start_node)
+                compute = partial(traversal.dfs_order, core, start_node)
             
             # 2. Pathfinding
             elif "Dijkstra" in algo_name:
                 self.control_panel.log(f"📍 Route: {start_node} ➔ {end_node}")
-                self.current_algo_generator = sp.dijkstra_algorithm(G, start_node, end_node)
+                animate = partial(sp.dijkstra_algorithm, core, start_node, end_node)
+                compute = partial(sp.dijkstra_path, core, start_node, end_node)
+
+            elif "Oracle" in algo_name:
+                self.control_panel.log(f"📍 Route: {start_node} ➔ {end_node} (precomputed oracle)")
+                animate = None # Chỉ có chế độ tính ngay
+                compute = partial(self.query_oracle, start_node, end_node)
+
+            elif "Bidirectional" in algo_name:
+                self.control_panel.log(f"📍 Route: {start_node} ⇄ {end_node} (bidirectional)")
+                animate = None # Chỉ có chế độ tính ngay
+                compute = partial(sp.bidirectional_path, core, start_node, end_node)
+
+            elif "A*" in algo_name:
+                self.control_panel.log(f"📍 Route: {start_node} ➔ {end_node} (A*)")
+                animate = partial(sp.astar_algorithm, core, start_node, end_node)
+                compute = partial(sp.astar_path, core, start_node, end_node)
             
             # 3. MST (Minimum Spanning Tree)
             elif "Prim" in algo_name:
                 self.control_panel.log(f"⚡ Prim MST starting at {start_node}")
-                self.current_algo_generator = mst.prim_algorithm(G, start_node)
+                animate = partial(mst.prim_algorithm, core, start_node)
+                compute = partial(mst.minimum_spanning_tree, core, 'prim', start_node)
             
             elif "Kruskal" in algo_name:
                 self.control_panel.log("⚡ Kruskal MST (Global optimization)")
-                self.current_algo_generator = mst.kruskal_algorithm(G)
+                animate = partial(mst.kruskal_algorithm, core)
+                compute = self.query_mst
             
             # 4. Max Flow
+            elif "Gomory-Hu" in algo_name:
+                if G.is_directed():
+                    QMessageBox.warning(self, "Mode Error", "Gomory-Hu tree requires an UNDIRECTED graph.\nPlease uncheck 'Directed Graph' in Graph Tools.")
+                    return
+                animate = None # Chỉ có chế độ tính ngay
+                compute = partial(self.query_gomory_hu, start_node, end_node)
+
             elif "Flow" in algo_name:
                 if not G.is_directed():
                     QMessageBox.warning(self, "Mode Error", "Max Flow requires a DIRECTED graph.\nPlease check 'Directed Graph' in Graph Tools.")
                     return
-                self.control_panel.log(f"🌊 Max Flow: {start_node} ➔ {end_node}")
-                self.current_algo_generator = flow.edmonds_karp(G, start_node, end_node)
+                if "Dinic" in algo_name:
+                    method = 'dinic'
+                elif "Push-Relabel" in algo_name:
+                    method = 'push_relabel'
+                else:
+                    method = 'edmonds_karp'
+                self.control_panel.log(f"🌊 Max Flow: {start_node} ➔ {end_node} ({method})")
+                animate = partial(flow.flow_steps, core, start_node, end_node, method)
+                compute = partial(flow.max_flow, core, start_node, end_node, method)
             
             # 5. Eulerian Circuit
             elif "Euler" in algo_name:
                 self.control_panel.log(f"∞ Eulerian Circuit starting at {start_node}")
-                self.current_algo_generator = eulerian.find_eulerian_circuit(G, start_node)
+                animate = partial(eulerian.find_eulerian_circuit, core, start_node)
+                compute = partial(eulerian.eulerian_circuit, core, start_node)
             
             else:
                 self.control_panel.log("⚠️ Algorithm logic not found!")
                 return
 
+            if instant or animate is None:
+                if self.is_running:
+                    self.control_panel.log("⚠️ An animation is running. Please wait or reset.")
+                    return
+                t0 = time.perf_counter()
+                result = compute()
+                self.show_result(result, time.perf_counter() - t0)
+                return
+
         except Exception as e:
             self.control_panel.log(f"❌ Setup Error: {e}")
             return
 
-        # Start Animation Loop
-        self.is_running = True
-        self.timer.start(150) # Tốc độ: 150ms/bước
+        # Generator (kể cả phần chuẩn bị) chạy trên luồng worker, GUI lấy bước theo nhịp vẽ.
+        # Ước lượng số bước: Euler đi qua từng cạnh, các thuật toán khác ~ một bước mỗi node
+        expected = core.n_edges if "Euler" in algo_name else core.n_nodes
+        waiting = self.animator.submit(algo_name, animate, expected)
+        if waiting:
+            self.control_panel.log(f"⏳ {algo_name} queued ({waiting} waiting).")
+
+    def on_animation_started(self, label):
+        # Start Animation Loop (xóa highlight cũ, dựng cảnh nếu đồ thị đã đổi)
+        self.redraw()
+        self.step_state = self.animator.state
+        self.control_panel.set_timeline(0) # Thanh thời gian khóa tới khi có bản ghi mới
+        self.control_panel.log(f"▶️ Animating {label}...")
+
+    def query_oracle(self, start_node, end_node):
+        """Truy vấn qua DistanceOracle (dựng một lần, tự cập nhật theo phiên bản đồ thị)"""
+        if self.oracle is None:
+            self.oracle = DistanceOracle(self.graph_manager)
+            self.control_panel.log(f"🗺️ Distance oracle built ({self.oracle.mode}).")
+        return self.oracle.path(start_node, end_node)
 
-    def run_animation_step(self):
-        """Hàm được gọi liên tục bởi QTimer để vẽ từng bước"""
+    def query_mst(self):
+        """MST toàn cục: dựng một lần, sau đó chỉ hoán đổi cạnh khi tuyến được thêm / giảm trọng số"""
+        if self.dynamic_mst is None:
+            self.dynamic_mst = DynamicMST(self.graph_manager)
+            return self.dynamic_mst.result()
+        previous = MSTResult(self.dynamic_mst.edges(), self.dynamic_mst.total_weight) # Cây trước khi đồng bộ
+        steps = self.dynamic_mst.refresh()
+        if steps and not any(step.clear_edges for step in steps):
+            swapped = sum(len(step.removed) // 2 for step in steps)
+            self.control_panel.log(f"🔁 MST updated incrementally: {len(steps)} changes, {swapped} edges swapped.")
+            self._mst_delta = (previous, steps)
+        return self.dynamic_mst.result()
+
+    def query_gomory_hu(self, start_node, end_node):
+        """Cây Gomory-Hu được cache theo phiên bản đồ thị; mỗi truy vấn chỉ đi trên cây"""
+        tree = self.graph_manager.cached('gomory_hu', lambda: gomory_hu_tree(self.graph_manager.core))
+        edge = tree.bottleneck_edge(start_node, end_node) if start_node != end_node else None
+        if edge:
+            self.control_panel.log(f"✂️ Min cut {start_node} ⇄ {end_node}: {edge[2]:.2f} "
+                                   f"(tree edge {edge[0]} - {edge[1]})")
+        return tree
+
+    def show_result(self, result, elapsed):
+        """Ghi tóm tắt kết quả (chế độ tính ngay) và vẽ trạng thái cuối một lần"""
+        if isinstance(result, PathResult):
+            if result.path:
+                self.control_panel.log(f"📏 Distance: {result.distance:.2f} via {' ➔ '.join(map(str, result.path))}")
+            else:
+                self.control_panel.log("⚠️ No route between the selected nodes.")
+            self.control_panel.log(f"Settled {result.settled} nodes.")
+        elif isinstance(result, MSTResult):
+            self.control_panel.log(f"🌲 MST: {len(result.edges)} edges, total weight {result.total_weight:.2f}")
+            if result.components > 1:
+                self.control_panel.log(f"ℹ️ Graph is disconnected: minimum spanning forest of {result.components} trees.")
+            delta, self._mst_delta = self._mst_delta, None
+            if delta is not None:
+                # Cây cũ (không đổi gì nếu đang hiển thị sẵn) rồi chỉ vẽ các cạnh bị hoán đổi
+                previous, steps = delta
+                nodes, edges = previous.highlight()
+                self.redraw(path_edges=edges, highlighted_nodes=nodes)
+                for step in steps:
+                    self.canvas_widget.apply_step(step)
+                self.control_panel.log(f"✅ Computed in {elapsed * 1000:.1f} ms.")
+                return
+        elif isinstance(result, FlowResult):
+            self.control_panel.log(f"🌊 Max flow value: {result.value:.2f} over {len(result.flows)} edges")
+            self.control_panel.log(f"✂️ Min cut: {len(result.cut_edges)} edges, "
+                                   f"{len(result.source_side)} nodes on the source side")
+        elif isinstance(result, CircuitResult):
+            self.control_panel.log(f"∞ Circuit: {len(result.circuit)} edges "
+                                   f"({len(result.added_edges)} repeated by Eulerize)")
+        elif isinstance(result, TraversalResult):
+            self.control_panel.log(f"Visited {len(result.order)} nodes.")
+        elif isinstance(result, GomoryHuTree):
+            self.control_panel.log(f"🌳 Gomory-Hu tree: {len(result.edges())} edges (dashed overlay)")
+            _, overlay = result.highlight()
+            self.redraw(overlay_edges=overlay)
+            self.control_panel.log(f"✅ Computed in {elapsed * 1000:.1f} ms.")
+            return
+
+        nodes, edges = result.highlight()
+        self.redraw(path_edges=edges, highlighted_nodes=nodes)
+        self.control_panel.log(f"✅ Computed in {elapsed * 1000:.1f} ms.")
+
+    def run_animation_step(self, step):
+        """
+        Vẽ một frame. Step là delta đã gộp của mọi bước thuật toán kể từ frame trước
+        (bộ lập lịch đã áp từng bước vào step_state).
+        """
         try:
-            # Lấy bước tiếp theo
-            step_data = next(self.current_algo_generator)
-            
-            # Unpack dữ liệu: (Node đang xét, List node đã thăm, List cạnh đường đi)
-            current_node, visited_nodes, path_edges = step_data
-            
-            # Cập nhật giao diện
-            self.canvas_widget.plot_graph(
-                self.graph_manager.G,
-                self.graph_manager.positions,
-                path_edges=path_edges,
-                highlighted_nodes=visited_nodes
-            )
-            
-        except StopIteration:
-            # Khi thuật toán chạy xong
-            self.timer.stop()
-            self.is_running = False
-            self.control_panel.log("✅ Algorithm Finished Successfully.")
-            QMessageBox.information(self, "Done", "Mission Accomplished!")
-            
+            # Canvas chỉ đổi màu các cạnh/node trong delta (artist được dùng lại)
+            self.canvas_widget.apply_step(step)
         except Exception as e:
-            self.timer.stop()
-            self.is_running = False
-            self.control_panel.log(f"❌ Runtime Error: {e}")
\ No newline at end of file
+            self.animator.cancel()
+            self.on_animation_failed(str(e))
+
+    def on_animation_finished(self, n_steps):
+        # Khi thuật toán chạy xong (còn lần chạy xếp hàng thì không hiện hộp thoại)
+        self._set_trace(self.animator.trace)
+        self.control_panel.log(f"🎞️ {n_steps} steps rendered in {self.animator.frames} frames.")
+        self.control_panel.log("✅ Algorithm Finished Successfully.")
+        if not self.animator.pending:
+            QMessageBox.information(self, "Done", "Mission Accomplished!")
+
+    def on_animation_failed(self, error_msg):
+        self._set_trace(self.animator.trace)
+        self.control_panel.log(f"❌ Runtime Error: {error_msg}")
+
+    # =========================================================================
+    #  PHẦN 4: BẢN GHI ANIMATION (TUA / PHÁT LẠI / LƯU)
+    # =========================================================================
+
+    def _set_trace(self, trace):
+        self.trace = trace
+        self.control_panel.set_timeline(trace.n_steps if trace is not None else 0)
+
+    def seek_trace(self, k):
+        """Vẽ trạng thái sau k bước của bản ghi (nạp keyframe gần nhất + delta)"""
+        if self.trace is None or self.is_running:
+            return
+        self.step_state = self.trace.seek(k)
+        self.redraw(path_edges=list(self.step_state.edges),
+                    highlighted_nodes=list(self.step_state.visited))
+
+    def replay_trace(self):
+        """Phát lại bản ghi qua bộ lập lịch animation, không chạy lại thuật toán"""
+        if self.trace is None:
+            return
+        self.control_panel.log(f"🔁 Replaying {self.trace.label} ({self.trace.n_steps} steps)...")
+        trace = self.trace
+        waiting = self.animator.submit(trace.label, trace.steps, trace.n_steps)
+        if waiting:
+            self.control_panel.log(f"⏳ Replay queued ({waiting} waiting).")
+
+    def save_trace_file(self):
+        """Lưu bản ghi animation ra file NPZ"""
+        if self.trace is None:
+            return
+        filename, _ = QFileDialog.getSaveFileName(self, "Save Trace", "", "Trace Files (*.npz)")
+        if filename:
+            success, msg = file_io.save_trace_to_npz(self.trace, filename)
+            if success:
+                self.control_panel.log(f"💾 Trace saved to {filename} "
+                                       f"({self.trace.n_steps} steps, {self.trace.nbytes / 1e6:.1f} MB in memory)")
+            else:
+                QMessageBox.critical(self, "Error", msg)
+
+    def load_trace_file(self):
+        """Mở bản ghi animation đã lưu và hiện trạng thái cuối (tua bằng thanh thời gian)"""
+        if self.is_running:
+            self.control_panel.log("⚠️ An animation is running. Please wait or reset.")
+            return
+        filename, _ = QFileDialog.getOpenFileName(self, "Open Trace", "", "Trace Files (*.npz)")
+        if filename:
+            success, trace = file_io.load_trace_from_npz(filename)
+            if not success:
+                QMessageBox.critical(self, "Error", "Failed to load trace.")
+                return
+            missing = sum(1 for name in trace.names if name not in self.graph_manager.G)
+            if missing:
+                self.control_panel.log(f"ℹ️ {missing} nodes in the trace are not in the current graph.")
+            self._set_trace(trace)
+            self.control_panel.log(f"📂 Loaded trace {trace.label} ({trace.n_steps} steps) from {filename}")
+            self.seek_trace(trace.n_steps)
@@ -1,13 +1,24 @@
 # -*- coding: utf-8 -*-
 # Module: astro_data.py
 # Project: solar-system-graph
-# Chức năng: Lấy dữ liệu tọa độ hành tinh từ NASA Horizons (Chạy đa luồng)
+# Chức năng: Lấy dữ liệu tọa độ hành tinh từ NASA Horizons (Chạy đa luồng, truy vấn song song, cache trên đĩa)
 
+import logging
 import numpy as np
+import os
+import requests
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from PyQt6.QtCore import QThread, pyqtSignal
-from datetime import datetime
+from datetime import datetime, timedelta
 import warnings
 
+from utils.ephemeris import Ephemeris
+
+log = logging.getLogger(__name__)
+
 # Tắt cảnh báo không cần thiết từ astropy
 warnings.filterwarnings('ignore')
 
@@ -31,10 +42,273 @@ PLANET_IDS = {
     'Neptune': '899'
 }
 
+# Cấu hình truy vấn
+HORIZONS_API_URL = "https://ssd.jpl.nasa.gov/api/horizons.api"
+FETCH_WORKERS = 8       # Số truy vấn chạy song song tối đa
+FETCH_TIMEOUT = 15.0    # Giây cho mỗi request
+FETCH_RETRIES = 3       # Số lần thử lại khi lỗi mạng / server
+RETRY_BACKOFF = 0.5     # Giây chờ trước lần thử lại đầu, nhân đôi sau mỗi lần
+
+# Tải cả khoảng thời gian (một truy vấn mỗi thiên thể)
+EPHEMERIS_SPAN_DAYS = 60    # Độ dài khoảng mặc định tính từ hôm nay
+EPHEMERIS_STEP = "1 d"      # Bước lưới thời gian của Horizons (giữa các mốc thì nội suy)
+
+# Cache vector vị trí trên đĩa
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".solar-system-graph", "ephemeris.sqlite")
+CACHE_PATH_ENV = "SOLAR_SYSTEM_GRAPH_CACHE" # Biến môi trường đổi file cache (vd. khi test)
+CACHE_TTL = 30 * 24 * 3600  # Giây: bản ghi cũ hơn thì tải lại (vẫn dùng được khi offline)
+CACHE_MAX_ENTRIES = 20000   # Vượt quá thì xóa các bản ghi lâu không dùng nhất (LRU)
+REFERENCE_FRAME = "500@10/ECLIPTIC" # Tâm Mặt Trời, mặt phẳng hoàng đạo (như các transport)
+
+# Kết quả tải: positions = {tên: np.array([x, y, z])} của các thiên thể tải được,
+# errors = {tên: thông báo lỗi} của các thiên thể thất bại
+FetchResult = namedtuple('FetchResult', ['positions', 'errors'])
+
+# Kết quả tải theo khoảng: times = mảng ngày Julius (T,) chung, tracks = {tên: mảng (T, 3)},
+# errors như trên. times là None nếu không thiên thể nào tải được.
+RangeResult = namedtuple('RangeResult', ['times', 'tracks', 'errors'])
+
+# =========================================================================
+#  TRANSPORT: cách lấy vector vị trí của một thiên thể (thay được khi test / đổi server)
+#  Giao diện chung: fetch(body_id, epoch, timeout) -> np.array([x, y, z]) (AU, tâm Mặt Trời)
+#  và fetch_range(body_id, start, stop, step, timeout) -> (ngày Julius (T,), vị trí (T, 3))
+#  ValueError = yêu cầu / dữ liệu sai (không thử lại); lỗi khác = lỗi tạm thời (thử lại).
+# =========================================================================
+
+class AstroqueryTransport:
+    """Truy vấn qua astroquery.jplhorizons"""
+
+    def fetch(self, body_id, epoch, timeout):
+        # location='@sun' nghĩa là lấy tọa độ tương đối so với Mặt Trời
+        obj = Horizons(id=body_id, location='@sun', epochs=epoch)
+        obj.TIMEOUT = timeout
+        vectors = obj.vectors()
+        # Lấy tọa độ x, y, z (đơn vị AU)
+        return np.array([float(vectors['x'][0]), float(vectors['y'][0]), float(vectors['z'][0])])
+
+    def fetch_range(self, body_id, start, stop, step, timeout):
+        obj = Horizons(id=body_id, location='@sun', epochs={'start': start, 'stop': stop, 'step': step})
+        obj.TIMEOUT = timeout
+        vectors = obj.vectors()
+        xyz = np.column_stack([np.asarray(vectors[c], dtype=np.float64) for c in ('x', 'y', 'z')])
+        return np.asarray(vectors['datetime_jd'], dtype=np.float64), xyz
+
+class HorizonsHTTPTransport:
+    """
+    Gọi thẳng Horizons API qua HTTP (không cần astroquery).
+    base_url đổi được để trỏ tới server khác (vd. server giả lập cục bộ khi test).
+    """
+
+    def __init__(self, base_url=HORIZONS_API_URL):
+        self.base_url = base_url
+
+    def fetch(self, body_id, epoch, timeout):
+        stop = (datetime.strptime(epoch, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        return self.fetch_range(body_id, epoch, stop, "1 d", timeout)[1][0]
+
+    def fetch_range(self, body_id, start, stop, step, timeout):
+        params = {
+            'format': 'json',
+            'COMMAND': f"'{body_id}'",
+            'OBJ_DATA': "'NO'",
+            'MAKE_EPHEM': "'YES'",
+            'EPHEM_TYPE': "'VECTORS'",
+            'CENTER': "'500@10'",       # Tâm Mặt Trời
+            'REF_PLANE': "'ECLIPTIC'",
+            'START_TIME': f"'{start}'",
+            'STOP_TIME': f"'{stop}'",
+            'STEP_SIZE': f"'{step}'",
+            'VEC_TABLE': "'1'",         # Chỉ vị trí
+            'OUT_UNITS': "'AU-D'",
+            'CSV_FORMAT': "'YES'",
+        }
+        response = requests.get(self.base_url, params=params, timeout=timeout)
+        if 400 <= response.status_code < 500:
+            raise ValueError(f"Horizons rejected body {body_id}: HTTP {response.status_code}")
+        response.raise_for_status() # 5xx -> thử lại
+        return parse_vector_table(response.json().get('result', ''))
+
+def parse_vector_table(text):
+    """
+    Các dòng giữa $$SOE và $$EOE (bảng VECTORS dạng CSV):
+    trả về (ngày Julius (T,), X Y Z (T, 3)).
+    """
+    if '$$SOE' not in text or '$$EOE' not in text:
+        raise ValueError("No ephemeris block in Horizons response")
+    block = text.split('$$SOE', 1)[1].split('$$EOE', 1)[0].strip()
+    if not block:
+        raise ValueError("Empty ephemeris block in Horizons response")
+    rows = [[f.strip() for f in line.split(',')] for line in block.splitlines() if line.strip()]
+    times = np.array([float(row[0]) for row in rows])
+    xyz = np.array([[float(f) for f in row[2:5]] for row in rows])
+    return times, xyz
+
+def parse_vectors(text):
+    """X, Y, Z của dòng đầu tiên giữa $$SOE và $$EOE"""
+    return parse_vector_table(text)[1][0]
+
+def default_transport():
+    return AstroqueryTransport() if HAS_ASTROQUERY else HorizonsHTTPTransport()
+
+# =========================================================================
+#  TẢI SONG SONG
+# =========================================================================
+
+def _fetch_with_retry(fetch, args, retries, backoff):
+    """Một thiên thể: thử lại với backoff lũy thừa (backoff, 2*backoff, ...) khi gặp lỗi tạm thời"""
+    for attempt in range(retries + 1):
+        try:
+            return fetch(*args)
+        except ValueError:
+            raise # Yêu cầu / dữ liệu sai: thử lại cũng vô ích
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+def fetch_bodies(bodies, epoch, transport=None, workers=FETCH_WORKERS, timeout=FETCH_TIMEOUT,
+                 retries=FETCH_RETRIES, backoff=RETRY_BACKOFF):
+    """
+    Tải vị trí các thiên thể song song (thread pool giới hạn `workers`).
+    bodies: {tên: Horizons ID}. Thiên thể lỗi không làm hỏng cả lô.
+    Trả về FetchResult(positions, errors) theo thứ tự của bodies.
+    """
+    transport = transport or default_transport()
+    positions, errors = {}, {}
+    if not bodies:
+        return FetchResult(positions, errors)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(bodies))) as pool:
+        futures = {name: pool.submit(_fetch_with_retry, transport.fetch, (body_id, epoch, timeout),
+                                     retries, backoff)
+                   for name, body_id in bodies.items()}
+        for name, future in futures.items():
+            try:
+                positions[name] = future.result()
+            except Exception as e:
+                errors[name] = str(e) or type(e).__name__
+    return FetchResult(positions, errors)
+
+def fetch_range(bodies, start, stop, step=EPHEMERIS_STEP, transport=None, workers=FETCH_WORKERS,
+                timeout=FETCH_TIMEOUT, retries=FETCH_RETRIES, backoff=RETRY_BACKOFF):
+    """
+    Tải quỹ đạo các thiên thể trên [start, stop] ('YYYY-MM-DD'), mỗi thiên thể một truy vấn, song song.
+    Thiên thể có lưới thời gian khác thiên thể đầu tiên tải được bị coi là lỗi.
+    Trả về RangeResult(times, tracks, errors).
+    """
+    transport = transport or default_transport()
+    tracks, errors = {}, {}
+    times = None
+    if not bodies:
+        return RangeResult(times, tracks, errors)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(bodies))) as pool:
+        futures = {name: pool.submit(_fetch_with_retry, transport.fetch_range,
+                                     (body_id, start, stop, step, timeout), retries, backoff)
+                   for name, body_id in bodies.items()}
+        for name, future in futures.items():
+            try:
+                jd, xyz = future.result()
+            except Exception as e:
+                errors[name] = str(e) or type(e).__name__
+                continue
+            if times is None:
+                times = jd
+            elif len(jd) != len(times) or not np.allclose(jd, times):
+                errors[name] = f"Epoch grid mismatch ({len(jd)} vs {len(times)} epochs)"
+                continue
+            tracks[name] = xyz
+    return RangeResult(times, tracks, errors)
+
+# =========================================================================
+#  CACHE EPHEMERIS (SQLite)
+# =========================================================================
+
+class EphemerisCache:
+    """
+    Cache vector vị trí trên đĩa, khóa (body id, epoch, hệ quy chiếu).
+    - get_many chỉ trả về bản ghi còn hạn (TTL); latest lấy bản mới nhất bất kể hạn (dùng khi offline).
+    - Mỗi lần đọc cập nhật thời điểm dùng; quá max_entries thì xóa bản lâu không dùng nhất.
+    Mỗi thao tác mở một kết nối riêng nên dùng được từ bất kỳ luồng nào.
+    path mặc định: biến môi trường CACHE_PATH_ENV, không có thì CACHE_PATH (đọc lúc tạo cache).
+    """
+
+    def __init__(self, path=None, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES,
+                 frame=REFERENCE_FRAME):
+        self.path = path or os.environ.get(CACHE_PATH_ENV) or CACHE_PATH
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.frame = frame
+
+    def _connect(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        con = sqlite3.connect(self.path, timeout=5.0)
+        con.execute("""CREATE TABLE IF NOT EXISTS vectors (
+                           body TEXT, epoch TEXT, frame TEXT, x REAL, y REAL, z REAL,
+                           fetched_at REAL, used_at REAL,
+                           PRIMARY KEY (body, epoch, frame))""")
+        con.execute("CREATE INDEX IF NOT EXISTS vectors_lru ON vectors (used_at)")
+        return con
+
+    def get_many(self, body_ids, epoch):
+        """{body id: vector} của các bản ghi còn hạn"""
+        body_ids = list(body_ids)
+        if not body_ids:
+            return {}
+        now = time.time()
+        con = self._connect()
+        try:
+            with con:
+                rows = con.execute(
+                    f"""SELECT body, x, y, z FROM vectors
+                        WHERE epoch = ? AND frame = ? AND fetched_at >= ?
+                        AND body IN ({','.join('?' * len(body_ids))})""",
+                    [epoch, self.frame, now - self.ttl, *body_ids]).fetchall()
+                con.executemany("UPDATE vectors SET used_at = ? WHERE body = ? AND epoch = ? AND frame = ?",
+                                [(now, body, epoch, self.frame) for body, *_ in rows])
+        finally:
+            con.close()
+        return {body: np.array(xyz) for body, *xyz in rows}
+
+    def put_many(self, vectors, epoch):
+        """Ghi {body id: vector} rồi cắt bớt theo LRU"""
+        if not vectors:
+            return
+        now = time.time()
+        con = self._connect()
+        try:
+            with con:
+                con.executemany("INSERT OR REPLACE INTO vectors VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                [(body, epoch, self.frame, *map(float, v), now, now)
+                                 for body, v in vectors.items()])
+                excess = con.execute("SELECT COUNT(*) FROM vectors").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    con.execute("""DELETE FROM vectors WHERE rowid IN
+                                   (SELECT rowid FROM vectors ORDER BY used_at LIMIT ?)""", (excess,))
+        finally:
+            con.close()
+
+    def latest(self, body_id):
+        """(epoch, vector) mới nhất của thiên thể, kể cả đã hết hạn; None nếu chưa có"""
+        con = self._connect()
+        try:
+            with con:
+                row = con.execute("""SELECT epoch, x, y, z FROM vectors WHERE body = ? AND frame = ?
+                                     ORDER BY epoch DESC LIMIT 1""", (body_id, self.frame)).fetchone()
+                if row is not None:
+                    con.execute("UPDATE vectors SET used_at = ? WHERE body = ? AND epoch = ? AND frame = ?",
+                                (time.time(), body_id, row[0], self.frame))
+        finally:
+            con.close()
+        return None if row is None else (row[0], np.array(row[1:]))
+
 class AstroDataFetcher(QThread):
     """
     Class xử lý việc tải dữ liệu từ NASA trên luồng riêng (Background Thread).
-    Không làm treo giao diện chính.
+    Không làm treo giao diện chính. Các thiên thể được truy vấn song song;
+    thiên thể nào lỗi thì báo riêng qua body_errors, phần còn lại vẫn được dùng.
     """
     # Signal bắn dữ liệu về UI khi tải xong: trả về dict {tên: (x, y, z)}
     data_ready = pyqtSignal(dict)
@@ -42,44 +316,82 @@ class AstroDataFetcher(QThread):
     # Signal báo lỗi nếu mất mạng hoặc API lỗi
     data_error = pyqtSignal(str)
 
-    def __init__(self, use_realtime=True):
+    # Signal báo lỗi theo từng thiên thể: {tên: thông báo lỗi}
+    body_errors = pyqtSignal(dict)
+
+    def __init__(self, use_realtime=True, transport=None, bodies=None, workers=FETCH_WORKERS,
+                 timeout=FETCH_TIMEOUT, retries=FETCH_RETRIES, cache=None, use_cache=True):
         super().__init__()
         self.use_realtime = use_realtime
         self.current_date = datetime.now().strftime("%Y-%m-%d")
+        self.transport = transport
+        self.bodies = dict(bodies) if bodies is not None else dict(PLANET_IDS)
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = (cache or EphemerisCache()) if use_cache else None
+        self.cache_hits = 0
 
     def run(self):
-        """Hàm này sẽ tự động chạy khi gọi .start()"""
+        """
+        Hàm này sẽ tự động chạy khi gọi .start()
+        Thứ tự: cache còn hạn -> tải phần còn thiếu (rồi ghi vào cache)
+        -> bản cache gần nhất (offline / lỗi mạng) -> Mock nếu cache trống.
+        """
         
         # Dữ liệu chứa Sun ở tâm
         solar_system_data = {
             'Sun': np.array([0.0, 0.0, 0.0])
         }
+        positions, errors = {}, {}
 
-        if self.use_realtime and HAS_ASTROQUERY:
-            try:
-                # Gửi request lấy dữ liệu cho từng hành tinh
-                # location='@sun' nghĩa là lấy tọa độ tương đối so với Mặt Trời
-                for name, pid in PLANET_IDS.items():
-                    obj = Horizons(id=pid, location='@sun', epochs=self.current_date)
-                    vectors = obj.vectors()
-                    
-                    # Lấy tọa độ x, y, z (đơn vị AU)
-                    x = float(vectors['x'][0])
-                    y = float(vectors['y'][0])
-                    z = float(vectors['z'][0])
-                    
-                    solar_system_data[name] = np.array([x, y, z])
-                
-                # Hoàn thành, bắn tín hiệu về
-                self.data_ready.emit(solar_system_data)
+        hits = self._cached('get_many', self.bodies.values(), self.current_date) or {}
+        for name, body_id in self.bodies.items():
+            if body_id in hits:
+                positions[name] = hits[body_id]
+        self.cache_hits = len(positions)
+        missing = {name: body_id for name, body_id in self.bodies.items() if name not in positions}
 
-            except Exception as e:
-                # Lỗi mạng hoặc API, chuyển sang chế độ Mock
-                print(f"Error fetching NASA data: {e}. Switching to offline mode.")
-                self._load_mock_data()
-        else:
-            # Chạy chế độ offline ngay từ đầu
-            self._load_mock_data()
+        if missing and self.use_realtime:
+            result = fetch_bodies(missing, self.current_date, self.transport,
+                                  self.workers, self.timeout, self.retries)
+            positions.update(result.positions)
+            errors.update(result.errors)
+            self._cached('put_many', {self.bodies[name]: vec for name, vec in result.positions.items()},
+                         self.current_date)
+            missing = {name: body_id for name, body_id in missing.items() if name not in positions}
+
+        # Không tải được: dùng vector đã lưu gần nhất của thiên thể đó
+        for name, body_id in missing.items():
+            found = self._cached('latest', body_id)
+            if found is None:
+                continue
+            epoch, positions[name] = found
+            errors[name] = f"{errors.get(name, 'offline')}; using cached vectors from {epoch}"
+
+        if errors:
+            self.body_errors.emit(errors)
+        if positions:
+            # Hoàn thành (có thể thiếu vài thiên thể), bắn tín hiệu về
+            solar_system_data.update((name, positions[name]) for name in self.bodies if name in positions)
+            self.data_ready.emit(solar_system_data)
+            return
+
+        # Không tải được thiên thể nào và cache trống, chuyển sang chế độ Mock
+        log.warning("Error fetching NASA data: %d bodies failed, cache empty. Switching to offline mode.",
+                    len(errors))
+        self._load_mock_data()
+
+    def _cached(self, method, *args):
+        """Gọi một thao tác của cache; cache không dùng được (khóa, không ghi được...) thì tắt cache"""
+        if self.cache is None:
+            return None
+        try:
+            return getattr(self.cache, method)(*args)
+        except (sqlite3.Error, OSError) as e:
+            log.warning("Ephemeris cache disabled (%s): %s", self.cache.path, e)
+            self.cache = None
+            return None
 
     def _load_mock_data(self):
         """Dữ liệu giả lập (Offline) dùng khi mất mạng hoặc test nhanh"""
@@ -97,4 +409,48 @@ class AstroDataFetcher(QThread):
         }
         # Nếu dùng mock thì delay 1 chút để mô phỏng việc loading
         self.msleep(500) 
-        self.data_ready.emit(mock_data)
\ No newline at end of file
+        self.data_ready.emit(mock_data)
+
+
+class EphemerisFetcher(QThread):
+    """
+    Tải quỹ đạo các thiên thể trên một khoảng thời gian (luồng riêng) thành Ephemeris (T, N, 3).
+    Sau đó đổi epoch chỉ cần nội suy, không gọi mạng nữa. Sun cố định tại tâm.
+    """
+    # Signal bắn Ephemeris về UI khi tải xong
+    ephemeris_ready = pyqtSignal(object)
+
+    # Signal báo lỗi khi không tải được thiên thể nào
+    data_error = pyqtSignal(str)
+
+    # Signal báo lỗi theo từng thiên thể: {tên: thông báo lỗi}
+    body_errors = pyqtSignal(dict)
+
+    def __init__(self, start=None, days=EPHEMERIS_SPAN_DAYS, step=EPHEMERIS_STEP, transport=None,
+                 bodies=None, workers=FETCH_WORKERS, timeout=FETCH_TIMEOUT, retries=FETCH_RETRIES):
+        super().__init__()
+        start = start or datetime.now()
+        self.start_date = start.strftime("%Y-%m-%d")
+        self.stop_date = (start + timedelta(days=days)).strftime("%Y-%m-%d")
+        self.step = step
+        self.transport = transport
+        self.bodies = dict(bodies) if bodies is not None else dict(PLANET_IDS)
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+
+    def run(self):
+        try:
+            result = fetch_range(self.bodies, self.start_date, self.stop_date, self.step, self.transport,
+                                 self.workers, self.timeout, self.retries)
+            if result.errors:
+                self.body_errors.emit(result.errors)
+            if not result.tracks:
+                self.data_error.emit(f"No ephemeris data for {self.start_date} .. {self.stop_date}: "
+                                     f"{len(result.errors)} bodies failed.")
+                return
+            tracks = {'Sun': np.zeros((len(result.times), 3))}
+            tracks.update((name, result.tracks[name]) for name in self.bodies if name in result.tracks)
+            self.ephemeris_ready.emit(Ephemeris.from_tracks(result.times, tracks))
+        except Exception as e:
+            self.data_error.emit(f"Ephemeris ingestion failed: {e}")
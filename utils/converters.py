@@ -3,18 +3,24 @@
 # Project: solar-system-graph
 # Chức năng: Chuyển đổi định dạng dữ liệu
 
-import networkx as nx
-import numpy as np
+from algorithms.graph_base import DENSE_LIMIT
 
-def graph_to_adj_matrix_text(G):
-    """Chuyển ma trận kề thành String đẹp"""
-    nodes = list(G.nodes())
-    matrix = nx.to_numpy_array(G, nodelist=nodes)
+def graph_to_adj_matrix_text(space_graph, dense_limit=DENSE_LIMIT):
+    """Chuyển ma trận kề thành String đẹp (đọc từ ma trận thưa dùng chung của SpaceGraph)"""
+    nodes, matrix = space_graph.get_sparse_adjacency()
+    n = len(nodes)
+    if n > dense_limit:
+        raise ValueError(f"Graph has {n} nodes; text matrix is limited to {dense_limit}.")
     
-    text = "   " + "  ".join([f"{n[:3]:>4}" for n in nodes]) + "\n"
-    for i, row in enumerate(matrix):
-        row_str = "  ".join([f"{val:4.1f}" if val > 0 else "   ." for val in row])
-        text += f"{nodes[i][:3]:>3} {row_str}\n"
+    text = "   " + "  ".join([f"{str(node)[:3]:>4}" for node in nodes]) + "\n"
+    for i in range(n):
+        # Chỉ các ô khác 0 được lấy từ CSR, còn lại điền dấu chấm
+        cells = ["   ."] * n
+        start, end = matrix.indptr[i], matrix.indptr[i + 1]
+        for col, val in zip(matrix.indices[start:end], matrix.data[start:end]):
+            if val > 0:
+                cells[col] = f"{val:4.1f}"
+        text += f"{str(nodes[i])[:3]:>3} {'  '.join(cells)}\n"
     return text
 
 def graph_to_edge_list_text(G):
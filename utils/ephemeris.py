@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# Module: ephemeris.py
+# Project: solar-system-graph
+# Chức năng: Quỹ đạo nhiều thiên thể trên một khoảng thời gian (mảng (T, N, 3)) và nội suy vị trí tại epoch bất kỳ
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Mốc J2000.0 (2000-01-01 12:00) theo ngày Julius
+J2000 = 2451545.0
+_J2000_DATE = datetime(2000, 1, 1, 12)
+
+def julian_day(when):
+    """Ngày Julius của 'YYYY-MM-DD' hoặc datetime (coi như TDB; lệch ~1 phút so với UTC, đủ cho hiển thị)"""
+    if isinstance(when, str):
+        when = datetime.strptime(when, "%Y-%m-%d")
+    return J2000 + (when - _J2000_DATE) / timedelta(days=1)
+
+def calendar_date(jd):
+    """Ngược lại của julian_day: datetime"""
+    return _J2000_DATE + timedelta(days=float(jd) - J2000)
+
+class Ephemeris:
+    """
+    Vị trí của N thiên thể tại T mốc thời gian: mảng liền (T, N, 3) float64 (AU),
+    mốc theo ngày Julius, tăng chặt.
+    at(t) nội suy Hermite bậc 3; đạo hàm tại các mốc lấy theo sai phân bậc 2 (bậc 1 khi chỉ có 2 mốc),
+    tính sẵn một lần.
+    t nằm ngoài [start, stop] -> ValueError (không ngoại suy).
+    """
+
+    def __init__(self, names, times, positions):
+        self.names = list(names)
+        self.times = np.asarray(times, dtype=np.float64)
+        self.positions = np.ascontiguousarray(positions, dtype=np.float64)
+        if self.positions.shape != (len(self.times), len(self.names), 3):
+            raise ValueError(f"Positions shape {self.positions.shape} does not match "
+                             f"{len(self.times)} epochs x {len(self.names)} bodies")
+        if len(self.times) < 2 or np.any(np.diff(self.times) <= 0):
+            raise ValueError("Ephemeris needs at least 2 strictly increasing epochs")
+        # Sai phân bậc 2 ở biên cần ít nhất 3 mốc
+        edge_order = 2 if len(self.times) >= 3 else 1
+        self.velocities = np.gradient(self.positions, self.times, axis=0, edge_order=edge_order)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self._times = self.times.tolist()
+
+    @classmethod
+    def from_tracks(cls, times, tracks):
+        """tracks: {tên: mảng (T, 3)} cùng lưới thời gian `times`"""
+        names = list(tracks)
+        positions = np.stack([np.asarray(tracks[name], dtype=np.float64) for name in names], axis=1)
+        return cls(names, times, positions)
+
+    @property
+    def start(self):
+        return self._times[0]
+
+    @property
+    def stop(self):
+        return self._times[-1]
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.positions.nbytes + self.velocities.nbytes
+
+    def _check(self, lo, hi):
+        if lo < self._times[0] or hi > self._times[-1]:
+            raise ValueError(f"Epoch outside ephemeris range "
+                             f"[{calendar_date(self.start):%Y-%m-%d %H:%M}, {calendar_date(self.stop):%Y-%m-%d %H:%M}]")
+
+    def at(self, t):
+        """
+        Vị trí mọi thiên thể tại ngày Julius t.
+        t vô hướng -> mảng (N, 3); t là mảng (K,) -> mảng (K, N, 3).
+        """
+        if np.ndim(t) == 0:
+            # Đường nhanh cho một epoch (thanh trượt): chỉ tính hệ số bằng float
+            t = float(t)
+            self._check(t, t)
+            times = self._times
+            i = min(bisect_right(times, t), len(times) - 1) - 1
+            h = times[i + 1] - times[i]
+            s = (t - times[i]) / h
+            s2 = s * s
+            s3 = s2 * s
+            P, V = self.positions, self.velocities
+            return ((2 * s3 - 3 * s2 + 1) * P[i] + (s3 - 2 * s2 + s) * h * V[i]
+                    + (3 * s2 - 2 * s3) * P[i + 1] + (s3 - s2) * h * V[i + 1])
+
+        t = np.asarray(t, dtype=np.float64)
+        if t.size:
+            self._check(t.min(), t.max())
+        i = np.clip(np.searchsorted(self.times, t, side='right') - 1, 0, len(self.times) - 2)
+        h = self.times[i + 1] - self.times[i]
+        s = (t - self.times[i]) / h
+        s2 = s * s
+        s3 = s2 * s
+        col = (slice(None), None, None)
+        P, V = self.positions, self.velocities
+        return ((2 * s3 - 3 * s2 + 1)[col] * P[i] + ((s3 - 2 * s2 + s) * h)[col] * V[i]
+                + (3 * s2 - 2 * s3)[col] * P[i + 1] + ((s3 - s2) * h)[col] * V[i + 1])
+
+    def positions_at(self, t):
+        """{tên: np.array([x, y, z])} tại ngày Julius t (dạng như AstroDataFetcher.data_ready)"""
+        return dict(zip(self.names, self.at(t)))
@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
 # Module: file_io.py
 # Project: solar-system-graph
-# Chức năng: Đọc/Ghi dữ liệu đồ thị ra file JSON
+# Chức năng: Đọc/Ghi dữ liệu đồ thị ra file JSON, bản ghi animation ra file NPZ
 
 import json
 import networkx as nx
 import numpy as np
 
+from algorithms.trace import StepTrace
+
 def save_graph_to_json(G, positions, filepath):
     """Lưu đồ thị và tọa độ ra file JSON"""
     data = {
@@ -65,4 +67,23 @@ def load_graph_from_json(filepath):
             
         return True, G, positions
     except Exception as e:
-        return False, None, None
\ No newline at end of file
+        return False, None, None
+
+
+def save_trace_to_npz(trace, filepath):
+    """Lưu StepTrace (bản ghi animation) ra file .npz nén"""
+    try:
+        np.savez_compressed(filepath, names=np.array(trace.names, dtype=str),
+                            label=np.array(trace.label), **trace.arrays)
+        return True, "Trace saved successfully."
+    except Exception as e:
+        return False, str(e)
+
+def load_trace_from_npz(filepath):
+    """Đọc StepTrace từ file .npz (tên node được đọc lại dạng chuỗi)"""
+    try:
+        with np.load(filepath, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files if key not in ('names', 'label')}
+            return True, StepTrace(data['names'].tolist(), arrays, str(data['label']))
+    except Exception as e:
+        return False, None